@@ -19,11 +19,19 @@ wait_for_service hbase 16010
 
 echo "Starting data ingestion process..."
 
-# Téléchargement des données
+# Téléchargement des données, puis conversion des CSV GSOD/ISD en Parquet
+# (/data/processed/columnar, lu par l'import à la place des CSV à jour)
+export NOAA_CONVERT_PARQUET=${NOAA_CONVERT_PARQUET:-true}
 python /app/scripts/download_noaa_data.py
 
 # Import des données
 python /app/scripts/import_noaa_data.py
 
+# Compaction des partitions Parquet (fichiers triés par station et date)
+python /app/scripts/compact_parquet.py
+
+# Index de plages par station (sommes cumulées, extrêmes), mis à jour pour les partitions modifiées
+python /app/scripts/build_range_index.py
+
 # Garder le conteneur en vie pour debug si nécessaire
 tail -f /dev/null
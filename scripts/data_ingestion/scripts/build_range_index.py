@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from import_state import ImportState
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("/data/build_range_index.log"),
+        logging.StreamHandler(),
+    ],
+)
+
+DAILY_OBSERVATIONS_PATH = "/data/processed/daily_observations"
+RANGE_INDEX_PATH = "/data/processed/range_index"
+MANIFEST = "index.json"
+
+# Sommes cumulées par jour calendaire: (somme, effectif) par mesure
+PREFIX_DTYPE = np.dtype(
+    [
+        ("temp_sum", "f8"),
+        ("temp_count", "i4"),
+        ("precip_sum", "f8"),
+        ("precip_count", "i4"),
+        ("wind_sum", "f8"),
+        ("wind_count", "i4"),
+    ]
+)
+# Arbre de segments des extrêmes (max de temperature_max, min de temperature_min)
+EXTREMES_DTYPE = np.dtype([("max", "f4"), ("min", "f4")])
+
+SOURCE_COLUMNS = [
+    "station_id",
+    "date",
+    "temperature",
+    "temperature_max",
+    "temperature_min",
+    "precipitation",
+    "wind_speed",
+]
+
+# Colonne source de chaque somme/effectif
+MEASURES = [
+    ("temp", "temperature"),
+    ("precip", "precipitation"),
+    ("wind", "wind_speed"),
+]
+
+
+def build_tree(maxima: np.ndarray, minima: np.ndarray) -> np.ndarray:
+    """Arbre de segments itératif de taille 2n (feuilles en [n, 2n))
+
+    Le nœud i couvre ses enfants 2i et 2i+1; les nœuds sont calculés par
+    blocs [ceil(hi/2), hi) dont les enfants sont tous déjà connus. Les NaN
+    (jours sans mesure) sont ignorés par fmax/fmin.
+    """
+    n = len(maxima)
+    tree = np.full(2 * n, np.nan, dtype=EXTREMES_DTYPE)
+    tree["max"][n:] = maxima
+    tree["min"][n:] = minima
+    hi = n
+    while hi > 1:
+        lo = (hi + 1) // 2
+        nodes = np.arange(lo, hi)
+        tree["max"][nodes] = np.fmax(tree["max"][2 * nodes], tree["max"][2 * nodes + 1])
+        tree["min"][nodes] = np.fmin(tree["min"][2 * nodes], tree["min"][2 * nodes + 1])
+        hi = lo
+    return tree
+
+
+class RangeIndexBuilder:
+    """Index de plages par station: sommes cumulées et arbre de segments
+
+    Pour chaque station, un tableau de sommes cumulées (n+1 lignes) et un
+    arbre de segments des extrêmes (2n lignes) sur les n jours calendaires
+    de sa période, au format .npy pour être projetés en mémoire par le
+    backend. Moyennes et cumuls d'une plage quelconque se lisent en O(1),
+    les extrêmes en O(log n).
+
+    Reconstruction incrémentale: seules les partitions year/month dont les
+    fichiers Parquet ont changé ou disparu (ImportState) sont relues, et
+    seules les stations dont la période recoupe ces mois sont réécrites.
+    Les valeurs journalières des autres mois sont retrouvées dans l'index
+    existant (différences des sommes cumulées et feuilles de l'arbre).
+    """
+
+    def __init__(
+        self,
+        daily_path: str = DAILY_OBSERVATIONS_PATH,
+        index_path: str = RANGE_INDEX_PATH,
+        state: Optional[ImportState] = None,
+    ):
+        self.daily_path = Path(daily_path)
+        self.index_path = Path(index_path)
+        self.state = state or ImportState()
+        self.manifest_path = self.index_path / MANIFEST
+        self.stations: Dict[str, Dict] = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.stations = json.load(f).get("stations", {})
+
+    @staticmethod
+    def _partition(file_path: Path) -> Tuple[int, int]:
+        return (
+            int(file_path.parent.parent.name.split("=")[1]),
+            int(file_path.parent.name.split("=")[1]),
+        )
+
+    def _changed_partitions(
+        self, force: bool
+    ) -> Tuple[List[Tuple[int, int]], List[Path], List[Path]]:
+        """Partitions à relire, fichiers modifiés et fichiers supprimés
+
+        Un fichier supprimé depuis la dernière construction rend sa partition
+        à relire: les valeurs qu'il apportait doivent disparaître de l'index.
+        """
+        files = sorted(self.daily_path.glob("year=*/month=*/*.parquet"))
+        removed = self.state.removed_files("range_index", files)
+        if not force and self.stations:
+            files = self.state.changed_files("range_index", files)
+        partitions = {self._partition(f) for f in files + removed}
+        return sorted(partitions), files, removed
+
+    def _read(self, partitions: List[Tuple[int, int]]) -> pd.DataFrame:
+        expression = None
+        for year, month in partitions:
+            current = (ds.field("year") == year) & (ds.field("month") == month)
+            expression = current if expression is None else expression | current
+
+        aggregations = {}
+        for prefix, column in MEASURES:
+            aggregations[f"{prefix}_sum"] = (column, "sum")
+            aggregations[f"{prefix}_count"] = (column, "count")
+        aggregations["max"] = ("temperature_max", "max")
+        aggregations["min"] = ("temperature_min", "min")
+
+        # Partitions entièrement supprimées: plus aucun fichier à lire
+        if not any(self.daily_path.glob("year=*/month=*/*.parquet")):
+            return pd.DataFrame(columns=["station_id", "date", *aggregations])
+        dataset = ds.dataset(self.daily_path, format="parquet", partitioning="hive")
+        df = dataset.to_table(columns=SOURCE_COLUMNS, filter=expression).to_pandas()
+        df["date"] = pd.to_datetime(df["date"]).dt.date
+        return df.groupby(["station_id", "date"]).agg(**aggregations).reset_index()
+
+    def _load(self, station: str) -> Optional[Tuple[date, Dict[str, np.ndarray]]]:
+        """Valeurs journalières retrouvées dans l'index existant"""
+        entry = self.stations.get(station)
+        if entry is None:
+            return None
+        prefix = np.load(self.index_path / f"{station}.prefix.npy")
+        tree = np.load(self.index_path / f"{station}.extremes.npy")
+        n = len(prefix) - 1
+        daily = {name: np.diff(prefix[name]) for name in PREFIX_DTYPE.names}
+        daily["max"] = tree["max"][n:].copy()
+        daily["min"] = tree["min"][n:].copy()
+        return date.fromisoformat(entry["start"]), daily
+
+    @staticmethod
+    def _empty(days: int) -> Dict[str, np.ndarray]:
+        daily = {
+            name: np.zeros(days, dtype=PREFIX_DTYPE[name])
+            for name in PREFIX_DTYPE.names
+        }
+        daily["max"] = np.full(days, np.nan, dtype="f4")
+        daily["min"] = np.full(days, np.nan, dtype="f4")
+        return daily
+
+    def _span(self, station: str) -> Tuple[date, date]:
+        """Premier et dernier jour couverts par l'index existant d'une station"""
+        entry = self.stations[station]
+        start = date.fromisoformat(entry["start"])
+        return start, start + timedelta(days=entry["days"] - 1)
+
+    def _overlapping_stations(self, partitions: List[Tuple[int, int]]) -> List[str]:
+        """Stations indexées dont la période recoupe un des mois relus"""
+        months = [
+            (date(year, month, 1), date(year + month // 12, month % 12 + 1, 1))
+            for year, month in partitions
+        ]
+        overlapping = []
+        for station in self.stations:
+            start, end = self._span(station)
+            if any(lo <= end and start < hi for lo, hi in months):
+                overlapping.append(station)
+        return overlapping
+
+    def _update_station(
+        self, station: str, rows: pd.DataFrame, partitions: List[Tuple[int, int]]
+    ):
+        """Réécrit une station; rows peut être vide si ses mois relus ont disparu"""
+        existing = self._load(station)
+        bounds = list(rows["date"])
+        if existing:
+            old_start, old_daily = existing
+            old_end = old_start + timedelta(days=len(old_daily["max"]) - 1)
+            bounds += [old_start, old_end]
+        start, end = min(bounds), max(bounds)
+
+        daily = self._empty((end - start).days + 1)
+        if existing:
+            offset = (old_start - start).days
+            for name, values in old_daily.items():
+                daily[name][offset : offset + len(values)] = values
+
+        # Les mois relus remplacent entièrement les valeurs précédentes
+        for year, month in partitions:
+            month_start = date(year, month, 1)
+            month_end = date(year + month // 12, month % 12 + 1, 1)
+            lo = max((month_start - start).days, 0)
+            hi = min((month_end - start).days, len(daily["max"]))
+            if lo < hi:
+                for name in PREFIX_DTYPE.names:
+                    daily[name][lo:hi] = 0
+                daily["max"][lo:hi] = np.nan
+                daily["min"][lo:hi] = np.nan
+
+        positions = (
+            pd.to_datetime(rows["date"]) - pd.Timestamp(start)
+        ).dt.days.to_numpy()
+        for name in PREFIX_DTYPE.names:
+            daily[name][positions] = rows[name].fillna(0).to_numpy()
+        daily["max"][positions] = rows["max"].to_numpy(dtype="f4")
+        daily["min"][positions] = rows["min"].to_numpy(dtype="f4")
+
+        self._save(station, start, daily)
+
+    def _save(self, station: str, start: date, daily: Dict[str, np.ndarray]):
+        n = len(daily["max"])
+        prefix = np.zeros(n + 1, dtype=PREFIX_DTYPE)
+        for name in PREFIX_DTYPE.names:
+            prefix[name][1:] = np.cumsum(daily[name])
+        tree = build_tree(daily["max"], daily["min"])
+
+        for suffix, array in (("prefix", prefix), ("extremes", tree)):
+            target = self.index_path / f"{station}.{suffix}.npy"
+            tmp_path = target.with_name(target.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, target)
+        self.stations[station] = {"start": start.isoformat(), "days": n}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_name(MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "stations": self.stations}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def build(self, force: bool = False) -> int:
+        """Met à jour l'index; retourne le nombre de stations réécrites
+
+        Toutes les stations dont la période recoupe un mois relu sont
+        réécrites, y compris celles absentes des nouvelles données: leurs
+        anciennes valeurs pour ce mois sont effacées.
+        """
+        partitions, files, removed = self._changed_partitions(force)
+        if not partitions:
+            logging.info("Index de plages à jour")
+            return 0
+
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        rows = self._read(partitions)
+        by_station = dict(tuple(rows.groupby("station_id")))
+        stations = set(by_station) | set(self._overlapping_stations(partitions))
+        for station in sorted(stations):
+            station_rows = by_station.get(station, rows.iloc[0:0])
+            self._update_station(station, station_rows, partitions)
+        self._save_manifest()
+        if removed:
+            self.state.forget("range_index", removed)
+        self.state.mark_imported("range_index", files)
+
+        logging.info(
+            f"Index de plages: {len(partitions)} partitions relues "
+            f"({len(removed)} fichiers supprimés), {len(stations)} stations mises à jour"
+        )
+        return len(stations)
+
+
+if __name__ == "__main__":
+    force = os.getenv("NOAA_RANGE_INDEX_REBUILD", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    RangeIndexBuilder().build(force=force)
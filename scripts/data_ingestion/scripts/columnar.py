@@ -0,0 +1,131 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from schemas import GSOD_COLUMNS, ISD_COLUMNS, ColumnSpec, arrow_schema
+
+COLUMNAR_PATH = "/data/processed/columnar"
+
+
+class ColumnarConverter:
+    """Conversion incrémentale des CSV bruts GSOD/ISD en Parquet compressé
+
+    Chaque fichier ``<dataset>/<année>/<station>-<année>.csv`` devient
+    ``<sortie>/<dataset>/year=<année>/station=<station>/data.parquet``.
+    Un fichier n'est reconverti que si le CSV source est plus récent que le
+    Parquet existant (le téléchargement remplace les fichiers de manière
+    atomique, leur date de modification suit donc leur contenu).
+    """
+
+    def __init__(
+        self,
+        raw_path: str = "/data/raw",
+        output_path: str = COLUMNAR_PATH,
+        max_workers: Optional[int] = None,
+    ):
+        self.raw_path = Path(raw_path)
+        self.output_path = Path(output_path)
+        self.compression = os.getenv("NOAA_PARQUET_COMPRESSION", "zstd")
+        self.max_workers = max_workers or int(
+            os.getenv("NOAA_CONVERT_WORKERS", str(os.cpu_count() or 4))
+        )
+
+    def convert_gsod(self) -> int:
+        """Convertit les CSV GSOD avec les types de ``gsod_schema``"""
+        return self._convert_dataset("gsod", GSOD_COLUMNS, extra_as_string=False)
+
+    def convert_isd(self) -> int:
+        """Convertit les CSV ISD; les champs composites restent des chaînes"""
+        return self._convert_dataset("isd", ISD_COLUMNS, extra_as_string=True)
+
+    def target(self, dataset: str, source: Path) -> Path:
+        """Parquet correspondant au CSV ``<dataset>/<année>/<station>-<année>.csv``"""
+        year = source.parent.name
+        station = source.stem.rsplit("-", 1)[0]
+        return (
+            self.output_path
+            / dataset
+            / f"year={year}"
+            / f"station={station}"
+            / "data.parquet"
+        )
+
+    def is_current(self, dataset: str, source: Path) -> bool:
+        """Le Parquet existe-t-il et est-il au moins aussi récent que le CSV ?"""
+        target = self.target(dataset, source)
+        return target.exists() and target.stat().st_mtime >= source.stat().st_mtime
+
+    def _pending_files(self, dataset: str) -> List[Tuple[Path, Path]]:
+        return [
+            (source, self.target(dataset, source))
+            for source in sorted((self.raw_path / dataset).glob("*/*.csv"))
+            if not self.is_current(dataset, source)
+        ]
+
+    def _convert_dataset(
+        self, dataset: str, columns: ColumnSpec, extra_as_string: bool
+    ) -> int:
+        pending = self._pending_files(dataset)
+        if not pending:
+            logging.info(f"Parquet {dataset}: aucun fichier à convertir")
+            return 0
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda task: self._convert_file(
+                        task[0], task[1], columns, extra_as_string
+                    ),
+                    pending,
+                )
+            )
+
+        converted = sum(results)
+        logging.info(
+            f"Parquet {dataset}: {converted}/{len(pending)} fichiers convertis "
+            f"en {time.monotonic() - start:.1f}s"
+        )
+        return converted
+
+    def _convert_file(
+        self, source: Path, target: Path, columns: ColumnSpec, extra_as_string: bool
+    ) -> bool:
+        try:
+            schema = arrow_schema(columns)
+            column_types = {field.name: field.type for field in schema}
+            with open(source, "r", encoding="utf-8") as f:
+                header = [name.strip('"') for name in f.readline().strip().split(",")]
+
+            if extra_as_string:
+                # Colonnes variables (AA1, GA1, ...): lues en texte brut
+                include = header
+                for name in header:
+                    column_types.setdefault(name, pa.string())
+            else:
+                include = [name for name, _ in columns if name in header]
+
+            table = pv.read_csv(
+                source,
+                convert_options=pv.ConvertOptions(
+                    column_types=column_types,
+                    include_columns=include,
+                    strings_can_be_null=True,
+                ),
+            )
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_target = target.with_name(target.name + ".tmp")
+            pq.write_table(table, tmp_target, compression=self.compression)
+            os.replace(tmp_target, target)
+            return True
+        except Exception as e:
+            logging.error(f"Erreur conversion Parquet {source}: {str(e)}")
+            return False
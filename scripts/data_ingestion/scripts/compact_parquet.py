@@ -0,0 +1,203 @@
+from pyspark.sql import SparkSession
+import logging
+import math
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("/data/compact_parquet.log"),
+        logging.StreamHandler(),
+    ],
+)
+
+# Jeu de données -> (chemin, colonnes de tri)
+COMPACTION_TARGETS: Dict[str, Tuple[str, List[str]]] = {
+    "gsod": ("/data/processed/gsod", ["STATION", "date"]),
+    "daily_observations": (
+        "/data/processed/daily_observations",
+        ["station_id", "date"],
+    ),
+}
+
+# Fichier témoin déposé dans une partition compactée; l'écrasement dynamique
+# d'une partition par l'import le fait disparaître
+COMPACTED_MARKER = "_COMPACTED"
+
+
+class ParquetCompactor:
+    """Réécrit les partitions year/month en fichiers triés par station et date
+
+    Les petits fichiers accumulés par les imports incrémentaux sont
+    regroupés en fichiers d'environ NOAA_COMPACT_FILE_MB. Le tri par station
+    puis date resserre les statistiques min/max de chaque row group
+    (NOAA_COMPACT_ROW_GROUP_MB): un filtre sur une station ne lit plus que
+    quelques row groups au lieu de tous les fichiers du mois.
+    """
+
+    def __init__(self, spark: Optional[SparkSession] = None):
+        self.spark = spark or (
+            SparkSession.builder.appName("NOAA Parquet Compaction")
+            .master("spark://spark-master:7077")
+            .config("spark.executor.memory", "2g")
+            .config("spark.driver.memory", "2g")
+            .getOrCreate()
+        )
+        self.target_file_bytes = int(os.getenv("NOAA_COMPACT_FILE_MB", "128")) * 2**20
+        self.row_group_bytes = int(os.getenv("NOAA_COMPACT_ROW_GROUP_MB", "16")) * 2**20
+        jvm = self.spark._jvm
+        self._Path = jvm.org.apache.hadoop.fs.Path
+        self.fs = self._Path("/").getFileSystem(self.spark._jsc.hadoopConfiguration())
+
+    def _partitions(self, path: str) -> List[Tuple[str, int, int, bool]]:
+        """(chemin, nombre de fichiers, octets, déjà compactée) par partition"""
+        partitions = []
+        statuses = self.fs.globStatus(self._Path(f"{path}/year=*/month=*")) or []
+        for status in statuses:
+            partition = status.getPath()
+            files = [
+                f
+                for f in self.fs.listStatus(partition)
+                if f.getPath().getName().endswith(".parquet")
+            ]
+            compacted = self.fs.exists(self._Path(partition, COMPACTED_MARKER))
+            partitions.append(
+                (
+                    partition.toString(),
+                    len(files),
+                    sum(f.getLen() for f in files),
+                    compacted,
+                )
+            )
+        return partitions
+
+    def _swap(self, staged, target, backup):
+        """Remplace ``target`` par ``staged`` sans jamais perdre de données
+
+        L'ancienne partition est d'abord mise de côté dans ``backup`` (hors
+        du jeu de données), puis la partition compactée prend sa place;
+        l'ancienne n'est supprimée qu'une fois le renommage réussi, et
+        remise en place sinon. Lève IOError si la partition est laissée
+        inchangée (ou restée dans ``backup`` si même la remise en place a
+        échoué).
+        """
+        if not self.fs.exists(staged):
+            raise IOError(f"partition compactée absente: {staged.toString()}")
+        self.fs.delete(backup, True)
+        self.fs.mkdirs(backup.getParent())
+        if not self.fs.rename(target, backup):
+            raise IOError(f"mise de côté impossible: {target.toString()}")
+        if not self.fs.rename(staged, target):
+            if not self.fs.rename(backup, target):
+                raise IOError(
+                    f"remplacement et restauration impossibles, données "
+                    f"d'origine dans {backup.toString()}"
+                )
+            raise IOError(f"remplacement impossible: {target.toString()}")
+        self.fs.create(self._Path(target, COMPACTED_MARKER)).close()
+        self.fs.delete(backup, True)
+
+    def _replace(self, partition: str, files: int, staging: str, replaced: str):
+        """Remplace une partition par sa version compactée dans ``staging``
+
+        Une partition sans aucune ligne n'a pas de répertoire dans
+        ``staging``: il n'y a rien à compacter, elle est remplacée par un
+        répertoire vide et reçoit le témoin (sinon elle serait signalée en
+        échec à chaque passage). Les fichiers d'origine sont relus avant de
+        conclure qu'elle est vide.
+        """
+        relative = partition[partition.index("year=") :]
+        staged = self._Path(f"{staging}/{relative}")
+        if not self.fs.exists(staged) and (
+            files == 0 or not self.spark.read.parquet(partition).take(1)
+        ):
+            logging.info(f"Partition sans données, rien à compacter: {partition}")
+            self.fs.mkdirs(staged)
+        self._swap(staged, self._Path(partition), self._Path(f"{replaced}/{relative}"))
+
+    def _expected_files(self, size: int) -> int:
+        return max(1, math.ceil(size / self.target_file_bytes))
+
+    def compact(self, dataset: str, force: bool = False) -> Dict[str, int]:
+        """Compacte les partitions du jeu de données qui en ont besoin
+
+        Une partition est réécrite si elle n'a jamais été compactée (ou a été
+        réécrite par un import depuis) ou si elle contient plus de fichiers
+        que nécessaire.
+        """
+        path, sort_columns = COMPACTION_TARGETS[dataset]
+        partitions = self._partitions(path)
+        pending = [
+            p
+            for p in partitions
+            if force or not p[3] or p[1] > self._expected_files(p[2])
+        ]
+
+        report = {
+            "partitions": len(pending),
+            "files_before": sum(p[1] for p in pending),
+            "bytes_before": sum(p[2] for p in pending),
+            "files_after": 0,
+            "bytes_after": 0,
+            "failed": 0,
+        }
+        if not pending:
+            logging.info(f"Compaction {dataset}: aucune partition à compacter")
+            return report
+
+        output_files = sum(self._expected_files(p[2]) for p in pending)
+        staging = f"{path}_compacting"
+        self.fs.delete(self._Path(staging), True)
+
+        df = self.spark.read.option("basePath", path).parquet(*[p[0] for p in pending])
+        ordering = ["year", "month"] + sort_columns
+        (
+            df.repartitionByRange(output_files, *ordering)
+            .sortWithinPartitions(*ordering)
+            .write.partitionBy("year", "month")
+            .option("parquet.block.size", self.row_group_bytes)
+            .mode("overwrite")
+            .parquet(staging)
+        )
+
+        # Remplacement partition par partition, puis dépôt du témoin
+        replaced = f"{path}_replaced"
+        failed = set()
+        for partition, files, *_ in pending:
+            try:
+                self._replace(partition, files, staging, replaced)
+            except IOError as e:
+                failed.add(partition)
+                logging.error(f"Compaction {dataset}: {str(e)}")
+        self.fs.delete(self._Path(staging), True)
+        report["failed"] = len(failed)
+
+        compacted = {p[0] for p in pending} - failed
+        after = [p for p in self._partitions(path) if p[0] in compacted]
+        report["files_after"] = sum(p[1] for p in after)
+        report["bytes_after"] = sum(p[2] for p in after)
+        logging.info(
+            f"Compaction {dataset}: {report['partitions']} partitions, "
+            f"{report['files_before']} -> {report['files_after']} fichiers, "
+            f"{report['bytes_before'] / 2**20:.1f}MB -> "
+            f"{report['bytes_after'] / 2**20:.1f}MB, {report['failed']} en échec"
+        )
+        return report
+
+    def close(self):
+        if self.spark:
+            self.spark.stop()
+
+
+if __name__ == "__main__":
+    datasets = sys.argv[1:] or list(COMPACTION_TARGETS)
+    force = os.getenv("NOAA_COMPACT_FORCE", "false").lower() in ("1", "true", "yes")
+    compactor = ParquetCompactor()
+    try:
+        for dataset in datasets:
+            compactor.compact(dataset, force=force)
+    finally:
+        compactor.close()
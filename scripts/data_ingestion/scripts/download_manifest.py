@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DownloadManifest:
+    """Manifeste local des fichiers téléchargés
+
+    Pour chaque fichier (clé = chemin relatif à la racine des données brutes),
+    on conserve l'URL, la taille, l'ETag/Last-Modified renvoyés par le serveur
+    et le SHA-256 du contenu. Ces informations servent aux requêtes
+    conditionnelles (If-None-Match / If-Modified-Since), à la reprise des
+    téléchargements partiels (Range / If-Range) et à la vérification des
+    fichiers locaux (SHA-256).
+
+    Les modifications sont écrites sur disque au plus toutes les
+    ``save_interval`` secondes, et par ``flush()`` à la fin de chaque lot de
+    téléchargements: les workers ne réécrivent pas tout le manifeste à chaque
+    fichier. Une entrée perdue lors d'un arrêt brutal coûte au pire un
+    nouveau téléchargement.
+    """
+
+    def __init__(self, path: Path, save_interval: float = 5.0):
+        self.path = Path(path)
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Manifeste illisible, reconstruction: {str(e)}")
+            self._entries = {}
+
+    def key(self, output_file: Path) -> str:
+        try:
+            return str(Path(output_file).relative_to(self.path.parent))
+        except ValueError:
+            return str(output_file)
+
+    def get(self, output_file: Path) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(self.key(output_file))
+            return dict(entry) if entry else None
+
+    def is_complete(self, output_file: Path) -> bool:
+        """Le fichier local est-il intact et conforme à la version enregistrée ?
+
+        La taille est comparée d'abord, puis le SHA-256 du contenu: un
+        fichier tronqué, modifié ou corrompu localement est retéléchargé.
+        """
+        entry = self.get(output_file)
+        if entry is None or entry.get("sha256") is None or not output_file.exists():
+            return False
+        if output_file.stat().st_size != entry.get("size"):
+            return False
+        if self.checksum(output_file) != entry["sha256"]:
+            logging.warning(f"{output_file}: SHA-256 différent du manifeste")
+            return False
+        return True
+
+    def record_partial(
+        self,
+        output_file: Path,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        """Mémorise les validateurs d'un téléchargement en cours (pour If-Range)"""
+        with self._lock:
+            entry = self._entries.setdefault(self.key(output_file), {})
+            entry["partial"] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+        self._changed()
+
+    def record_complete(
+        self,
+        output_file: Path,
+        url: str,
+        size: int,
+        sha256: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        with self._lock:
+            self._entries[self.key(output_file)] = {
+                "url": url,
+                "size": size,
+                "sha256": sha256,
+                "etag": etag,
+                "last_modified": last_modified,
+                "downloaded_at": datetime.utcnow().isoformat(),
+            }
+        self._changed()
+
+    def _changed(self):
+        with self._lock:
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def flush(self):
+        """Écrit les modifications en attente"""
+        if self._dirty:
+            self.save()
+
+    def save(self):
+        """Écriture atomique du manifeste (fichier temporaire puis rename)"""
+        with self._lock:
+            payload = {"version": 1, "files": self._entries}
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    @staticmethod
+    def checksum(file_path: Path, chunk_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
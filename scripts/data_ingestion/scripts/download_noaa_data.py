@@ -1,12 +1,25 @@
 import requests
-import gzip
+import hashlib
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import pandas as pd
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from urllib3.util.retry import Retry
+from columnar import ColumnarConverter
+from download_manifest import DownloadManifest
+from storm_events import (
+    STORM_EVENTS_KINDS,
+    storm_events_archive,
+    storm_events_csv,
+    stream_filter_archive,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,8 +27,15 @@ logging.basicConfig(
     handlers=[logging.FileHandler("/data/download_noaa.log"), logging.StreamHandler()],
 )
 
+# Résultat d'un téléchargement individuel
+DOWNLOADED = "downloaded"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
 
 class NOAADataDownloader:
+    STORM_EVENTS_URL = "https://www.ncei.noaa.gov/pub/data/swdi/stormevents/csvfiles"
+
     FRENCH_STATIONS = [
         "071560-99999",  # Paris-Orly
         "071570-99999",  # Paris-Le Bourget
@@ -34,25 +54,221 @@ class NOAADataDownloader:
         # Récupérer les années depuis les variables d'environnement
         self.start_year = int(os.getenv("NOAA_START_YEAR", "2019"))
         self.end_year = int(os.getenv("NOAA_END_YEAR", "2023"))
+        # Parallélisme global et par hôte (1 worker = mode séquentiel)
+        self.max_workers = max(1, int(os.getenv("NOAA_DOWNLOAD_WORKERS", "8")))
+        self.max_per_host = max(1, int(os.getenv("NOAA_DOWNLOAD_PER_HOST", "4")))
+        self.timeout = float(os.getenv("NOAA_DOWNLOAD_TIMEOUT", "60"))
+        self.session = self._create_session()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+        self.manifest = DownloadManifest(self.base_path / "manifest.json")
+
+    def _create_session(self) -> requests.Session:
+        """Session HTTP partagée (keep-alive) avec retries et backoff exponentiel"""
+        retry = Retry(
+            total=int(os.getenv("NOAA_DOWNLOAD_RETRIES", "5")),
+            backoff_factor=float(os.getenv("NOAA_DOWNLOAD_BACKOFF", "0.5")),
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET"],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.max_per_host,
+            pool_maxsize=self.max_workers,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Sémaphore limitant le nombre de téléchargements simultanés par hôte"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    @staticmethod
+    def _content_range_total(content_range: Optional[str]) -> Optional[int]:
+        """Taille totale annoncée par ``Content-Range: bytes a-b/total``"""
+        total = (content_range or "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+
+    def _download_file_with_progress(
+        self, url: str, output_file: Path, pbar: Optional[tqdm] = None
+    ) -> str:
+        """Télécharge un fichier de manière conditionnelle, reprenable et atomique
+
+        - fichier déjà complet: requête conditionnelle (ETag / Last-Modified),
+          un 304 évite tout transfert;
+        - fichier ``.part`` présent: reprise avec ``Range`` + ``If-Range``;
+          si le serveur la refuse (416), le ``.part`` est supprimé et le
+          fichier téléchargé en entier;
+        - le contenu est écrit dans ``<fichier>.part`` puis renommé, un fichier
+          tronqué n'est donc jamais exposé sous son nom final.
+
+        Renvoie DOWNLOADED, UNCHANGED ou FAILED.
+        """
+        own_pbar = pbar is None
+        part_file = output_file.with_name(output_file.name + ".part")
+        entry = self.manifest.get(output_file) or {}
+        headers = {}
+
+        if self.manifest.is_complete(output_file):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        partial = entry.get("partial") or {}
+        resume_from = part_file.stat().st_size if part_file.exists() else 0
+        validator = partial.get("etag") or partial.get("last_modified")
+        if resume_from and validator and partial.get("url") == url:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = validator
+        else:
+            resume_from = 0
 
-    def _download_file_with_progress(self, url: str, output_file: Path) -> bool:
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            total_size = int(response.headers.get("content-length", 0))
-
-            with tqdm(
-                total=total_size, unit="B", unit_scale=True, desc=output_file.name
-            ) as pbar:
-                with open(output_file, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            pbar.update(len(chunk))
-            return True
+            with self._host_slot(url):
+                response = self.session.get(
+                    url, stream=True, timeout=self.timeout, headers=headers
+                )
+                if response.status_code == 416 and resume_from:
+                    # .part déjà complet (arrêt avant le renommage) ou plus long
+                    # que le fichier distant: il est abandonné, sans Range
+                    response.close()
+                    logging.warning(
+                        f"Reprise refusée (416) pour {url}: nouveau téléchargement"
+                    )
+                    part_file.unlink()
+                    del headers["Range"], headers["If-Range"]
+                    resume_from = 0
+                    response = self.session.get(
+                        url, stream=True, timeout=self.timeout, headers=headers
+                    )
+                with response:
+                    if response.status_code == 304:
+                        return UNCHANGED
+                    response.raise_for_status()
+
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    total = None
+                    if response.status_code == 206:
+                        total = self._content_range_total(
+                            response.headers.get("Content-Range")
+                        )
+                    else:
+                        # Le serveur renvoie le fichier complet
+                        resume_from = 0
+                    self.manifest.record_partial(output_file, url, etag, last_modified)
+
+                    remaining = int(response.headers.get("content-length", 0))
+                    # Avec Content-Encoding, la taille annoncée est celle compressée
+                    expected = (
+                        0 if response.headers.get("content-encoding") else remaining
+                    )
+                    if own_pbar:
+                        pbar = tqdm(
+                            total=resume_from + remaining,
+                            initial=resume_from,
+                            unit="B",
+                            unit_scale=True,
+                            desc=output_file.name,
+                        )
+                    else:
+                        with self._progress_lock:
+                            pbar.total += remaining
+                            pbar.refresh()
+
+                    digest = hashlib.sha256()
+                    if resume_from:
+                        with open(part_file, "rb") as f:
+                            for chunk in iter(lambda: f.read(1 << 20), b""):
+                                digest.update(chunk)
+
+                    received = 0
+                    with open(part_file, "ab" if resume_from else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            if chunk:
+                                f.write(chunk)
+                                digest.update(chunk)
+                                received += len(chunk)
+                                with self._progress_lock:
+                                    pbar.update(len(chunk))
+
+            if expected and received != expected:
+                raise IOError(f"transfert incomplet ({received}/{expected} octets)")
+            # Reprise: le .part complété doit avoir la taille totale annoncée
+            if total is not None and part_file.stat().st_size != total:
+                size = part_file.stat().st_size
+                part_file.unlink()
+                raise IOError(f"reprise incohérente ({size}/{total} octets)")
+
+            os.replace(part_file, output_file)
+            self.manifest.record_complete(
+                output_file,
+                url,
+                size=output_file.stat().st_size,
+                sha256=digest.hexdigest(),
+                etag=etag,
+                last_modified=last_modified,
+            )
+            return DOWNLOADED
         except Exception as e:
             logging.error(f"Erreur téléchargement {url}: {str(e)}")
-            return False
+            return FAILED
+        finally:
+            if own_pbar and pbar is not None:
+                pbar.close()
+
+    def _download_files(
+        self, tasks: List[Tuple[str, Path]], desc: str
+    ) -> List[Tuple[str, Path]]:
+        """Télécharge un lot de fichiers en parallèle et renvoie ceux mis à jour
+
+        Une seule barre de progression agrège les octets de tous les fichiers,
+        suivie d'un bilan de débit global dans les logs. Les fichiers inchangés
+        côté serveur (304) ne sont pas renvoyés.
+        """
+        if not tasks:
+            return []
+
+        completed: List[Tuple[str, Path]] = []
+        statuses = {DOWNLOADED: 0, UNCHANGED: 0, FAILED: 0}
+        start = time.monotonic()
+        try:
+            with tqdm(total=0, unit="B", unit_scale=True, desc=desc) as pbar:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_workers, len(tasks))
+                ) as executor:
+                    futures = {
+                        executor.submit(
+                            self._download_file_with_progress, url, output_file, pbar
+                        ): (url, output_file)
+                        for url, output_file in tasks
+                    }
+                    for future in as_completed(futures):
+                        status = future.result()
+                        statuses[status] += 1
+                        if status == DOWNLOADED:
+                            completed.append(futures[future])
+                downloaded = pbar.n
+        finally:
+            self.manifest.flush()
+
+        elapsed = max(time.monotonic() - start, 1e-6)
+        logging.info(
+            f"{desc}: {statuses[DOWNLOADED]} téléchargés, "
+            f"{statuses[UNCHANGED]} inchangés, {statuses[FAILED]} en erreur, "
+            f"{downloaded / 2**20:.1f}MB en {elapsed:.1f}s "
+            f"({downloaded / 2**20 / elapsed:.2f}MB/s)"
+        )
+        return completed
 
     def download_gsod_data(self, start_year: int, end_year: int):
         """Télécharge les données GSOD"""
@@ -60,16 +276,17 @@ class NOAADataDownloader:
         output_dir = self.base_path / "gsod"
         output_dir.mkdir(exist_ok=True)
 
+        tasks = []
         for year in range(start_year, end_year + 1):
             year_dir = output_dir / str(year)
             year_dir.mkdir(exist_ok=True)
 
             for station in self.FRENCH_STATIONS:
                 url = f"{base_url}/{year}/{station}-{year}.csv"
-                output_file = year_dir / f"{station}-{year}.csv"
+                tasks.append((url, year_dir / f"{station}-{year}.csv"))
 
-                if self._download_file_with_progress(url, output_file):
-                    logging.info(f"Données GSOD {station} {year} téléchargées")
+        for _, output_file in self._download_files(tasks, "GSOD"):
+            logging.info(f"Données GSOD {output_file.stem} téléchargées")
 
     def download_isd_data(self, start_year: int, end_year: int):
         """Télécharge les données ISD"""
@@ -77,43 +294,50 @@ class NOAADataDownloader:
         output_dir = self.base_path / "isd"
         output_dir.mkdir(exist_ok=True)
 
+        tasks = []
         for year in range(start_year, end_year + 1):
             year_dir = output_dir / str(year)
             year_dir.mkdir(exist_ok=True)
 
             for station in self.FRENCH_STATIONS:
                 url = f"{base_url}/{year}/{station}-{year}.csv"
-                output_file = year_dir / f"{station}-{year}.csv"
+                tasks.append((url, year_dir / f"{station}-{year}.csv"))
 
-                if self._download_file_with_progress(url, output_file):
-                    logging.info(f"Données ISD {station} {year} téléchargées")
+        for _, output_file in self._download_files(tasks, "ISD"):
+            logging.info(f"Données ISD {output_file.stem} téléchargées")
 
     def download_storm_events(self, start_year: int, end_year: int):
         """Télécharge les données Storm Events"""
-        base_url = "https://www.ncei.noaa.gov/pub/data/swdi/stormevents/csvfiles"
+        base_url = self.STORM_EVENTS_URL
         output_dir = self.base_path / "storm_events"
         output_dir.mkdir(exist_ok=True)
 
+        tasks = []
         for year in range(start_year, end_year + 1):
-            for data_type in ["details", "fatalities", "locations"]:
-                filename = f"StormEvents_{data_type}-ftp_v1.0_{year}.csv.gz"
-                url = f"{base_url}/{filename}"
-                output_file = output_dir / filename
-
-                if self._download_file_with_progress(url, output_file):
-                    try:
-                        with gzip.open(output_file, "rb") as f_in:
-                            df = pd.read_csv(f_in)
-                            if "DAMAGE_PROPERTY" in df.columns:
-                                df = df[df["DAMAGE_PROPERTY"].notna()]
-                            output_csv = output_file.with_suffix(".csv")
-                            df.to_csv(output_csv, index=False)
-                        output_file.unlink()
-                        logging.info(
-                            f"Données Storm Events {data_type} {year} traitées"
-                        )
-                    except Exception as e:
-                        logging.error(f"Erreur traitement {filename}: {str(e)}")
+            for data_type in STORM_EVENTS_KINDS:
+                filename = storm_events_archive(data_type, year)
+                tasks.append((f"{base_url}/{filename}", output_dir / filename))
+
+        # L'archive .gz est conservée: elle porte l'entrée du manifeste qui
+        # permet les requêtes conditionnelles lors des exécutions suivantes
+        updated = {
+            output_file
+            for _, output_file in self._download_files(tasks, "Storm Events")
+        }
+        for _, output_file in tasks:
+            filename = output_file.name
+            output_csv = storm_events_csv(output_file)
+            if not output_file.exists():
+                continue
+            if output_file not in updated and output_csv.exists():
+                continue
+            try:
+                rows = stream_filter_archive(output_file, output_csv)
+                logging.info(
+                    f"Données Storm Events {filename} traitées ({rows} lignes)"
+                )
+            except Exception as e:
+                logging.error(f"Erreur traitement {filename}: {str(e)}")
 
     def download_metar_data(self, stations: Optional[List[str]] = None):
         """Télécharge les données METAR"""
@@ -122,13 +346,14 @@ class NOAADataDownloader:
         output_dir = self.base_path / "metar"
         output_dir.mkdir(exist_ok=True)
 
+        tasks = []
         for station in stations:
             station_id = station.split("-")[0]  # Remove the -99999 suffix
             url = f"{base_url}/{station_id}.TXT"
-            output_file = output_dir / f"{station_id}.txt"
+            tasks.append((url, output_dir / f"{station_id}.txt"))
 
-            if self._download_file_with_progress(url, output_file):
-                logging.info(f"Données METAR {station_id} téléchargées")
+        for _, output_file in self._download_files(tasks, "METAR"):
+            logging.info(f"Données METAR {output_file.stem} téléchargées")
 
     def verify_data(self):
         """Vérifie l'intégrité et la taille des données"""
@@ -177,6 +402,12 @@ def main():
         downloader.download_storm_events(downloader.start_year, downloader.end_year)
         downloader.download_metar_data()
 
+        # Conversion optionnelle des CSV GSOD/ISD en Parquet partitionné
+        if os.getenv("NOAA_CONVERT_PARQUET", "false").lower() in ("1", "true", "yes"):
+            converter = ColumnarConverter(raw_path=str(downloader.base_path))
+            converter.convert_gsod()
+            converter.convert_isd()
+
         # Vérification des données
         downloader.verify_data()
         logging.info("✅ Téléchargement terminé avec succès")
@@ -186,6 +417,8 @@ def main():
     except Exception as e:
         logging.error(f"❌ Erreur critique: {str(e)}")
         raise
+    finally:
+        downloader.session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Spécification d'une partition: [(colonne, valeur), ...], ex: [("year", 2019), ("month", 3)]
+PartitionSpec = List[Tuple[str, int]]
+
+
+class HiveCatalog:
+    """Déclaration dans le métastore Hive des partitions écrites par l'import
+
+    Les tables noaa_weather.* lues par le backend sont externes et pointent
+    sur /data/processed: Spark y écrit les fichiers, mais Hive ne voit une
+    nouvelle partition qu'une fois déclarée. Chaque écriture est donc suivie
+    d'un ``ALTER TABLE ... ADD IF NOT EXISTS PARTITION`` (idempotent; une
+    partition réécrite garde le même répertoire). Si Hive est injoignable ou
+    la table absente, un avertissement est journalisé: relancer alors
+    src/backend/scripts/migrate_hive_tables.py, dont le MSCK REPAIR TABLE
+    rattrape les partitions manquantes.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        user: Optional[str] = None,
+    ):
+        self.host = host or os.getenv("HIVE_HOST", "hive")
+        self.port = int(port or os.getenv("HIVE_PORT", "10000"))
+        self.user = user or os.getenv("HIVE_USER", "hive")
+
+    @staticmethod
+    def partitions(
+        path: str, columns: Sequence[str], years: Iterable[int]
+    ) -> List[PartitionSpec]:
+        """Partitions présentes sous ``path`` pour les années données"""
+        years = set(years)
+        root = Path(path)
+        specs = []
+        for directory in sorted(root.glob("/".join(f"{c}=*" for c in columns))):
+            spec = [
+                (name, int(value))
+                for name, value in (
+                    part.split("=", 1) for part in directory.relative_to(root).parts
+                )
+            ]
+            if spec[0][1] in years:
+                specs.append(spec)
+        return specs
+
+    @staticmethod
+    def add_partitions_sql(table: str, specs: List[PartitionSpec]) -> str:
+        clauses = " ".join(
+            "PARTITION (" + ", ".join(f"{name}={value}" for name, value in spec) + ")"
+            for spec in specs
+        )
+        return f"ALTER TABLE {table} ADD IF NOT EXISTS {clauses}"
+
+    def register(
+        self, table: str, path: str, columns: Sequence[str], years: Iterable[int]
+    ) -> int:
+        """Déclare les partitions des années réécrites; retourne leur nombre"""
+        specs = self.partitions(path, columns, years)
+        if not specs:
+            return 0
+        try:
+            from pyhive import hive
+
+            connection = hive.Connection(
+                host=self.host,
+                port=self.port,
+                username=self.user,
+                database="default",
+                auth="NONE",
+            )
+            try:
+                cursor = connection.cursor()
+                cursor.execute(self.add_partitions_sql(table, specs))
+                cursor.close()
+            finally:
+                connection.close()
+        except Exception as e:
+            logging.warning(
+                f"Partitions de {table} non déclarées dans Hive "
+                f"(à rattraper avec migrate_hive_tables.py): {str(e)}"
+            )
+            return 0
+        logging.info(f"{len(specs)} partitions déclarées dans {table}")
+        return len(specs)
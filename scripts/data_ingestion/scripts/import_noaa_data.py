@@ -1,9 +1,75 @@
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, to_timestamp, year, month, when, regexp_replace
-from pyspark.sql.types import StructType, StructField, StringType, FloatType
+from pyspark.sql import functions as F
+from pyspark.sql.functions import col, to_timestamp, year, month, when
 import logging
+import os
+import time
+from functools import reduce
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 from elasticsearch import Elasticsearch
+from columnar import ColumnarConverter
+from hive_catalog import HiveCatalog
+from import_state import ImportState
+from isd_decoder import decode_isd_spark
+from schemas import (
+    GSOD_COLUMNS,
+    spark_schema,
+    storm_events_columns,
+    storm_events_version,
+)
+from storm_events import storm_events_pattern, storm_events_year
+
+# Colonnes de la table Hive noaa_weather.daily_observations (unités métriques)
+DAILY_OBSERVATIONS_COLUMNS = [
+    "station_id",
+    "date",
+    "temperature",
+    "temperature_max",
+    "temperature_min",
+    "precipitation",
+    "snow_depth",
+    "wind_speed",
+    "wind_direction",
+    "year",
+    "month",
+]
+
+# Mesures des rollups: (colonne, agrégat, colonne journalière, agrégat de
+# fusion). Sommes et effectifs plutôt que moyennes, pour pouvoir fusionner
+# des mois ou des saisons sans relire les observations journalières.
+ROLLUP_MEASURES = [
+    ("temp_sum", F.sum, "temperature", F.sum),
+    ("temp_count", F.count, "temperature", F.sum),
+    ("temperature_max", F.max, "temperature_max", F.max),
+    ("temperature_min", F.min, "temperature_min", F.min),
+    ("precip_sum", F.sum, "precipitation", F.sum),
+    ("precip_count", F.count, "precipitation", F.sum),
+    ("wind_sum", F.sum, "wind_speed", F.sum),
+    ("wind_count", F.count, "wind_speed", F.sum),
+    ("days_count", F.count, "*", F.sum),
+]
+
+DAILY_OBSERVATIONS_PATH = "/data/processed/daily_observations"
+ROLLUPS_PATH = "/data/processed/rollups"
+
+# Sketches de quantiles KLL par station × mois × mesure. Un mois compte au
+# plus 31 valeurs journalières: le sketch est exact (tous les éléments au
+# niveau 0, poids 1) et le backend les fusionne sur n'importe quelle période.
+SKETCH_MEASURES = [
+    "temperature",
+    "temperature_max",
+    "temperature_min",
+    "precipitation",
+    "wind_speed",
+]
+SKETCHES_PATH = "/data/processed/sketches"
+
+
+def _fahrenheit_to_celsius(name: str):
+    """°F -> °C, la sentinelle GSOD 9999.9 devient nulle"""
+    return when(col(name) < 9999, (col(name) - 32) * 5 / 9)
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,9 +77,70 @@ logging.basicConfig(
     handlers=[logging.FileHandler("/data/import_noaa.log"), logging.StreamHandler()],
 )
 
+# Mapping de l'index weather_data (identique à celui créé par le backend)
+WEATHER_INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            "station_id": {"type": "keyword"},
+            "location": {"type": "keyword"},
+            "timestamp": {"type": "date"},
+            "temperature": {"type": "float"},
+            "temperature_max": {"type": "float"},
+            "temperature_min": {"type": "float"},
+            "humidity": {"type": "float"},
+            "precipitation": {"type": "float"},
+            "wind_speed": {"type": "float"},
+            "wind_direction": {"type": "integer"},
+        }
+    }
+}
+
+# Mapping de l'index weather_events (identique à celui créé par le backend)
+EVENTS_INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            "event_id": {"type": "keyword"},
+            "episode_id": {"type": "keyword"},
+            "event_type": {"type": "keyword"},
+            "location": {"type": "keyword"},
+            "state": {"type": "keyword"},
+            "date": {"type": "date"},
+            "description": {"type": "text"},
+            "magnitude": {"type": "float"},
+            "damage_estimate": {"type": "float"},
+            "damage_property": {"type": "float"},
+            "damage_crops": {"type": "float"},
+            "injuries": {"type": "integer"},
+            "fatalities": {"type": "integer"},
+            "casualties": {"type": "integer"},
+            "begin_point": {"type": "geo_point"},
+            "locations": {
+                "type": "nested",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "location": {"type": "keyword"},
+                    "range": {"type": "float"},
+                    "azimuth": {"type": "keyword"},
+                    "point": {"type": "geo_point"},
+                },
+            },
+            "fatality_details": {
+                "type": "nested",
+                "properties": {
+                    "fatality_id": {"type": "keyword"},
+                    "type": {"type": "keyword"},
+                    "age": {"type": "integer"},
+                    "sex": {"type": "keyword"},
+                    "location": {"type": "keyword"},
+                },
+            },
+        }
+    }
+}
+
 
 class NOAADataImporter:
-    def __init__(self):
+    def __init__(self, incremental: Optional[bool] = None):
         self.spark = (
             SparkSession.builder.appName("NOAA Data Import")
             .master("spark://spark-master:7077")
@@ -21,107 +148,690 @@ class NOAADataImporter:
             .config("spark.driver.memory", "2g")
             .config("spark.elasticsearch.nodes", "elasticsearch")
             .config("spark.elasticsearch.port", "9200")
+            # mode("overwrite") ne remplace que les partitions présentes
+            .config("spark.sql.sources.partitionOverwriteMode", "dynamic")
             .getOrCreate()
         )
 
         self.es = Elasticsearch(["http://elasticsearch:9200"])
 
+        # NOAA_IMPORT_MODE=full force la relecture de tous les fichiers bruts
+        if incremental is None:
+            incremental = os.getenv("NOAA_IMPORT_MODE", "incremental") != "full"
+        self.incremental = incremental
+        self.raw_path = Path("/data/raw")
+        self.state = ImportState()
+        self.catalog = HiveCatalog()
+        self.columnar = ColumnarConverter(raw_path=str(self.raw_path))
+        # Années GSOD réimportées pendant cette exécution
+        self.gsod_years: Set[int] = set()
+
+    def _files_to_import(self, dataset: str, pattern: str) -> List[Path]:
+        """Fichiers bruts à traiter: tous en mode complet, sinon nouveaux/modifiés"""
+        files = sorted(self.raw_path.glob(pattern))
+        if not self.incremental:
+            return files
+        changed = self.state.changed_files(dataset, files)
+        logging.info(
+            f"{dataset}: {len(changed)}/{len(files)} fichiers nouveaux ou modifiés"
+        )
+        return changed
+
+    def _raw_sources(
+        self, dataset: str, years: List[int]
+    ) -> Tuple[List[str], List[str]]:
+        """(Parquet, CSV) à lire pour les années données d'un jeu GSOD/ISD
+
+        Le Parquet écrit par columnar.py (/data/processed/columnar) remplace
+        le CSV quand il est à jour: lecture en colonnes, types déjà décodés.
+        Les CSV non convertis, ou modifiés depuis, sont lus directement.
+        """
+        parquet, csv = [], []
+        for y in years:
+            for source in sorted((self.raw_path / dataset / str(y)).glob("*.csv")):
+                if self.columnar.is_current(dataset, source):
+                    parquet.append(str(self.columnar.target(dataset, source)))
+                else:
+                    csv.append(str(source))
+        logging.info(
+            f"{dataset}: {len(parquet)} fichiers lus en Parquet, {len(csv)} en CSV"
+        )
+        return parquet, csv
+
     def import_weather_data(self):
         """Import des données GSOD et Storm Events"""
         try:
             # Import GSOD
-            gsod_schema = StructType(
-                [
-                    StructField("STATION", StringType(), True),
-                    StructField("DATE", StringType(), True),
-                    StructField("LATITUDE", FloatType(), True),
-                    StructField("LONGITUDE", FloatType(), True),
-                    StructField("ELEVATION", FloatType(), True),
-                    StructField("TEMP", FloatType(), True),
-                    StructField("DEWP", FloatType(), True),
-                    StructField("SLP", FloatType(), True),
-                    StructField("STP", FloatType(), True),
-                    StructField("VISIB", FloatType(), True),
-                    StructField("WDSP", FloatType(), True),
-                    StructField("MXSPD", FloatType(), True),
-                    StructField("GUST", FloatType(), True),
-                    StructField("MAX", FloatType(), True),
-                    StructField("MIN", FloatType(), True),
-                    StructField("PRCP", FloatType(), True),
-                    StructField("SNDP", FloatType(), True),
-                    StructField("FRSHTT", StringType(), True),
-                ]
+            gsod_files = self._files_to_import("gsod", "gsod/*/*.csv")
+            if gsod_files:
+                self._import_gsod(gsod_files)
+
+            # Import Storm Events
+            storm_files = self._files_to_import(
+                "storm_events", f"storm_events/{storm_events_pattern()}"
             )
+            if storm_files:
+                self._import_storm_events(storm_files)
+
+            logging.info("Import des données terminé avec succès")
+
+        except Exception as e:
+            logging.error(f"Erreur pendant l'import: {str(e)}")
+            raise
+
+    def _import_gsod(self, gsod_files: List[Path]):
+        """Réimporte les années GSOD touchées par les fichiers nouveaux/modifiés
 
-            gsod_df = self.spark.read.csv(
-                "/data/raw/gsod/*/*.csv", header=True, schema=gsod_schema
+        Toutes les données des années concernées sont relues pour réécrire
+        complètement leurs partitions year/month (écrasement dynamique); les
+        autres partitions ne sont pas touchées. Seules les lignes issues des
+        fichiers modifiés sont envoyées à Elasticsearch.
+        """
+        gsod_schema = spark_schema(GSOD_COLUMNS)
+        years = sorted({int(f.parent.name) for f in gsod_files})
+
+        parquet_paths, csv_paths = self._raw_sources("gsod", years)
+        frames = []
+        if parquet_paths:
+            frames.append(self.spark.read.schema(gsod_schema).parquet(*parquet_paths))
+        if csv_paths:
+            frames.append(
+                self.spark.read.csv(csv_paths, header=True, schema=gsod_schema)
             )
+        gsod_df = reduce(
+            lambda left, right: left.unionByName(right),
+            [frame.withColumn("source_file", F.input_file_name()) for frame in frames],
+        )
 
-            gsod_df = (
-                gsod_df.withColumn("date", to_timestamp(col("DATE"), "yyyyMMdd"))
-                .withColumn("year", year(col("date")))
-                .withColumn("month", month(col("date")))
+        # Les fichiers "access" datent au format yyyy-MM-dd
+        gsod_df = (
+            gsod_df.withColumn(
+                "date",
+                F.coalesce(
+                    to_timestamp(col("DATE"), "yyyy-MM-dd"),
+                    to_timestamp(col("DATE"), "yyyyMMdd"),
+                ),
             )
+            .withColumn("year", year(col("date")))
+            .withColumn("month", month(col("date")))
+        )
+
+        # Sauvegarde GSOD
+        gsod_df.drop("source_file").write.partitionBy("year", "month").mode(
+            "overwrite"
+        ).parquet("/data/processed/gsod")
+
+        # Index dans Elasticsearch (lignes des fichiers modifiés uniquement):
+        # un document par station et par jour
+        # (chemin relatif du CSV ou de son Parquet converti)
+        changed = [f"gsod/{f.parent.name}/{f.name}" for f in gsod_files] + [
+            str(self.columnar.target("gsod", f).relative_to(self.columnar.output_path))
+            for f in gsod_files
+        ]
+        source = r"gsod/(year=[^/]+/station=[^/]+/data\.parquet|[^/]+/[^/]+\.csv)$"
+        new_rows = gsod_df.filter(
+            F.regexp_extract(col("source_file"), source, 0).isin(changed)
+        ).drop("source_file")
+        self._ensure_index("weather_data", WEATHER_INDEX_MAPPING)
+        self._write_to_es(
+            self._weather_documents(new_rows),
+            "weather_data",
+            "doc_id",
+            exclude="doc_id",
+        )
+
+        self.state.mark_imported("gsod", gsod_files)
+        self.gsod_years.update(years)
+        logging.info(f"GSOD importé pour les années {years}")
+
+    def _read_storm_events(self, kind: str, years: List[int]):
+        """Lecture en une seule passe des fichiers Storm Events d'un type
 
-            # Sauvegarde GSOD
-            gsod_df.write.partitionBy("year", "month").mode("overwrite").parquet(
-                "/data/processed/gsod"
+        Chaque version du format est lue avec son schéma explicite (pas
+        d'inferSchema, donc pas de seconde lecture des CSV); l'en-tête est
+        vérifié contre le schéma. Les versions sont ensuite réunies par nom
+        de colonne. Renvoie None si aucun fichier ne correspond.
+        """
+        paths_by_version: Dict[str, List[str]] = {}
+        for y in years:
+            pattern = storm_events_pattern(kind, str(y))
+            for f in sorted((self.raw_path / "storm_events").glob(pattern)):
+                version = storm_events_version(f.name)
+                paths_by_version.setdefault(version, []).append(str(f))
+
+        frames = [
+            self.spark.read.csv(
+                paths,
+                header=True,
+                schema=spark_schema(storm_events_columns(kind, version)),
+                enforceSchema=False,
             )
+            for version, paths in sorted(paths_by_version.items())
+        ]
+        if not frames:
+            return None
+        return reduce(
+            lambda left, right: left.unionByName(right, allowMissingColumns=True),
+            frames,
+        )
 
-            # Import Storm Events
-            events_df = self.spark.read.csv(
-                "/data/raw/storm_events/csv/*.csv", header=True, inferSchema=True
-            )
-
-            events_df = (
-                events_df.withColumn("date", to_timestamp(col("BEGIN_DATE_TIME")))
-                .withColumn("year", year(col("date")))
-                .withColumn(
-                    "damage_estimate",
-                    when(
-                        col("DAMAGE_PROPERTY").endswith("K"),
-                        regexp_replace(col("DAMAGE_PROPERTY"), "K", "").cast("float")
-                        * 1000,
-                    )
-                    .when(
-                        col("DAMAGE_PROPERTY").endswith("M"),
-                        regexp_replace(col("DAMAGE_PROPERTY"), "M", "").cast("float")
-                        * 1000000,
+    def _import_storm_events(self, storm_files: List[Path]):
+        """Réimporte les années Storm Events dont un fichier a changé
+
+        Les fichiers details, locations et fatalities sont joints sur EVENT_ID
+        pour produire une table dénormalisée partitionnée par année et des
+        documents Elasticsearch autonomes (lieux et victimes imbriqués).
+        """
+        years = sorted({storm_events_year(f) for f in storm_files})
+        start = time.monotonic()
+
+        events_df = self._read_storm_events("details", years)
+        if events_df is None:
+            logging.warning(f"Aucun fichier Storm Events details pour {years}")
+            return
+
+        # Tables filles agrégées par événement: petites, donc diffusées
+        # (broadcast) vers les exécuteurs au lieu de déclencher un shuffle
+        # de la table details
+        locations_df = self._read_storm_events("locations", years)
+        if locations_df is not None:
+            locations_df = self._storm_event_locations(locations_df)
+            events_df = events_df.join(F.broadcast(locations_df), "EVENT_ID", "left")
+
+        fatalities_df = self._read_storm_events("fatalities", years)
+        if fatalities_df is not None:
+            fatalities_df = fatalities_df.groupBy("EVENT_ID").agg(
+                F.collect_list(
+                    F.struct(
+                        col("FATALITY_ID").alias("fatality_id"),
+                        col("FATALITY_TYPE").alias("type"),
+                        col("FATALITY_AGE").alias("age"),
+                        col("FATALITY_SEX").alias("sex"),
+                        col("FATALITY_LOCATION").alias("location"),
                     )
-                    .when(
-                        col("DAMAGE_PROPERTY").endswith("B"),
-                        regexp_replace(col("DAMAGE_PROPERTY"), "B", "").cast("float")
-                        * 1000000000,
+                ).alias("fatality_details")
+            )
+            events_df = events_df.join(F.broadcast(fatalities_df), "EVENT_ID", "left")
+
+        # Date de début reconstruite depuis les colonnes numériques: le champ
+        # BEGIN_DATE_TIME utilise une année sur deux chiffres
+        events_df = (
+            events_df.withColumn(
+                "date",
+                F.make_timestamp(
+                    (col("BEGIN_YEARMONTH") / 100).cast("int"),
+                    col("BEGIN_YEARMONTH") % 100,
+                    col("BEGIN_DAY"),
+                    (col("BEGIN_TIME") / 100).cast("int"),
+                    col("BEGIN_TIME") % 100,
+                    F.lit(0),
+                ),
+            )
+            .withColumn("year", year(col("date")))
+            .withColumn("damage_property", self._parse_damage(col("DAMAGE_PROPERTY")))
+            .withColumn("damage_crops", self._parse_damage(col("DAMAGE_CROPS")))
+            .withColumn("damage_estimate", col("damage_property") + col("damage_crops"))
+            .withColumn(
+                "injuries",
+                F.coalesce(col("INJURIES_DIRECT"), F.lit(0))
+                + F.coalesce(col("INJURIES_INDIRECT"), F.lit(0)),
+            )
+            .withColumn(
+                "fatalities",
+                F.coalesce(col("DEATHS_DIRECT"), F.lit(0))
+                + F.coalesce(col("DEATHS_INDIRECT"), F.lit(0)),
+            )
+        )
+
+        # Sauvegarde Storm Events (table dénormalisée)
+        events_df.write.partitionBy("year").mode("overwrite").parquet(
+            "/data/processed/storm_events"
+        )
+
+        # Index dans Elasticsearch: documents autonomes, sans jointure à la requête
+        self._ensure_index("weather_events", EVENTS_INDEX_MAPPING)
+        self._write_to_es(
+            self._storm_events_documents(events_df), "weather_events", "event_id"
+        )
+
+        self.state.mark_imported("storm_events", storm_files)
+        elapsed = time.monotonic() - start
+        logging.info(f"Storm Events importés pour {years} en {elapsed:.1f}s")
+        self._report_schema_inference_saving(storm_files)
+
+    @staticmethod
+    def _parse_damage(damage):
+        """Montant de dégâts NOAA ("10.00K", "1.5M", "2B", "0") en dollars"""
+        amount = F.regexp_extract(damage, r"^\s*([0-9.]+)", 1).cast("double")
+        multiplier = (
+            when(F.upper(damage).endswith("K"), 1e3)
+            .when(F.upper(damage).endswith("M"), 1e6)
+            .when(F.upper(damage).endswith("B"), 1e9)
+            .otherwise(1.0)
+        )
+        return F.coalesce(amount * multiplier, F.lit(0.0))
+
+    @staticmethod
+    def _storm_event_locations(locations_df):
+        """Lieux d'un événement regroupés en tableau trié par LOCATION_INDEX
+
+        Comme begin_point, le point n'est renseigné que si latitude et
+        longitude sont présentes: un geo_point {lat: null} ferait rejeter le
+        document entier par Elasticsearch.
+        """
+        point = when(
+            col("LATITUDE").isNotNull() & col("LONGITUDE").isNotNull(),
+            F.struct(col("LATITUDE").alias("lat"), col("LONGITUDE").alias("lon")),
+        )
+        return locations_df.groupBy("EVENT_ID").agg(
+            F.array_sort(
+                F.collect_list(
+                    F.struct(
+                        col("LOCATION_INDEX").alias("index"),
+                        col("LOCATION").alias("location"),
+                        col("RANGE").alias("range"),
+                        col("AZIMUTH").alias("azimuth"),
+                        point.alias("point"),
                     )
-                    .otherwise(0),
                 )
+            ).alias("locations")
+        )
+
+    @staticmethod
+    def _storm_events_documents(events_df):
+        """Projection vers le mapping de l'index weather_events"""
+        begin_point = when(
+            col("BEGIN_LAT").isNotNull() & col("BEGIN_LON").isNotNull(),
+            F.struct(col("BEGIN_LAT").alias("lat"), col("BEGIN_LON").alias("lon")),
+        )
+        columns = [
+            col("EVENT_ID").cast("string").alias("event_id"),
+            col("EPISODE_ID").cast("string").alias("episode_id"),
+            col("EVENT_TYPE").alias("event_type"),
+            F.coalesce(col("BEGIN_LOCATION"), col("CZ_NAME")).alias("location"),
+            col("STATE").alias("state"),
+            F.date_format(col("date"), "yyyy-MM-dd'T'HH:mm:ss").alias("date"),
+            col("EVENT_NARRATIVE").alias("description"),
+            col("MAGNITUDE").alias("magnitude"),
+            col("damage_estimate"),
+            col("damage_property"),
+            col("damage_crops"),
+            col("injuries"),
+            col("fatalities"),
+            (col("injuries") + col("fatalities")).alias("casualties"),
+            begin_point.alias("begin_point"),
+        ]
+        for nested in ("locations", "fatality_details"):
+            if nested in events_df.columns:
+                columns.append(col(nested))
+        return events_df.select(*columns)
+
+    def _ensure_index(self, index: str, mapping: Dict):
+        """Crée l'index avec le mapping du backend s'il est absent"""
+        if self.es.indices.exists(index=index):
+            return
+        self.es.indices.create(index=index, body=mapping)
+
+    def _write_to_es(
+        self, docs_df, index: str, id_column: str, exclude: Optional[str] = None
+    ):
+        """Indexation bulk parallèle dans Elasticsearch
+
+        Chaque partition Spark envoie ses propres requêtes _bulk, la
+        concurrence est donc fixée par NOAA_ES_WRITERS. Les documents rejetés
+        en 429 sont renvoyés par le connecteur après NOAA_ES_RETRY_WAIT
+        (attente doublée à chaque essai). L'identifiant est déterministe: un
+        réimport écrase les documents au lieu de les dupliquer.
+        """
+        writers = int(os.getenv("NOAA_ES_WRITERS", "4"))
+        docs_df = docs_df.repartition(writers).cache()
+        total = docs_df.count()
+
+        writer = (
+            docs_df.write.format("org.elasticsearch.spark.sql")
+            .option("es.nodes", "elasticsearch")
+            .option("es.port", "9200")
+            .option("es.resource", index)
+            .option("es.mapping.id", id_column)
+            .option("es.batch.size.entries", os.getenv("NOAA_ES_BATCH_SIZE", "5000"))
+            .option("es.batch.size.bytes", os.getenv("NOAA_ES_BATCH_BYTES", "5mb"))
+            .option("es.batch.write.retry.count", os.getenv("NOAA_ES_RETRY_COUNT", "6"))
+            .option("es.batch.write.retry.wait", os.getenv("NOAA_ES_RETRY_WAIT", "5s"))
+            .option("es.batch.write.refresh", "false")
+        )
+        if exclude:
+            writer = writer.option("es.mapping.exclude", exclude)
+
+        start = time.monotonic()
+        previous_interval = self._suspend_refresh(index)
+        try:
+            writer.mode("append").save()
+        finally:
+            self._restore_refresh(index, previous_interval)
+            docs_df.unpersist()
+
+        elapsed = max(time.monotonic() - start, 1e-6)
+        logging.info(
+            f"ES {index}: {total} documents indexés en {elapsed:.1f}s "
+            f"({total / elapsed:.0f} docs/s, {writers} writers)"
+        )
+
+    def _suspend_refresh(self, index: str) -> Optional[str]:
+        """Désactive le rafraîchissement de l'index pendant le chargement"""
+        try:
+            settings = self.es.indices.get_settings(index=index)
+            previous = settings[index]["settings"]["index"].get("refresh_interval")
+            self.es.indices.put_settings(
+                index=index, body={"index": {"refresh_interval": "-1"}}
             )
+            return previous
+        except Exception as e:
+            logging.warning(f"refresh_interval non modifié pour {index}: {str(e)}")
+            return None
 
-            # Sauvegarde Storm Events
-            events_df.write.partitionBy("year").mode("overwrite").parquet(
-                "/data/processed/storm_events"
+    def _restore_refresh(self, index: str, previous: Optional[str]):
+        """Rétablit le rafraîchissement (valeur par défaut si None) et rafraîchit"""
+        try:
+            self.es.indices.put_settings(
+                index=index, body={"index": {"refresh_interval": previous}}
             )
+            self.es.indices.refresh(index=index)
+        except Exception as e:
+            logging.warning(f"refresh_interval non rétabli pour {index}: {str(e)}")
 
-            # Index dans Elasticsearch
-            gsod_df.write.format("org.elasticsearch.spark.sql").option(
-                "es.nodes", "elasticsearch"
-            ).option("es.port", "9200").option("es.resource", "weather_data").option(
-                "es.mapping.id", "STATION"
-            ).mode("append").save()
+    def _report_schema_inference_saving(self, storm_files: List[Path]):
+        """Journalise le coût de la passe d'inférence de schéma évitée
 
-            events_df.write.format("org.elasticsearch.spark.sql").option(
-                "es.nodes", "elasticsearch"
-            ).option("es.port", "9200").option("es.resource", "weather_events").option(
-                "es.mapping.id", "EVENT_ID"
-            ).mode("append").save()
+        Avec NOAA_BENCH_INFER_SCHEMA=true, l'ancienne lecture inferSchema est
+        rejouée (sans écriture) pour mesurer le temps réellement économisé.
+        """
+        scanned_mb = sum(f.stat().st_size for f in storm_files) / 2**20
+        if os.getenv("NOAA_BENCH_INFER_SCHEMA", "false").lower() not in (
+            "1",
+            "true",
+            "yes",
+        ):
+            logging.info(
+                f"Storm Events: inférence de schéma évitée ({scanned_mb:.1f}MB "
+                f"non relus)"
+            )
+            return
 
-            logging.info("Import des données terminé avec succès")
+        start = time.monotonic()
+        self.spark.read.csv(
+            [str(f) for f in storm_files], header=True, inferSchema=True
+        ).schema
+        elapsed = time.monotonic() - start
+        logging.info(
+            f"Storm Events: inférence de schéma évitée, {elapsed:.1f}s économisées "
+            f"({scanned_mb:.1f}MB non relus)"
+        )
+
+    def import_isd_data(self):
+        """Agrège les observations horaires ISD en observations journalières
+
+        Le résultat rejoint les jours GSOD dans /data/processed/daily_observations
+        (même partitionnement year/month que la table Hive daily_observations).
+        Les jours ISD ne sont retenus que pour les couples station/jour absents
+        de GSOD.
+        """
+        try:
+            isd_files = self._files_to_import("isd", "isd/*/*.csv")
+            # Une année est reconstruite si ses fichiers ISD ou GSOD ont changé
+            years = sorted({int(f.parent.name) for f in isd_files} | self.gsod_years)
+            if not years:
+                logging.info("Observations journalières à jour")
+                return
+
+            gsod_daily = self._gsod_daily_observations(
+                self.spark.read.parquet("/data/processed/gsod").filter(
+                    col("year").isin(years)
+                )
+            )
+
+            parquet_paths, csv_paths = self._raw_sources("isd", years)
+            # Lecture en texte brut: les champs ISD sont décodés par expressions
+            frames = []
+            if parquet_paths:
+                # Champs composites différents d'une station à l'autre
+                isd_parquet = self.spark.read.option("mergeSchema", "true").parquet(
+                    *parquet_paths
+                )
+                frames.append(
+                    isd_parquet.select(
+                        *[col(c).cast("string").alias(c) for c in isd_parquet.columns]
+                    )
+                )
+            if csv_paths:
+                frames.append(self.spark.read.csv(csv_paths, header=True))
+            daily_df = gsod_daily.select(*DAILY_OBSERVATIONS_COLUMNS)
+            if frames:
+                isd_df = reduce(
+                    lambda left, right: left.unionByName(
+                        right, allowMissingColumns=True
+                    ),
+                    frames,
+                )
+                isd_daily = self._aggregate_isd_daily(decode_isd_spark(isd_df))
+                isd_daily = isd_daily.join(
+                    gsod_daily.select("station_id", "date"),
+                    on=["station_id", "date"],
+                    how="left_anti",
+                )
+                daily_df = daily_df.unionByName(isd_daily)
+
+            daily_df.write.partitionBy("year", "month").mode("overwrite").parquet(
+                DAILY_OBSERVATIONS_PATH
+            )
+            self.catalog.register(
+                "noaa_weather.daily_observations",
+                DAILY_OBSERVATIONS_PATH,
+                ["year", "month"],
+                years,
+            )
+
+            self._build_rollups(years)
+            self._build_sketches(years)
+
+            self.state.mark_imported("isd", isd_files)
+            logging.info(f"Observations journalières importées pour {years}")
 
         except Exception as e:
-            logging.error(f"Erreur pendant l'import: {str(e)}")
+            logging.error(f"Erreur pendant l'import ISD: {str(e)}")
             raise
-        finally:
-            self.close()
+
+    def _build_rollups(self, years: List[int]):
+        """Reconstruit les rollups station × mois et station × saison × année
+
+        Les saisons suivent l'année civile (hiver = décembre, janvier et
+        février de la même année), comme l'analyse saisonnière du backend.
+        Seules les partitions year des années reconstruites sont réécrites.
+        """
+        daily = self.spark.read.parquet(DAILY_OBSERVATIONS_PATH).filter(
+            col("year").isin(years)
+        )
+
+        monthly = (
+            daily.groupBy("station_id", "year", "month")
+            .agg(*[agg(source).alias(name) for name, agg, source, _ in ROLLUP_MEASURES])
+            .cache()
+        )
+        monthly.write.partitionBy("year").mode("overwrite").parquet(
+            f"{ROLLUPS_PATH}/monthly"
+        )
+
+        season = (
+            when(col("month").isin(12, 1, 2), "Winter")
+            .when(col("month").isin(3, 4, 5), "Spring")
+            .when(col("month").isin(6, 7, 8), "Summer")
+            .otherwise("Fall")
+        )
+        seasonal = (
+            monthly.withColumn("season", season)
+            .groupBy("station_id", "year", "season")
+            .agg(*[merge(name).alias(name) for name, _, _, merge in ROLLUP_MEASURES])
+        )
+        seasonal.write.partitionBy("year").mode("overwrite").parquet(
+            f"{ROLLUPS_PATH}/seasonal"
+        )
+
+        monthly.unpersist()
+        for table in ("monthly", "seasonal"):
+            self.catalog.register(
+                f"noaa_weather.{table}_rollup",
+                f"{ROLLUPS_PATH}/{table}",
+                ["year"],
+                years,
+            )
+        logging.info(f"Rollups mensuels et saisonniers reconstruits pour {years}")
+
+    def _build_sketches(self, years: List[int]):
+        """Écrit les sketches KLL station × mois × mesure des années importées
+
+        Format: ``items`` (valeurs triées par niveau) et ``levels`` (début de
+        chaque niveau dans ``items``, puis la fin); un élément du niveau h
+        pèse 2^h. Seules les partitions year reconstruites sont réécrites.
+        """
+        daily = self.spark.read.parquet(DAILY_OBSERVATIONS_PATH).filter(
+            col("year").isin(years)
+        )
+        values = F.explode(
+            F.array(
+                *[
+                    F.struct(
+                        F.lit(measure).alias("measure"),
+                        col(measure).cast("double").alias("value"),
+                    )
+                    for measure in SKETCH_MEASURES
+                ]
+            )
+        ).alias("observation")
+
+        sketches = (
+            daily.select("station_id", "year", "month", values)
+            .select("station_id", "year", "month", "observation.*")
+            .where(col("value").isNotNull())
+            .groupBy("station_id", "year", "month", "measure")
+            .agg(
+                F.sort_array(F.collect_list("value")).alias("items"),
+                F.count("value").alias("n"),
+            )
+            .withColumn("levels", F.array(F.lit(0), col("n").cast("int")))
+        )
+        sketches.write.partitionBy("year").mode("overwrite").parquet(SKETCHES_PATH)
+        logging.info(f"Sketches de quantiles reconstruits pour {years}")
+
+    @staticmethod
+    def _aggregate_isd_daily(hourly_df):
+        """Min/max/moyenne de température, vent et précipitations par station et jour
+
+        Une seule agrégation (un seul shuffle). Les cumuls de précipitations
+        ISD (AA1) couvrent des périodes de 1, 3, 6, 12 ou 24 heures: on somme
+        les cumuls de chaque durée et on garde la plus grande estimation.
+        La direction du vent est une moyenne vectorielle.
+        """
+        period = col("precip_period_hours")
+        precip = col("precipitation")
+        radians = F.radians(col("wind_direction"))
+
+        daily = (
+            hourly_df.withColumn("date", F.to_date(col("timestamp")))
+            .groupBy(col("station").alias("station_id"), "date")
+            .agg(
+                F.avg("temperature").alias("temperature"),
+                F.max("temperature").alias("temperature_max"),
+                F.min("temperature").alias("temperature_min"),
+                F.greatest(
+                    F.sum(when(period == 1, precip)),
+                    F.sum(when(period == 3, precip)),
+                    F.sum(when(period == 6, precip)),
+                    F.sum(when(period == 12, precip)),
+                    F.max(when(period == 24, precip)),
+                ).alias("precipitation"),
+                F.avg("wind_speed").alias("wind_speed"),
+                F.avg(F.sin(radians)).alias("wind_sin"),
+                F.avg(F.cos(radians)).alias("wind_cos"),
+            )
+        )
+
+        return (
+            daily.withColumn(
+                "wind_direction",
+                F.pmod(
+                    F.round(F.degrees(F.atan2(col("wind_sin"), col("wind_cos")))),
+                    360,
+                ).cast("int"),
+            )
+            .withColumn("snow_depth", F.lit(None).cast("float"))
+            .withColumn("year", year(col("date")))
+            .withColumn("month", month(col("date")))
+            .drop("wind_sin", "wind_cos")
+            .select(*DAILY_OBSERVATIONS_COLUMNS)
+        )
+
+    @classmethod
+    def _weather_documents(cls, gsod_df):
+        """Documents weather_data (mapping du backend), un par station et jour
+
+        L'identifiant ``<station>-<aaaammjj>`` est calculé ici et exclu du
+        document; l'humidité relative vient de la formule de Magnus
+        appliquée à la température et au point de rosée moyens.
+        """
+        temp = _fahrenheit_to_celsius("TEMP")
+        dew = _fahrenheit_to_celsius("DEWP")
+        humidity = (
+            100
+            * F.exp(17.625 * dew / (243.04 + dew))
+            / F.exp(17.625 * temp / (243.04 + temp))
+        )
+        daily = cls._gsod_daily_observations(
+            gsod_df, F.least(humidity, F.lit(100.0)).cast("float").alias("humidity")
+        )
+        return daily.select(
+            F.concat_ws(
+                "-", col("station_id"), F.date_format("date", "yyyyMMdd")
+            ).alias("doc_id"),
+            col("station_id"),
+            col("station_id").alias("location"),
+            F.date_format("date", "yyyy-MM-dd").alias("timestamp"),
+            "temperature",
+            "temperature_max",
+            "temperature_min",
+            "humidity",
+            "precipitation",
+            "wind_speed",
+            "wind_direction",
+        )
+
+    @staticmethod
+    def _gsod_daily_observations(gsod_df, *extra_columns):
+        """Projection GSOD vers le schéma daily_observations en unités métriques
+
+        Conversion °F -> °C, pouces -> mm et nœuds -> m/s; les sentinelles
+        GSOD (9999.9, 99.99, 999.9) deviennent nulles.
+        """
+        fahrenheit = _fahrenheit_to_celsius
+
+        return gsod_df.select(
+            col("STATION").alias("station_id"),
+            F.to_date(col("date")).alias("date"),
+            fahrenheit("TEMP").cast("float").alias("temperature"),
+            fahrenheit("MAX").cast("float").alias("temperature_max"),
+            fahrenheit("MIN").cast("float").alias("temperature_min"),
+            when(col("PRCP") < 99.99, col("PRCP") * 25.4)
+            .cast("float")
+            .alias("precipitation"),
+            when(col("SNDP") < 999.9, col("SNDP") * 25.4)
+            .cast("float")
+            .alias("snow_depth"),
+            when(col("WDSP") < 999.9, col("WDSP") * 0.514444)
+            .cast("float")
+            .alias("wind_speed"),
+            F.lit(None).cast("int").alias("wind_direction"),
+            col("year"),
+            col("month"),
+            *extra_columns,
+        )
 
     def close(self):
         if self.spark:
@@ -130,4 +840,8 @@ class NOAADataImporter:
 
 if __name__ == "__main__":
     importer = NOAADataImporter()
-    importer.import_weather_data()
+    try:
+        importer.import_weather_data()
+        importer.import_isd_data()
+    finally:
+        importer.close()
@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+class ImportState:
+    """Filigrane des fichiers bruts déjà importés
+
+    Pour chaque jeu de données, on mémorise la taille et la date de
+    modification de chaque fichier brut au moment de son import. Un fichier
+    absent de l'état ou dont la signature a changé est considéré comme
+    nouveau; les autres sont ignorés lors des imports incrémentaux.
+    """
+
+    def __init__(self, path: str = "/data/processed/_import_state.json"):
+        self.path = Path(path)
+        self._datasets: Dict[str, Dict[str, Dict]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._datasets = json.load(f).get("datasets", {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"État d'import illisible, import complet: {str(e)}")
+
+    @staticmethod
+    def _signature(file_path: Path) -> Dict:
+        stat = file_path.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def changed_files(self, dataset: str, files: Iterable[Path]) -> List[Path]:
+        """Fichiers nouveaux ou modifiés depuis le dernier import"""
+        known = self._datasets.get(dataset, {})
+        return [
+            file_path
+            for file_path in files
+            if known.get(str(file_path), {}).get("signature")
+            != self._signature(file_path)
+        ]
+
+    def removed_files(self, dataset: str, files: Iterable[Path]) -> List[Path]:
+        """Fichiers importés qui ne figurent plus parmi les fichiers présents"""
+        present = {str(file_path) for file_path in files}
+        return [
+            Path(name)
+            for name in self._datasets.get(dataset, {})
+            if name not in present
+        ]
+
+    def forget(self, dataset: str, files: Iterable[Path]):
+        """Retire de l'état des fichiers supprimés"""
+        entries = self._datasets.get(dataset, {})
+        for file_path in files:
+            entries.pop(str(file_path), None)
+        self.save()
+
+    def mark_imported(self, dataset: str, files: Iterable[Path]):
+        entries = self._datasets.setdefault(dataset, {})
+        imported_at = datetime.utcnow().isoformat()
+        for file_path in files:
+            entries[str(file_path)] = {
+                "signature": self._signature(file_path),
+                "imported_at": imported_at,
+            }
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "datasets": self._datasets}, f, indent=2)
+        os.replace(tmp_path, self.path)
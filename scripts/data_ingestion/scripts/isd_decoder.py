@@ -0,0 +1,85 @@
+"""Décodage des champs composites ISD (TMP, DEW, SLP, WND, VIS, AA1)
+
+Les champs ISD ont une largeur fixe, par exemple ``TMP = "+0123,1"`` ou
+``WND = "250,1,N,0046,1"``. Le décodage se fait donc par expressions de
+colonnes Spark (``substring``, ``cast``), sans UDF ni boucle Python par
+ligne. Les sentinelles 9999 deviennent des valeurs nulles, de même que les
+mesures dont le code qualité signale une donnée suspecte ou erronée.
+
+Unités en sortie: °C, hPa, m/s, degrés, mètres, millimètres.
+"""
+
+from typing import Dict
+
+# (champ ISD, colonne de sortie, début, longueur, sentinelle, diviseur)
+NUMERIC_FIELDS = [
+    ("TMP", "temperature", 0, 5, 9999, 10.0),
+    ("DEW", "dew_point", 0, 5, 9999, 10.0),
+    ("SLP", "sea_level_pressure", 0, 5, 99999, 10.0),
+    ("WND", "wind_direction", 0, 3, 999, 1.0),
+    ("WND", "wind_speed", 8, 4, 9999, 10.0),
+    ("VIS", "visibility", 0, 6, 999999, 1.0),
+    ("AA1", "precip_period_hours", 0, 2, 99, 1.0),
+    ("AA1", "precipitation", 3, 4, 9999, 10.0),
+]
+
+# (champ ISD, colonne de sortie, position du code)
+CODE_FIELDS = [
+    ("TMP", "temperature_quality", 6),
+    ("DEW", "dew_point_quality", 6),
+    ("SLP", "sea_level_pressure_quality", 6),
+    ("WND", "wind_direction_quality", 4),
+    ("WND", "wind_type", 6),
+    ("WND", "wind_speed_quality", 13),
+    ("VIS", "visibility_quality", 7),
+    ("AA1", "precipitation_quality", 10),
+]
+
+# Mesure -> code qualité qui la valide
+QUALITY_OF: Dict[str, str] = {
+    "temperature": "temperature_quality",
+    "dew_point": "dew_point_quality",
+    "sea_level_pressure": "sea_level_pressure_quality",
+    "wind_direction": "wind_direction_quality",
+    "wind_speed": "wind_speed_quality",
+    "visibility": "visibility_quality",
+    "precipitation": "precipitation_quality",
+}
+
+# Codes qualité ISD: 2/6 = suspect, 3/7 = erroné
+SUSPECT_QUALITY_CODES = ["2", "3", "6", "7"]
+
+
+def decode_isd_spark(df):
+    """Décode un DataFrame Spark ISD brut en observations horaires typées"""
+    from pyspark.sql.functions import col, lit, substring, to_timestamp, trim, when
+
+    fields = {
+        name: (col(name) if name in df.columns else lit(None).cast("string"))
+        for name in {field for field, *_ in NUMERIC_FIELDS}
+    }
+
+    codes = {
+        column: substring(fields[field], position + 1, 1)
+        for field, column, position in CODE_FIELDS
+    }
+
+    selected = [
+        col("STATION").alias("station"),
+        to_timestamp(col("DATE"), "yyyy-MM-dd'T'HH:mm:ss").alias("timestamp"),
+        col("LATITUDE").cast("float").alias("latitude"),
+        col("LONGITUDE").cast("float").alias("longitude"),
+        col("ELEVATION").cast("float").alias("elevation"),
+        trim(col("REPORT_TYPE")).alias("report_type"),
+    ]
+    selected += [expr.alias(column) for column, expr in codes.items()]
+
+    for field, column, start, length, sentinel, divisor in NUMERIC_FIELDS:
+        raw = substring(fields[field], start + 1, length).cast("int")
+        valid = raw.isNotNull() & (raw != sentinel) & (raw != -sentinel)
+        quality = QUALITY_OF.get(column)
+        if quality is not None:
+            valid = valid & ~codes[quality].isin(SUSPECT_QUALITY_CODES)
+        selected.append(when(valid, (raw / divisor).cast("float")).alias(column))
+
+    return df.select(*selected)
@@ -0,0 +1,184 @@
+"""Schémas des fichiers NOAA, partagés entre l'import Spark et les conversions locales
+
+Les colonnes sont décrites par des types neutres ("string", "float", ...) puis
+traduites en schéma Spark ou Arrow selon le moteur utilisé.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+ColumnSpec = List[Tuple[str, str]]
+
+GSOD_COLUMNS: ColumnSpec = [
+    ("STATION", "string"),
+    ("DATE", "string"),
+    ("LATITUDE", "float"),
+    ("LONGITUDE", "float"),
+    ("ELEVATION", "float"),
+    ("TEMP", "float"),
+    ("DEWP", "float"),
+    ("SLP", "float"),
+    ("STP", "float"),
+    ("VISIB", "float"),
+    ("WDSP", "float"),
+    ("MXSPD", "float"),
+    ("GUST", "float"),
+    ("MAX", "float"),
+    ("MIN", "float"),
+    ("PRCP", "float"),
+    ("SNDP", "float"),
+    ("FRSHTT", "string"),
+]
+
+# Colonnes fixes des fichiers ISD (format CSV "access"); les champs
+# d'observation (TMP, DEW, WND, ...) sont des chaînes composites
+ISD_COLUMNS: ColumnSpec = [
+    ("STATION", "string"),
+    ("DATE", "string"),
+    ("SOURCE", "string"),
+    ("LATITUDE", "float"),
+    ("LONGITUDE", "float"),
+    ("ELEVATION", "float"),
+    ("NAME", "string"),
+    ("REPORT_TYPE", "string"),
+    ("CALL_SIGN", "string"),
+    ("QUALITY_CONTROL", "string"),
+]
+
+# Schémas Storm Events par version du format ("ftp_v1.0" dans le nom de fichier)
+STORM_EVENTS_COLUMNS: Dict[str, Dict[str, ColumnSpec]] = {
+    "v1.0": {
+        "details": [
+            ("BEGIN_YEARMONTH", "int"),
+            ("BEGIN_DAY", "int"),
+            ("BEGIN_TIME", "int"),
+            ("END_YEARMONTH", "int"),
+            ("END_DAY", "int"),
+            ("END_TIME", "int"),
+            ("EPISODE_ID", "long"),
+            ("EVENT_ID", "long"),
+            ("STATE", "string"),
+            ("STATE_FIPS", "int"),
+            ("YEAR", "int"),
+            ("MONTH_NAME", "string"),
+            ("EVENT_TYPE", "string"),
+            ("CZ_TYPE", "string"),
+            ("CZ_FIPS", "int"),
+            ("CZ_NAME", "string"),
+            ("WFO", "string"),
+            ("BEGIN_DATE_TIME", "string"),
+            ("CZ_TIMEZONE", "string"),
+            ("END_DATE_TIME", "string"),
+            ("INJURIES_DIRECT", "int"),
+            ("INJURIES_INDIRECT", "int"),
+            ("DEATHS_DIRECT", "int"),
+            ("DEATHS_INDIRECT", "int"),
+            ("DAMAGE_PROPERTY", "string"),
+            ("DAMAGE_CROPS", "string"),
+            ("SOURCE", "string"),
+            ("MAGNITUDE", "float"),
+            ("MAGNITUDE_TYPE", "string"),
+            ("FLOOD_CAUSE", "string"),
+            ("CATEGORY", "string"),
+            ("TOR_F_SCALE", "string"),
+            ("TOR_LENGTH", "float"),
+            ("TOR_WIDTH", "float"),
+            ("TOR_OTHER_WFO", "string"),
+            ("TOR_OTHER_CZ_STATE", "string"),
+            ("TOR_OTHER_CZ_FIPS", "string"),
+            ("TOR_OTHER_CZ_NAME", "string"),
+            ("BEGIN_RANGE", "float"),
+            ("BEGIN_AZIMUTH", "string"),
+            ("BEGIN_LOCATION", "string"),
+            ("END_RANGE", "float"),
+            ("END_AZIMUTH", "string"),
+            ("END_LOCATION", "string"),
+            ("BEGIN_LAT", "double"),
+            ("BEGIN_LON", "double"),
+            ("END_LAT", "double"),
+            ("END_LON", "double"),
+            ("EPISODE_NARRATIVE", "string"),
+            ("EVENT_NARRATIVE", "string"),
+            ("DATA_SOURCE", "string"),
+        ],
+        "fatalities": [
+            ("FAT_YEARMONTH", "int"),
+            ("FAT_DAY", "int"),
+            ("FAT_TIME", "int"),
+            ("FATALITY_ID", "long"),
+            ("EVENT_ID", "long"),
+            ("FATALITY_TYPE", "string"),
+            ("FATALITY_DATE", "string"),
+            ("FATALITY_AGE", "int"),
+            ("FATALITY_SEX", "string"),
+            ("FATALITY_LOCATION", "string"),
+            ("EVENT_YEARMONTH", "int"),
+        ],
+        "locations": [
+            ("YEARMONTH", "int"),
+            ("EPISODE_ID", "long"),
+            ("EVENT_ID", "long"),
+            ("LOCATION_INDEX", "int"),
+            ("RANGE", "float"),
+            ("AZIMUTH", "string"),
+            ("LOCATION", "string"),
+            ("LATITUDE", "double"),
+            ("LONGITUDE", "double"),
+            ("LAT2", "long"),
+            ("LON2", "long"),
+        ],
+    },
+}
+
+_STORM_EVENTS_VERSION = re.compile(r"-ftp_(v[0-9.]+)_")
+
+
+def storm_events_version(filename: str) -> str:
+    """Version du format extraite du nom de fichier (ex: "v1.0")"""
+    match = _STORM_EVENTS_VERSION.search(filename)
+    if not match:
+        raise ValueError(f"Version Storm Events introuvable: {filename}")
+    return match.group(1)
+
+
+def storm_events_columns(kind: str, version: str) -> ColumnSpec:
+    try:
+        return STORM_EVENTS_COLUMNS[version][kind]
+    except KeyError:
+        raise ValueError(f"Schéma Storm Events inconnu: {kind} {version}")
+
+
+def spark_schema(columns: ColumnSpec):
+    from pyspark.sql.types import (
+        DoubleType,
+        FloatType,
+        IntegerType,
+        LongType,
+        StringType,
+        StructField,
+        StructType,
+    )
+
+    types = {
+        "string": StringType,
+        "float": FloatType,
+        "double": DoubleType,
+        "int": IntegerType,
+        "long": LongType,
+    }
+    return StructType(
+        [StructField(name, types[kind](), True) for name, kind in columns]
+    )
+
+
+def arrow_schema(columns: ColumnSpec):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "float": pa.float32(),
+        "double": pa.float64(),
+        "int": pa.int32(),
+        "long": pa.int64(),
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, kind in columns])
@@ -0,0 +1,78 @@
+import gzip
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+
+# Nombre de lignes décompressées et filtrées à la fois
+DEFAULT_CHUNKSIZE = int(os.getenv("NOAA_STORM_CHUNKSIZE", "50000"))
+
+# Fichiers publiés par la NOAA et version du format téléchargée
+STORM_EVENTS_KINDS = ["details", "fatalities", "locations"]
+STORM_EVENTS_VERSION = "v1.0"
+
+# Année en fin de nom des CSV décompressés (ex: ..._v1.0_2019.csv)
+STORM_EVENTS_YEAR = re.compile(r"_(\d{4})\.csv$")
+
+
+def storm_events_archive(kind: str, year: int) -> str:
+    """Nom de l'archive téléchargée, ex: StormEvents_details-ftp_v1.0_2019.csv.gz"""
+    return f"StormEvents_{kind}-ftp_{STORM_EVENTS_VERSION}_{year}.csv.gz"
+
+
+def storm_events_pattern(kind: str = "*", year: str = "[0-9][0-9][0-9][0-9]") -> str:
+    """Motif glob des CSV décompressés, toutes versions du format confondues"""
+    return f"StormEvents_{kind}-ftp_*_{year}.csv"
+
+
+def storm_events_csv(archive: Path) -> Path:
+    """CSV décompressé d'une archive: même nom sans le suffixe .gz"""
+    return archive.with_name(archive.name[:-3])
+
+
+def storm_events_year(path: Path) -> int:
+    """Année d'un CSV Storm Events, lue à la fin du nom de fichier"""
+    match = STORM_EVENTS_YEAR.search(path.name)
+    if not match:
+        raise ValueError(f"Année Storm Events introuvable: {path.name}")
+    return int(match.group(1))
+
+
+def stream_filter_archive(
+    archive: Path, output_csv: Path, chunksize: int = DEFAULT_CHUNKSIZE
+) -> int:
+    """Décompresse et filtre une archive Storm Events par blocs
+
+    Les lignes sans ``DAMAGE_PROPERTY`` sont écartées (fichiers ``details``);
+    les autres fichiers sont recopiés tels quels. Le CSV est lu bloc par bloc
+    depuis le flux gzip et chaque bloc est ajouté au fichier de sortie: la
+    mémoire consommée dépend de ``chunksize`` et non de la taille de
+    l'archive. Toutes les colonnes sont lues comme texte pour que les types
+    ne varient pas d'un bloc à l'autre.
+
+    Renvoie le nombre de lignes écrites.
+    """
+    tmp_csv = output_csv.with_name(output_csv.name + ".tmp")
+    rows = 0
+    try:
+        with gzip.open(archive, "rt", encoding="utf-8", newline="") as f_in, open(
+            tmp_csv, "w", encoding="utf-8", newline=""
+        ) as f_out:
+            reader = pd.read_csv(
+                f_in,
+                dtype=str,
+                keep_default_na=False,
+                na_values=[""],
+                chunksize=chunksize,
+            )
+            for i, chunk in enumerate(reader):
+                if "DAMAGE_PROPERTY" in chunk.columns:
+                    chunk = chunk[chunk["DAMAGE_PROPERTY"].notna()]
+                chunk.to_csv(f_out, index=False, header=(i == 0))
+                rows += len(chunk)
+        os.replace(tmp_csv, output_csv)
+    finally:
+        if tmp_csv.exists():
+            tmp_csv.unlink()
+    return rows
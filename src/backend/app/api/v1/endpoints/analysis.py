@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List
 from datetime import datetime
-from app.schemas.analysis import WeatherAnalysis, SeasonalAnalysis
-from app.services.analysis_service import AnalysisService
+from app.schemas.analysis import WeatherAnalysis, SeasonalAnalysis, WeatherTrend, PercentileAnalysis
+from app.services.analysis_service import AnalysisService, SKETCH_MEASURES
 from app.services.auth import get_current_user
 
 router = APIRouter()
@@ -14,7 +14,13 @@ async def get_weather_statistics(
     year: int = Query(..., description="Année d'analyse"),
     current_user = Depends(get_current_user)
 ):
-    return await analysis_service.get_weather_statistics(location, year)
+    analysis = await analysis_service.get_weather_statistics(location, year)
+    if analysis is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Aucune observation pour {location} en {year}"
+        )
+    return analysis
 
 @router.get("/seasonal/{location}", response_model=List[SeasonalAnalysis])
 async def get_seasonal_analysis(
@@ -24,19 +30,56 @@ async def get_seasonal_analysis(
 ):
     return await analysis_service.get_seasonal_analysis(location, year)
 
-@router.get("/trends/{location}")
+@router.get("/trends/{location}", response_model=List[WeatherTrend])
 async def get_weather_trends(
     location: str,
     start_date: str = Query(..., description="Format: YYYY-MM-DD"),
     end_date: str = Query(..., description="Format: YYYY-MM-DD"),
+    window: int | None = Query(None, ge=1, le=3650, description="Fenêtre de la moyenne glissante (jours)"),
+    slope_window: int | None = Query(None, ge=2, le=3650, description="Fenêtre de la régression glissante (jours)"),
     current_user = Depends(get_current_user)
 ):
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
-        return await analysis_service.get_weather_trends(location, start, end)
     except ValueError:
         raise HTTPException(
             status_code=400,
             detail="Format de date invalide"
         )
+    return await analysis_service.get_weather_trends(
+        location, start, end, window_days=window, slope_window_days=slope_window
+    )
+
+@router.get("/percentiles/{location}", response_model=PercentileAnalysis)
+async def get_percentiles(
+    location: str,
+    measure: str = Query("temperature_max", description=f"Mesure: {', '.join(SKETCH_MEASURES)}"),
+    start_year: int = Query(..., ge=1900, description="Première année"),
+    end_year: int | None = Query(None, ge=1900, description="Dernière année (par défaut start_year)"),
+    month: List[int] | None = Query(None, description="Mois retenus (1-12), tous par défaut"),
+    q: List[float] = Query([0.5, 0.95], description="Rangs demandés entre 0 et 1"),
+    current_user = Depends(get_current_user)
+):
+    end_year = end_year or start_year
+    if measure not in SKETCH_MEASURES:
+        raise HTTPException(status_code=400, detail=f"Mesure inconnue: {measure}")
+    if end_year < start_year:
+        raise HTTPException(
+            status_code=400,
+            detail="end_year doit être postérieure ou égale à start_year"
+        )
+    if month and any(m < 1 or m > 12 for m in month):
+        raise HTTPException(status_code=400, detail="Les mois vont de 1 à 12")
+    if any(rank < 0 or rank > 1 for rank in q):
+        raise HTTPException(status_code=400, detail="Les rangs q vont de 0 à 1")
+
+    analysis = await analysis_service.get_percentiles(
+        location, measure, start_year, end_year, ranks=q, months=month
+    )
+    if analysis is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Aucun sketch pour {location} entre {start_year} et {end_year}"
+        )
+    return analysis
@@ -1,19 +1,42 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any
 from datetime import datetime
-from app.schemas.weather import WeatherData
+from app.core.config import settings
+from app.schemas.weather import DAILY, MONTHLY, WeatherData, WeatherCreate
+from app.services.elasticsearch_service import ElasticsearchService
+from app.services.ingest_buffer import BufferFull
 from app.services.weather_service import WeatherService
 
 router = APIRouter()
 weather_service = WeatherService()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+GRANULARITY_HEADER = "X-Granularity"
+
+
+def _check_cursor(cursor: str | None):
+    if cursor is None:
+        return
+    try:
+        ElasticsearchService.decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
 @router.get("/current/{location}", response_model=WeatherData)
 async def get_current_weather(location: str):
-    return await weather_service.get_current_weather(location)
+    current = await weather_service.get_current_weather(location)
+    if current is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Aucune observation du jour pour {location}"
+        )
+    return current
 
 @router.get("/historical/{location}", response_model=List[WeatherData])
 async def get_historical_weather(
     location: str,
+    response: Response,
     start_date: str = Query(
         ...,
         description="Date de début (format: YYYY-MM-DD)",
@@ -23,29 +46,120 @@ async def get_historical_weather(
         ...,
         description="Date de fin (format: YYYY-MM-DD)",
         example="2024-03-13"
-    )
+    ),
+    page_size: int = Query(500, ge=1, le=5000, description="Nombre d'enregistrements par page"),
+    cursor: str | None = Query(None, description="Curseur renvoyé dans l'en-tête X-Next-Cursor"),
+    stream: bool = Query(False, description="Toute la plage en NDJSON, sans pagination"),
+    aggregate: bool = Query(False, description="Série mensuelle (rollups Hive), sans pagination")
 ):
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
-
-        return await weather_service.get_historical_weather(
-            location=location,
-            start_date=start,
-            end_date=end
-        )
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail="Format de date invalide. Utilisez YYYY-MM-DD (ex: 2024-01-01)"
         )
+    try:
+        WeatherService.cursor_source(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+    if stream:
+        async def lines():
+            async for record in weather_service.stream_historical_weather(
+                location=location,
+                start_date=start,
+                end_date=end
+            ):
+                yield record.model_dump_json() + "\n"
+
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={GRANULARITY_HEADER: DAILY}
+        )
+
+    records, next_cursor = await weather_service.get_historical_weather(
+        location=location,
+        start_date=start,
+        end_date=end,
+        page_size=page_size,
+        cursor=cursor,
+        aggregate=aggregate
+    )
+    response.headers[GRANULARITY_HEADER] = MONTHLY if aggregate else DAILY
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return records
 
 @router.get("/search", response_model=List[WeatherData])
 async def search_weather_events(
+    response: Response,
     location: str | None = None,
-    event_type: str | None = None
+    event_type: str | None = None,
+    lat: float | None = Query(None, description="Latitude du point de recherche"),
+    lon: float | None = Query(None, description="Longitude du point de recherche"),
+    radius_km: float = Query(50.0, gt=0, description="Rayon de recherche (km)"),
+    min_casualties: int | None = Query(
+        None,
+        ge=0,
+        description="Nombre minimum de victimes (blessés + décès)"
+    ),
+    page_size: int = Query(100, ge=1, le=1000, description="Nombre d'événements par page"),
+    cursor: str | None = Query(None, description="Curseur renvoyé dans l'en-tête X-Next-Cursor")
 ):
-    return await weather_service.search_weather_events(
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=400,
+            detail="lat et lon doivent être fournis ensemble"
+        )
+    _check_cursor(cursor)
+
+    events, next_cursor = await weather_service.search_weather_events(
         location=location,
-        event_type=event_type
+        event_type=event_type,
+        near=(lat, lon) if lat is not None else None,
+        radius_km=radius_km,
+        min_casualties=min_casualties,
+        page_size=page_size,
+        cursor=cursor
     )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return events
+
+@router.get("/seasonal/{location}")
+async def get_seasonal_patterns(
+    location: str,
+    start_year: int = Query(..., ge=1900, description="Première année"),
+    end_year: int | None = Query(None, ge=1900, description="Dernière année (par défaut start_year)")
+):
+    end_year = end_year or start_year
+    if end_year < start_year:
+        raise HTTPException(
+            status_code=400,
+            detail="end_year doit être postérieure ou égale à start_year"
+        )
+
+    return await weather_service.analyze_seasonal_patterns_range(
+        location=location,
+        start_year=start_year,
+        end_year=end_year
+    )
+
+@router.post("/bulk", status_code=202)
+async def ingest_weather_data(
+    observations: List[WeatherCreate],
+    flush: bool = Query(False, description="Attendre l'écriture dans Hive et Elasticsearch")
+) -> Dict[str, Any]:
+    if not observations:
+        raise HTTPException(status_code=400, detail="Aucune observation fournie")
+    try:
+        return await weather_service.ingest_weather_data(observations, flush=flush)
+    except BufferFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Tampon d'écriture plein, réessayez plus tard ({str(e)})",
+            headers={"Retry-After": str(int(settings.INGEST_FLUSH_INTERVAL) + 1)}
+        )
@@ -0,0 +1,142 @@
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+import pickle
+import sys
+import threading
+import time
+from app.core.config import settings
+from app.core import metrics
+
+
+def cache_key(endpoint: str, location: Optional[str], start, end, **params) -> Tuple:
+    """Clé normalisée: endpoint, station, bornes, paramètres triés
+
+    Les bornes datetime sont gardées à la seconde près (en UTC si elles
+    portent un fuseau): deux plages du même jour mais d'heures différentes
+    ne renvoient pas le même résultat, elles ne partagent donc pas de clé.
+    """
+
+    def bound(value):
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value.isoformat()
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    return (
+        endpoint,
+        (location or "").strip(),
+        bound(start),
+        bound(end),
+        tuple(sorted(params.items()))
+    )
+
+
+def ttl_for(end) -> float:
+    """TTL court si la plage touche aujourd'hui (données encore en cours d'arrivée)"""
+    today = datetime.utcnow().date()
+    if isinstance(end, datetime):
+        touches_today = end.date() >= today
+    elif isinstance(end, date):
+        touches_today = end >= today
+    else:  # année
+        touches_today = end >= today.year
+    return settings.CACHE_TTL_RECENT if touches_today else settings.CACHE_TTL_HISTORICAL
+
+
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Cache LRU à durée de vie, borné par une estimation de la mémoire occupée
+
+    Chaque entrée peut être rattachée à une station pour être invalidée
+    lorsque de nouvelles données de cette station sont écrites.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int, Optional[str]]]" = OrderedDict()
+        self._by_station: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        metrics.register(self.samples)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float, station: Optional[str] = None):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size, station)
+            self._bytes += size
+            if station:
+                self._by_station.setdefault(station, set()).add(key)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_station(self, station: str) -> int:
+        """Supprime toutes les entrées d'une station; retourne leur nombre"""
+        with self._lock:
+            keys = self._by_station.pop(station.strip(), set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_station.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        value, _, size, station = self._entries.pop(key)
+        self._bytes -= size
+        if station and station in self._by_station:
+            self._by_station[station].discard(key)
+            if not self._by_station[station]:
+                del self._by_station[station]
+
+    def samples(self) -> List[metrics.Sample]:
+        labels = {"cache": self.name}
+        with self._lock:
+            return [
+                ("noaa_cache_hits_total", "counter", "Lectures servies par le cache", labels, self.hits),
+                ("noaa_cache_misses_total", "counter", "Lectures absentes ou expirées", labels, self.misses),
+                ("noaa_cache_evictions_total", "counter", "Entrées évincées (LRU)", labels, self.evictions),
+                ("noaa_cache_invalidations_total", "counter", "Entrées invalidées par écriture", labels, self.invalidations),
+                ("noaa_cache_entries", "gauge", "Entrées en cache", labels, len(self._entries)),
+                ("noaa_cache_bytes", "gauge", "Taille estimée du cache", labels, self._bytes)
+            ]
+
+
+# Cache partagé par tous les services du processus
+result_cache = ResultCache("results", settings.CACHE_MAX_BYTES)
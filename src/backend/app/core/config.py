@@ -21,6 +21,64 @@ class Settings(BaseSettings):
     # Elasticsearch
     ELASTICSEARCH_HOST: str = "localhost"
     ELASTICSEARCH_PORT: int = 9200
+    # Client asynchrone partagé: connexions par nœud et délais (secondes)
+    ES_CONNECTIONS_PER_NODE: int = 25
+    ES_REQUEST_TIMEOUT: float = 10.0
+    ES_SEARCH_TIMEOUT: float = 5.0
+    # Durée de vie d'un point-in-time entre deux pages d'un flux
+    ES_PIT_KEEP_ALIVE: str = "1m"
+    # Indexation bulk: taille des lots, requêtes simultanées, renvois sur 429
+    ES_BULK_CHUNK_SIZE: int = 500
+    ES_BULK_CONCURRENCY: int = 4
+    ES_BULK_MAX_RETRIES: int = 5
+    ES_BULK_INITIAL_BACKOFF: float = 1.0
+
+    # Hive
+    HIVE_HOST: str = "localhost"
+    HIVE_PORT: int = 10000
+    HIVE_USER: str = "hive"
+    # Pool de connexions Hive (= nombre de threads dédiés aux requêtes)
+    HIVE_POOL_SIZE: int = 8
+    HIVE_POOL_TIMEOUT: float = 30.0
+    HIVE_HEALTH_CHECK_INTERVAL: float = 60.0
+    # Reconnexion après une panne de Hive: délai initial et maximal (secondes)
+    HIVE_RECONNECT_INITIAL_BACKOFF: float = 5.0
+    HIVE_RECONNECT_MAX_BACKOFF: float = 300.0
+    # Emplacement des partitions year/month écrites par l'import Spark
+    DAILY_OBSERVATIONS_PATH: str = "/data/processed/daily_observations"
+    # Rollups mensuels/saisonniers (sommes, effectifs, min, max)
+    ROLLUPS_PATH: str = "/data/processed/rollups"
+    # Index de plages par station (sommes cumulées, extrêmes) de build_range_index.py
+    RANGE_INDEX_PATH: str = "/data/processed/range_index"
+    # Sketches de quantiles KLL station × mois × mesure (import Spark)
+    SKETCHES_PATH: str = "/data/processed/sketches"
+    SKETCH_K: int = 200
+    # Lecture directe des Parquet (dernier recours)
+    PARQUET_WORKERS: int = 4
+
+    # Cache des résultats: taille maximale estimée et durées de vie (secondes)
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_TTL_RECENT: float = 60.0
+    CACHE_TTL_HISTORICAL: float = 6 * 3600.0
+
+    # Écritures groupées: taille de lot, délai maximal (secondes), tampon maximal
+    INGEST_BATCH_SIZE: int = 1000
+    INGEST_FLUSH_INTERVAL: float = 5.0
+    INGEST_MAX_PENDING: int = 50000
+    # Observations non écrites dans Hive (panne, arrêt), reprises au fil des
+    # vidages (volume backend_spool: /data est monté en lecture seule)
+    INGEST_SPILL_PATH: str = "/var/spool/noaa/ingest_spill.ndjson"
+
+    # Tendances: fenêtres glissantes (jours) de la moyenne et de la régression
+    TREND_WINDOW_DAYS: int = 30
+    TREND_SLOPE_WINDOW_DAYS: int = 365
+
+    # Taille des pages lues par les flux NDJSON
+    STREAM_PAGE_SIZE: int = 1000
+
+    # Routage des requêtes historiques (jours)
+    ROUTER_SHORT_RANGE_DAYS: int = 31
+    ROUTER_RECENT_DAYS: int = 90
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,68 @@
+from typing import Callable, Dict, List, Sequence, Tuple
+import threading
+
+# (nom, type Prometheus, aide, labels, valeur)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+_providers: List[Callable[[], List[Sample]]] = []
+_lock = threading.Lock()
+
+
+def register(provider: Callable[[], List[Sample]]):
+    """Ajoute une source de métriques, interrogée à chaque lecture de /metrics"""
+    with _lock:
+        _providers.append(provider)
+
+
+def render() -> str:
+    """Métriques au format texte Prometheus (un bloc HELP/TYPE par nom)"""
+    with _lock:
+        providers = list(_providers)
+
+    families: Dict[str, Tuple[str, str, List[Tuple[str, Dict[str, str], float]]]] = {}
+    for provider in providers:
+        for name, kind, help_text, labels, value in provider():
+            family = name
+            if kind == "histogram":
+                family = name.rsplit("_", 1)[0]  # _bucket, _sum, _count
+            families.setdefault(family, (kind, help_text, []))[2].append((name, labels, value))
+
+    lines = []
+    for family, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """Histogramme cumulatif (bornes ``le`` en secondes par défaut)"""
+
+    def __init__(self, buckets: Sequence[float] = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def samples(self, name: str, help_text: str, labels: Dict[str, str]) -> List[Sample]:
+        with self._lock:
+            bounds = [(str(bound), count) for bound, count in zip(self.buckets, self._counts)]
+            bounds.append(("+Inf", self._count))
+            return [
+                (f"{name}_bucket", "histogram", help_text, {**labels, "le": le}, count)
+                for le, count in bounds
+            ] + [
+                (f"{name}_sum", "histogram", help_text, labels, self._sum),
+                (f"{name}_count", "histogram", help_text, labels, self._count)
+            ]
@@ -0,0 +1,48 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+import asyncio
+from app.core import metrics
+
+
+class SingleFlight:
+    """Regroupe les appels concurrents identiques sur une seule exécution
+
+    Le premier appel pour une clé lance la requête backend; les appels
+    suivants arrivés avant sa fin attendent le même résultat (ou la même
+    exception) au lieu d'en relancer une. La requête est protégée par
+    ``asyncio.shield``: l'annulation d'un appelant (client déconnecté)
+    n'interrompt pas les autres.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.deduplicated = 0
+        metrics.register(self.samples)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marque l'exception comme lue même si plus personne n'attend
+            task.exception()
+
+    def samples(self) -> List[metrics.Sample]:
+        labels = {"flight": self.name}
+        return [
+            ("noaa_singleflight_calls_total", "counter", "Appels reçus", labels, self.calls),
+            ("noaa_singleflight_deduplicated_total", "counter", "Appels servis par une requête déjà en cours", labels, self.deduplicated),
+            ("noaa_singleflight_inflight", "gauge", "Requêtes backend en cours", labels, len(self._inflight))
+        ]
@@ -0,0 +1,132 @@
+from typing import Any, Callable, List, Optional, Tuple
+from contextlib import contextmanager
+from elasticsearch import AsyncElasticsearch
+from app.core.config import settings
+import logging
+import queue
+import threading
+import time
+
+_es_client: Optional[AsyncElasticsearch] = None
+
+
+def get_es_client() -> AsyncElasticsearch:
+    """Client Elasticsearch asynchrone partagé par tout le processus
+
+    Un seul pool de connexions HTTP (ES_CONNECTIONS_PER_NODE) est ainsi
+    réutilisé par tous les services et toutes les requêtes.
+    """
+    global _es_client
+    if _es_client is None:
+        _es_client = AsyncElasticsearch(
+            f"http://{settings.ELASTICSEARCH_HOST}:{settings.ELASTICSEARCH_PORT}",
+            connections_per_node=settings.ES_CONNECTIONS_PER_NODE,
+            request_timeout=settings.ES_REQUEST_TIMEOUT,
+            retry_on_timeout=True,
+            max_retries=3
+        )
+    return _es_client
+
+
+async def close_es_client():
+    global _es_client
+    if _es_client is not None:
+        await _es_client.close()
+        _es_client = None
+
+
+class HiveConnectionPool:
+    """Pool borné de connexions DB-API (pyhive)
+
+    Au plus ``size`` connexions sont empruntées en même temps; au-delà,
+    l'appelant attend jusqu'à ``timeout`` secondes. Une connexion restée
+    inutilisée plus de ``health_check_interval`` secondes, ou rendue après
+    une erreur, est testée par un ``SELECT 1`` avant d'être réutilisée et
+    remplacée si elle ne répond plus.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 8,
+        timeout: float = 30.0,
+        health_check_interval: float = 60.0
+    ):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(size)
+        # LIFO: on réutilise en priorité les connexions les plus récentes
+        self._idle: "queue.LifoQueue[Tuple[Any, float]]" = queue.LifoQueue()
+        self._closed = False
+
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion, rendue au pool en sortie de bloc"""
+        if self._closed:
+            raise RuntimeError("Pool Hive fermé")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Aucune connexion Hive libre après {self.timeout}s")
+
+        conn = None
+        failed = False
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if conn is not None and self._closed:
+                self._close_quietly(conn)
+            elif conn is not None:
+                # Après une erreur, la connexion sera vérifiée avant réemploi
+                self._idle.put((conn, 0.0 if failed else time.monotonic()))
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - last_used < self.health_check_interval:
+                return conn
+            if self._is_healthy(conn):
+                return conn
+            logging.warning("Connexion Hive inactive remplacée")
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Ferme les connexions inactives; les emprunts en cours finissent normalement"""
+        self._closed = True
+        connections: List[Any] = []
+        while True:
+            try:
+                connections.append(self._idle.get_nowait()[0])
+            except queue.Empty:
+                break
+        for conn in connections:
+            self._close_quietly(conn)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1.endpoints import auth, weather
+from app.api.v1.endpoints import analysis, auth, weather
+from app.core import metrics
+from app.db.session import close_es_client
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,12 +18,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Granularity"],
 )
 
 # Routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(weather.router, prefix=f"{settings.API_V1_STR}/weather", tags=["weather"])
+app.include_router(analysis.router, prefix=f"{settings.API_V1_STR}/analysis", tags=["analysis"])
+
+@app.on_event("startup")
+async def startup():
+    # Recharge les observations déposées sur disque à l'arrêt précédent
+    weather.weather_service.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Vide le tampon d'écriture et ferme le pool Hive avant le client Elasticsearch
+    await weather.weather_service.close()
+    await close_es_client()
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Métriques au format texte Prometheus (scrapées sur backend:8000)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
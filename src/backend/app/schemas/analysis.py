@@ -21,7 +21,9 @@ class SeasonalAnalysis(BaseModel):
 class WeatherTrend(BaseModel):
     date: datetime
     value: float
-    trend: float
+    trend: float  # moyenne glissante
+    slope: Optional[float] = None  # pente de la régression glissante (°C/an)
+    seasonal_adjusted: Optional[float] = None  # moyenne glissante hors cycle saisonnier
 
 class WeatherAnalysis(BaseModel):
     location: str
@@ -30,3 +32,19 @@ class WeatherAnalysis(BaseModel):
     statistics: WeatherStatistics
     seasonal_data: Optional[List[SeasonalAnalysis]] = None
     trends: Optional[List[WeatherTrend]] = None
+
+class PercentileValue(BaseModel):
+    rank: float
+    value: float
+    lower: float  # valeur au rang (rank - rank_error)
+    upper: float  # valeur au rang (rank + rank_error)
+
+class PercentileAnalysis(BaseModel):
+    location: str
+    measure: str
+    start_year: int
+    end_year: int
+    months: Optional[List[int]] = None
+    count: int
+    rank_error: float  # erreur de rang normalisée (99 % de confiance), 0 si exact
+    percentiles: List[PercentileValue]
@@ -2,6 +2,10 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 
+# Granularité des points d'une série historique
+DAILY = "daily"
+MONTHLY = "monthly"
+
 class WeatherBase(BaseModel):
     location: str
     temperature: float
@@ -13,9 +17,13 @@ class WeatherData(WeatherBase):
     station_id: str
     pressure: Optional[float] = None
     precipitation: Optional[float] = None
+    # Historique: DAILY (observation du jour) ou MONTHLY (moyenne du mois, timestamp = 1er du mois)
+    granularity: Optional[str] = None
 
 class WeatherResponse(WeatherBase):
     pass
 
 class WeatherCreate(WeatherBase):
-    pass
+    station_id: Optional[str] = None  # par défaut: location
+    precipitation: Optional[float] = None
+    wind_direction: Optional[int] = None
@@ -2,10 +2,12 @@ from .weather_service import WeatherService
 from .analysis_service import AnalysisService
 from .elasticsearch_service import ElasticsearchService
 from .hadoop_service import HadoopService
+from .parquet_service import ParquetService
 
 __all__ = [
     "WeatherService",
     "AnalysisService",
     "ElasticsearchService",
-    "HadoopService"
+    "HadoopService",
+    "ParquetService"
 ]
@@ -1,2 +1,221 @@
+from typing import List, Optional
+from datetime import datetime
+import logging
+import numpy as np
+import pandas as pd
+from app.core.cache import cache_key, result_cache, ttl_for
+from app.core.config import settings
+from app.schemas.analysis import (
+    WeatherAnalysis, WeatherStatistics, SeasonalAnalysis, WeatherTrend,
+    PercentileAnalysis, PercentileValue
+)
+from app.services.hadoop_service import SEASONS, SEASON_OF_MONTH
+from app.services.parquet_service import ParquetService
+from app.services.quantile_sketch import KLLSketch
+from app.services.trend_engine import TrendEngine
+
+TREND_COLUMNS = ["date", "temperature"]
+
+# Mesures disposant de sketches de quantiles (SKETCH_MEASURES de l'import)
+SKETCH_MEASURES = ["temperature", "temperature_max", "temperature_min", "precipitation", "wind_speed"]
+
+ANALYSIS_COLUMNS = [
+    "date", "temperature", "temperature_max", "temperature_min", "precipitation", "wind_speed"
+]
+
+# Indice de saison par mois (position 0 inutilisée), pour un regroupement vectorisé
+_SEASON_INDEX = np.array([0] + [SEASONS.index(SEASON_OF_MONTH[month]) for month in range(1, 13)])
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Dates en datetime64, extrêmes manquants remplacés par la moyenne du jour"""
+    df = df.dropna(subset=["temperature"])
+    return df.assign(
+        date=pd.to_datetime(df["date"]),
+        temperature_max=df["temperature_max"].fillna(df["temperature"]),
+        temperature_min=df["temperature_min"].fillna(df["temperature"])
+    )
+
+
+def _optional(value) -> Optional[float]:
+    return None if pd.isna(value) else float(value)
+
+
+def summarize(df: pd.DataFrame) -> WeatherStatistics:
+    return WeatherStatistics(
+        avg_temperature=float(df["temperature"].mean()),
+        max_temperature=float(df["temperature_max"].max()),
+        min_temperature=float(df["temperature_min"].min()),
+        total_precipitation=float(df["precipitation"].sum()),
+        avg_wind_speed=_optional(df["wind_speed"].mean())
+    )
+
+
+def seasonal(df: pd.DataFrame) -> List[SeasonalAnalysis]:
+    """Agrégats par saison (hiver = décembre, janvier, février de la même année)"""
+    seasons = _SEASON_INDEX[df["date"].dt.month.to_numpy()]
+    grouped = df.groupby(seasons).agg(
+        avg_temp=("temperature", "mean"),
+        avg_precip=("precipitation", "mean"),
+        max_temp=("temperature_max", "max"),
+        min_temp=("temperature_min", "min"),
+        days_count=("temperature", "size")
+    )
+    grouped["avg_precip"] = grouped["avg_precip"].fillna(0.0)
+    return [
+        SeasonalAnalysis(season=SEASONS[index], **row)
+        for index, row in zip(grouped.index, grouped.to_dict("records"))
+    ]
+
+
 class AnalysisService:
-    pass
+    """Analyses d'une station calculées sur les Parquet journaliers
+
+    Statistiques et saisons: une seule lecture par appel (colonnes utiles,
+    filtres poussés dans pyarrow), puis des agrégations pandas/NumPy sans
+    boucle par ligne. Tendances: un passage en ligne (TrendEngine) sur les
+    années lues l'une après l'autre.
+    """
+
+    def __init__(self):
+        self.parquet_service = ParquetService()
+
+    async def _daily(self, location: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        try:
+            df = await self.parquet_service.read_daily_frame(
+                location, start_date, end_date, ANALYSIS_COLUMNS
+            )
+        except Exception as e:
+            logging.error(f"Erreur lecture Parquet (analyse): {str(e)}")
+            return pd.DataFrame(columns=ANALYSIS_COLUMNS)
+        return _prepare(df).sort_values("date")
+
+    async def get_weather_statistics(self, location: str, year: int) -> Optional[WeatherAnalysis]:
+        key = cache_key("analysis_statistics", location, year, year)
+        found, analysis = result_cache.get(key)
+        if found:
+            return analysis
+
+        start, end = datetime(year, 1, 1), datetime(year, 12, 31)
+        df = await self._daily(location, start, end)
+        if df.empty:
+            return None
+
+        analysis = WeatherAnalysis(
+            location=location,
+            period_start=start,
+            period_end=end,
+            statistics=summarize(df),
+            seasonal_data=seasonal(df)
+        )
+        result_cache.set(key, analysis, ttl_for(year), station=location)
+        return analysis
+
+    async def get_seasonal_analysis(self, location: str, year: int) -> List[SeasonalAnalysis]:
+        key = cache_key("analysis_seasonal", location, year, year)
+        found, seasons = result_cache.get(key)
+        if found:
+            return seasons
+
+        df = await self._daily(location, datetime(year, 1, 1), datetime(year, 12, 31))
+        seasons = seasonal(df) if not df.empty else []
+        if seasons:
+            result_cache.set(key, seasons, ttl_for(year), station=location)
+        return seasons
+
+    async def get_weather_trends(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        window_days: Optional[int] = None,
+        slope_window_days: Optional[int] = None
+    ) -> List[WeatherTrend]:
+        """Tendances journalières en un passage, une année lue à la fois"""
+        window_days = window_days or settings.TREND_WINDOW_DAYS
+        slope_window_days = slope_window_days or settings.TREND_SLOPE_WINDOW_DAYS
+        key = cache_key(
+            "analysis_trends", location, start_date, end_date,
+            window_days=window_days, slope_window_days=slope_window_days
+        )
+        found, trends = result_cache.get(key)
+        if found:
+            return trends
+
+        engine = TrendEngine(window_days, slope_window_days)
+        trends = []
+        try:
+            async for chunk in self.parquet_service.iter_daily_years(
+                location, start_date, end_date, TREND_COLUMNS
+            ):
+                chunk = chunk.dropna(subset=["temperature"])
+                for day, value in zip(pd.to_datetime(chunk["date"]).dt.to_pydatetime(), chunk["temperature"].tolist()):
+                    rolling_mean, slope, adjusted = engine.push(day, value)
+                    trends.append(WeatherTrend(
+                        date=day,
+                        value=value,
+                        trend=rolling_mean,
+                        slope=slope,
+                        seasonal_adjusted=adjusted
+                    ))
+        except Exception as e:
+            logging.error(f"Erreur calcul des tendances: {str(e)}")
+            return []
+
+        if trends:
+            result_cache.set(key, trends, ttl_for(end_date), station=location)
+        return trends
+
+    async def get_percentiles(
+        self,
+        location: str,
+        measure: str,
+        start_year: int,
+        end_year: int,
+        ranks: List[float],
+        months: Optional[List[int]] = None
+    ) -> Optional[PercentileAnalysis]:
+        """Percentiles approchés par fusion des sketches KLL station × mois
+
+        Aucune observation journalière n'est relue; ``lower``/``upper``
+        encadrent chaque valeur selon l'erreur de rang du sketch fusionné.
+        """
+        months = sorted(set(months)) if months else None
+        key = cache_key(
+            "analysis_percentiles", location, start_year, end_year,
+            measure=measure, ranks=tuple(ranks), months=tuple(months or ())
+        )
+        found, analysis = result_cache.get(key)
+        if found:
+            return analysis
+
+        try:
+            rows = await self.parquet_service.get_sketches(location, measure, start_year, end_year, months)
+        except Exception as e:
+            logging.error(f"Erreur lecture des sketches: {str(e)}")
+            return None
+        sketch = KLLSketch.merged(
+            ((row["items"], row["levels"]) for row in rows), k=settings.SKETCH_K
+        )
+        if sketch.n == 0:
+            return None
+
+        error = sketch.rank_error
+        values = sketch.quantiles(ranks)
+        lower = sketch.quantiles([rank - error for rank in ranks])
+        upper = sketch.quantiles([rank + error for rank in ranks])
+        analysis = PercentileAnalysis(
+            location=location,
+            measure=measure,
+            start_year=start_year,
+            end_year=end_year,
+            months=months,
+            count=sketch.n,
+            rank_error=error,
+            percentiles=[
+                PercentileValue(rank=rank, value=value, lower=low, upper=high)
+                for rank, value, low, high in zip(ranks, values, lower, upper)
+            ]
+        )
+        result_cache.set(key, analysis, ttl_for(end_year), station=location)
+        return analysis
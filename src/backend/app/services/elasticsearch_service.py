@@ -1,32 +1,56 @@
-from elasticsearch import Elasticsearch
-from typing import List, Optional, Dict, Any
+from elasticsearch import AsyncElasticsearch, helpers
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Callable
 from datetime import datetime
 from app.core.config import settings
+from app.db.session import get_es_client
+from app.services.hadoop_service import SEASON_OF_MONTH
+import asyncio
+import base64
+import json
 import logging
+import time
+
+# Tris des pages: le dernier champ départage les ex aequo (ordre total)
+WEATHER_DATA_SORT = [{"timestamp": "desc"}, {"station_id": "asc"}]
+EVENTS_SORT = [{"date": "desc"}, {"event_id": "asc"}]
 
 class ElasticsearchService:
     def __init__(self):
-        self.es = None
+        self.es: Optional[AsyncElasticsearch] = None
         self.is_connected = False
+        self._indices_ready = False
+        self._indices_lock = asyncio.Lock()
         self._connect()
 
     def _connect(self):
-        """Établit une connexion à Elasticsearch avec fallback"""
+        """Récupère le client asynchrone partagé du processus avec fallback"""
         if not self.is_connected:
             try:
-                self.es = Elasticsearch(
-                    f"http://{settings.ELASTICSEARCH_HOST}:{settings.ELASTICSEARCH_PORT}",
-                    retry_on_timeout=True,
-                    max_retries=3
-                )
+                self.es = get_es_client()
                 self.is_connected = True
-                self._create_indices()
             except Exception as e:
                 logging.warning(f"ES non disponible - mode fallback activé: {str(e)}")
                 self.is_connected = False
 
-    def _create_indices(self):
-        """Crée ou met à jour les indices"""
+    async def _ensure_indices(self):
+        """Crée les indices au premier appel (le client exige une boucle active)
+
+        Les appels simultanés attendent la même création; en cas d'échec
+        l'appel suivant réessaie.
+        """
+        if self._indices_ready:
+            return
+        async with self._indices_lock:
+            if not self._indices_ready:
+                self._indices_ready = await self._create_indices()
+
+    @property
+    def _search(self):
+        """Client avec le délai maximal propre aux recherches"""
+        return self.es.options(request_timeout=settings.ES_SEARCH_TIMEOUT)
+
+    async def _create_indices(self) -> bool:
+        """Crée ou met à jour les indices; False en cas d'échec"""
         try:
             # Index pour les données météo quotidiennes
             weather_mapping = {
@@ -46,67 +70,218 @@ class ElasticsearchService:
                 }
             }
 
-            # Index pour les événements météo extrêmes
+            # Index pour les événements météo extrêmes (documents dénormalisés
+            # par l'import Spark: lieux et victimes imbriqués)
             events_mapping = {
                 "mappings": {
                     "properties": {
                         "event_id": {"type": "keyword"},
+                        "episode_id": {"type": "keyword"},
                         "event_type": {"type": "keyword"},
                         "location": {"type": "keyword"},
+                        "state": {"type": "keyword"},
                         "date": {"type": "date"},
                         "description": {"type": "text"},
+                        "magnitude": {"type": "float"},
                         "damage_estimate": {"type": "float"},
+                        "damage_property": {"type": "float"},
+                        "damage_crops": {"type": "float"},
                         "injuries": {"type": "integer"},
-                        "fatalities": {"type": "integer"}
+                        "fatalities": {"type": "integer"},
+                        "casualties": {"type": "integer"},
+                        "begin_point": {"type": "geo_point"},
+                        "locations": {
+                            "type": "nested",
+                            "properties": {
+                                "index": {"type": "integer"},
+                                "location": {"type": "keyword"},
+                                "range": {"type": "float"},
+                                "azimuth": {"type": "keyword"},
+                                "point": {"type": "geo_point"}
+                            }
+                        },
+                        "fatality_details": {
+                            "type": "nested",
+                            "properties": {
+                                "fatality_id": {"type": "keyword"},
+                                "type": {"type": "keyword"},
+                                "age": {"type": "integer"},
+                                "sex": {"type": "keyword"},
+                                "location": {"type": "keyword"}
+                            }
+                        }
                     }
                 }
             }
 
-            if not self.es.indices.exists(index="weather_data"):
-                self.es.indices.create(index="weather_data", body=weather_mapping)
+            if not await self.es.indices.exists(index="weather_data"):
+                await self.es.indices.create(index="weather_data", body=weather_mapping)
 
-            if not self.es.indices.exists(index="weather_events"):
-                self.es.indices.create(index="weather_events", body=events_mapping)
+            if not await self.es.indices.exists(index="weather_events"):
+                await self.es.indices.create(index="weather_events", body=events_mapping)
+            return True
 
         except Exception as e:
             logging.error(f"Erreur création indices: {str(e)}")
+            return False
 
     async def index_weather_data(self, data: Dict[str, Any]):
         """Indexe les données météo"""
         if not self.is_connected:
             return False
 
+        await self._ensure_indices()
+
         try:
-            self.es.index(index="weather_data", document=data)
+            await self.es.index(
+                index="weather_data",
+                id=self.weather_document_id(data),
+                document=data
+            )
             return True
         except Exception as e:
             logging.error(f"Erreur indexation données météo: {str(e)}")
             return False
 
+    @staticmethod
+    def weather_document_id(data: Dict[str, Any]) -> str:
+        """Identifiant déterministe station + jour (même clé que l'import Spark)"""
+        timestamp = data.get("timestamp")
+        if isinstance(timestamp, datetime):
+            day = timestamp.strftime("%Y%m%d")
+        else:
+            day = str(timestamp)[:10].replace("-", "")
+        station = data.get("station_id") or data.get("location")
+        return f"{station}-{day}"
+
+    async def bulk_index_weather_data(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Indexe un lot de données météo via l'API _bulk
+
+        Un seul document par station et par jour (weather_document_id, même
+        clé que l'import Spark): si le lot contient plusieurs observations du
+        même jour pour une station, la dernière remplace les précédentes.
+        """
+        if not self.is_connected:
+            return {"indexed": 0, "failed": len(documents), "replaced": 0, "docs_per_second": 0.0}
+
+        await self._ensure_indices()
+
+        return await self._bulk_index("weather_data", documents, self.weather_document_id)
+
+    async def _bulk_index(
+        self,
+        index: str,
+        documents: List[Dict[str, Any]],
+        document_id: Callable[[Dict[str, Any]], str]
+    ) -> Dict[str, Any]:
+        """Requêtes _bulk concurrentes avec renvoi des documents rejetés en 429
+
+        Les documents de même identifiant (document_id) sont dédoublonnés
+        avant l'envoi, le dernier du lot l'emporte comme il l'emporterait
+        dans l'index; leur nombre est retourné dans "replaced".
+        Les lots de ES_BULK_CHUNK_SIZE documents partent au plus
+        ES_BULK_CONCURRENCY à la fois. Les rejets 429 (file d'écriture pleine)
+        sont renvoyés après une attente doublée à chaque tentative; les autres
+        erreurs sont comptées comme des échecs.
+        """
+        pending = {}
+        for doc in documents:
+            doc_id = document_id(doc)
+            pending[doc_id] = {"_index": index, "_id": doc_id, "_source": doc}
+        replaced = len(documents) - len(pending)
+
+        indexed = 0
+        failed = 0
+        backoff = settings.ES_BULK_INITIAL_BACKOFF
+        start = time.monotonic()
+        slots = asyncio.Semaphore(settings.ES_BULK_CONCURRENCY)
+
+        async def send(chunk: List[Dict[str, Any]]) -> List[Tuple[bool, Dict[str, Any]]]:
+            async with slots:
+                return [
+                    (ok, next(iter(item.values())))
+                    async for ok, item in helpers.async_streaming_bulk(
+                        self.es,
+                        chunk,
+                        chunk_size=len(chunk),
+                        raise_on_error=False,
+                        raise_on_exception=False
+                    )
+                ]
+
+        for attempt in range(settings.ES_BULK_MAX_RETRIES + 1):
+            actions = list(pending.values())
+            size = settings.ES_BULK_CHUNK_SIZE
+            chunks = [actions[i:i + size] for i in range(0, len(actions), size)]
+            results = await asyncio.gather(*[send(chunk) for chunk in chunks])
+
+            rejected = {}
+            for ok, result in (pair for chunk in results for pair in chunk):
+                if ok:
+                    indexed += 1
+                elif result.get("status") == 429 and result.get("_id") in pending:
+                    rejected[result["_id"]] = pending[result["_id"]]
+                else:
+                    failed += 1
+                    logging.error(f"Document {result.get('_id')} rejeté: {result.get('error')}")
+
+            if not rejected:
+                break
+            if attempt == settings.ES_BULK_MAX_RETRIES:
+                failed += len(rejected)
+                logging.error(f"{len(rejected)} documents abandonnés après {attempt} renvois (429)")
+                break
+
+            logging.warning(f"ES surchargé (429): renvoi de {len(rejected)} documents dans {backoff:.1f}s")
+            await asyncio.sleep(backoff)
+            backoff *= 2
+            pending = rejected
+
+        elapsed = max(time.monotonic() - start, 1e-6)
+        docs_per_second = indexed / elapsed
+        logging.info(
+            f"Bulk {index}: {indexed} indexés, {failed} échecs, {replaced} remplacés dans le lot "
+            f"en {elapsed:.2f}s ({docs_per_second:.0f} docs/s)"
+        )
+        return {"indexed": indexed, "failed": failed, "replaced": replaced, "docs_per_second": docs_per_second}
+
     async def index_weather_event(self, event: Dict[str, Any]):
         """Indexe un événement météo"""
         if not self.is_connected:
             return False
 
+        await self._ensure_indices()
+
         try:
-            self.es.index(index="weather_events", document=event)
+            await self.es.index(index="weather_events", document=event)
             return True
         except Exception as e:
             logging.error(f"Erreur indexation événement: {str(e)}")
             return False
 
-    async def search_weather_data(
-        self,
+    @staticmethod
+    def encode_cursor(sort_values: List[Any]) -> str:
+        """Curseur opaque: valeurs de tri du dernier document (search_after)"""
+        return base64.urlsafe_b64encode(json.dumps(sort_values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Curseur invalide: {str(e)}")
+        if not isinstance(values, list):
+            raise ValueError("Curseur invalide")
+        return values
+
+    @staticmethod
+    def _weather_data_query(
         location: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         min_temp: Optional[float] = None,
         max_temp: Optional[float] = None
-    ) -> List[Dict[str, Any]]:
-        """Recherche de données météo avec filtres"""
-        if not self.is_connected:
-            return []
-
+    ) -> Dict[str, Any]:
         query = {"bool": {"must": []}}
 
         if location:
@@ -128,31 +303,18 @@ class ElasticsearchService:
                 temp_range["lte"] = max_temp
             query["bool"]["must"].append({"range": {"temperature": temp_range}})
 
-        try:
-            result = self.es.search(
-                index="weather_data",
-                body={
-                    "query": query,
-                    "size": 100,
-                    "sort": [{"timestamp": "desc"}]
-                }
-            )
-            return [hit["_source"] for hit in result["hits"]["hits"]]
-        except Exception as e:
-            logging.error(f"Erreur recherche données: {str(e)}")
-            return []
+        return query
 
-    async def search_weather_events(
-        self,
+    @staticmethod
+    def _events_query(
         event_type: Optional[str] = None,
         location: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
-        """Recherche d'événements météo"""
-        if not self.is_connected:
-            return []
-
+        end_date: Optional[datetime] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: float = 50.0,
+        min_casualties: Optional[int] = None
+    ) -> Dict[str, Any]:
         query = {"bool": {"must": []}}
 
         if event_type:
@@ -169,27 +331,275 @@ class ElasticsearchService:
         if date_range:
             query["bool"]["must"].append({"range": {"date": date_range}})
 
+        if near is not None:
+            lat, lon = near
+            distance = f"{radius_km}km"
+            query["bool"]["must"].append({
+                "bool": {
+                    "should": [
+                        {"geo_distance": {
+                            "distance": distance,
+                            "begin_point": {"lat": lat, "lon": lon}
+                        }},
+                        {"nested": {
+                            "path": "locations",
+                            "query": {"geo_distance": {
+                                "distance": distance,
+                                "locations.point": {"lat": lat, "lon": lon}
+                            }}
+                        }}
+                    ],
+                    "minimum_should_match": 1
+                }
+            })
+
+        if min_casualties is not None:
+            query["bool"]["must"].append({"range": {"casualties": {"gte": min_casualties}}})
+
+        return query
+
+    async def _search_page(
+        self,
+        index: str,
+        query: Dict[str, Any],
+        sort: List[Dict[str, str]],
+        size: int,
+        cursor: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Une page triée et le curseur de la suivante (None si dernière page)
+
+        Le tri se termine par un champ qui rend l'ordre total, ce qui permet
+        un curseur sans état (search_after) réutilisable et cachable. On
+        demande un document de plus que la taille de page pour savoir s'il
+        reste des résultats.
+        """
+        body = {"query": query, "size": size + 1, "sort": sort}
+        if cursor:
+            body["search_after"] = self.decode_cursor(cursor)
+
+        result = await self._search.search(index=index, body=body)
+        hits = result["hits"]["hits"]
+        next_cursor = self.encode_cursor(hits[size - 1]["sort"]) if len(hits) > size else None
+        return [hit["_source"] for hit in hits[:size]], next_cursor
+
+    async def _scan(
+        self,
+        index: str,
+        query: Dict[str, Any],
+        sort: List[Dict[str, str]],
+        page_size: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Parcourt tous les résultats sur un point-in-time, page par page
+
+        Le point-in-time fige l'index pendant le parcours: les pages restent
+        cohérentes même si des documents sont indexés entre-temps. Une seule
+        page est en mémoire à la fois.
+        """
+        keep_alive = settings.ES_PIT_KEEP_ALIVE
+        pit = await self.es.open_point_in_time(index=index, keep_alive=keep_alive)
+        pit_id = pit["id"]
+        search_after = None
         try:
-            result = self.es.search(
+            while True:
+                body = {
+                    "query": query,
+                    "size": page_size,
+                    "sort": sort,
+                    "pit": {"id": pit_id, "keep_alive": keep_alive}
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+
+                result = await self._search.search(body=body)
+                pit_id = result.get("pit_id", pit_id)
+                hits = result["hits"]["hits"]
+                for hit in hits:
+                    yield hit["_source"]
+                if len(hits) < page_size:
+                    break
+                search_after = hits[-1]["sort"]
+        finally:
+            try:
+                await self.es.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logging.warning(f"Point-in-time non fermé: {str(e)}")
+
+    async def search_weather_data(
+        self,
+        location: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_temp: Optional[float] = None,
+        max_temp: Optional[float] = None,
+        size: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Recherche de données météo avec filtres (première page)"""
+        documents, _ = await self.search_weather_data_page(
+            location=location,
+            start_date=start_date,
+            end_date=end_date,
+            min_temp=min_temp,
+            max_temp=max_temp,
+            size=size
+        )
+        return documents
+
+    async def search_weather_data_page(
+        self,
+        location: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_temp: Optional[float] = None,
+        max_temp: Optional[float] = None,
+        size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page de données météo et curseur de la page suivante"""
+        if not self.is_connected:
+            return [], None
+
+        await self._ensure_indices()
+
+        query = self._weather_data_query(location, start_date, end_date, min_temp, max_temp)
+        try:
+            return await self._search_page("weather_data", query, WEATHER_DATA_SORT, size, cursor)
+        except Exception as e:
+            logging.error(f"Erreur recherche données: {str(e)}")
+            return [], None
+
+    async def scan_weather_data(
+        self,
+        location: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        page_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Toutes les données météo de la plage, en flux"""
+        if not self.is_connected:
+            return
+
+        await self._ensure_indices()
+
+        query = self._weather_data_query(location, start_date, end_date)
+        async for document in self._scan("weather_data", query, WEATHER_DATA_SORT, page_size):
+            yield document
+
+    async def search_weather_events(
+        self,
+        event_type: Optional[str] = None,
+        location: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: float = 50.0,
+        min_casualties: Optional[int] = None,
+        size: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Recherche d'événements météo (première page)"""
+        events, _ = await self.search_weather_events_page(
+            event_type=event_type,
+            location=location,
+            start_date=start_date,
+            end_date=end_date,
+            near=near,
+            radius_km=radius_km,
+            min_casualties=min_casualties,
+            size=size
+        )
+        return events
+
+    async def search_weather_events_page(
+        self,
+        event_type: Optional[str] = None,
+        location: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: float = 50.0,
+        min_casualties: Optional[int] = None,
+        size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page d'événements météo et curseur de la page suivante
+
+        ``near`` (latitude, longitude) restreint aux événements ayant débuté
+        ou touché un lieu à moins de ``radius_km``; ``min_casualties`` filtre
+        sur le total blessés + décès calculé à l'import.
+        """
+        if not self.is_connected:
+            return [], None
+
+        await self._ensure_indices()
+
+        query = self._events_query(
+            event_type, location, start_date, end_date, near, radius_km, min_casualties
+        )
+        try:
+            return await self._search_page("weather_events", query, EVENTS_SORT, size, cursor)
+        except Exception as e:
+            logging.error(f"Erreur recherche événements: {str(e)}")
+            return [], None
+
+    async def count_events_by_season(
+        self,
+        location: str,
+        start_year: int,
+        end_year: int
+    ) -> Dict[Tuple[int, str], int]:
+        """Nombre d'événements par (année, saison) en une seule requête
+
+        Un date_histogram mensuel (size 0, aucun document renvoyé) est replié
+        en saisons de l'année civile, comme les rollups Hive.
+        """
+        if not self.is_connected:
+            return {}
+
+        await self._ensure_indices()
+
+        try:
+            result = await self._search.search(
                 index="weather_events",
                 body={
-                    "query": query,
-                    "size": 100,
-                    "sort": [{"date": "desc"}]
+                    "size": 0,
+                    "query": {"bool": {"must": [
+                        {"term": {"location": location}},
+                        {"range": {"date": {
+                            "gte": f"{start_year}-01-01",
+                            "lt": f"{end_year + 1}-01-01"
+                        }}}
+                    ]}},
+                    "aggs": {
+                        "per_month": {
+                            "date_histogram": {
+                                "field": "date",
+                                "calendar_interval": "month",
+                                "format": "yyyy-MM",
+                                "min_doc_count": 1
+                            }
+                        }
+                    }
                 }
             )
-            return [hit["_source"] for hit in result["hits"]["hits"]]
         except Exception as e:
-            logging.error(f"Erreur recherche événements: {str(e)}")
-            return []
+            logging.error(f"Erreur comptage saisonnier: {str(e)}")
+            return {}
+
+        counts: Dict[Tuple[int, str], int] = {}
+        for bucket in result["aggregations"]["per_month"]["buckets"]:
+            year, month = (int(part) for part in bucket["key_as_string"].split("-"))
+            key = (year, SEASON_OF_MONTH[month])
+            counts[key] = counts.get(key, 0) + bucket["doc_count"]
+        return counts
 
     async def get_location_statistics(self, location: str) -> Dict[str, Any]:
         """Obtient des statistiques pour une location"""
         if not self.is_connected:
             return {}
 
+        await self._ensure_indices()
+
         try:
-            result = self.es.search(
+            result = await self._search.search(
                 index="weather_data",
                 body={
                     "query": {"term": {"location": location}},
@@ -1,35 +1,283 @@
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pyhive import hive
 import pandas as pd
+import asyncio
 import logging
+import time
 from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.db.session import HiveConnectionPool
+
+# Statistiques identiques demandées en même temps: une seule requête Hive
+stats_flight = SingleFlight("hive_stats")
+
+# Saisons de l'année civile (hiver = décembre, janvier, février de la même année)
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+SEASON_OF_MONTH = {
+    12: "Winter", 1: "Winter", 2: "Winter",
+    3: "Spring", 4: "Spring", 5: "Spring",
+    6: "Summer", 7: "Summer", 8: "Summer",
+    9: "Fall", 10: "Fall", 11: "Fall"
+}
+
+# Observations écrites par l'API (table gérée par Hive)
+API_OBSERVATIONS_TABLE = "noaa_weather.api_observations"
+
+# Tables externes sur /data/processed (partitions déclarées par l'import Spark)
+EXTERNAL_TABLES = [
+    "noaa_weather.daily_observations",
+    "noaa_weather.monthly_rollup",
+    "noaa_weather.seasonal_rollup"
+]
+
+# Colonnes additives des rollups (fusionnées par somme)
+ROLLUP_SUMS = [
+    "temp_sum", "temp_count", "precip_sum", "precip_count",
+    "wind_sum", "wind_count", "days_count"
+]
+
+# Mêmes mesures que les rollups, calculées sur les observations journalières
+RAW_ROLLUP_SELECT = """
+    SUM(temperature) as temp_sum,
+    COUNT(temperature) as temp_count,
+    MAX(temperature_max) as temperature_max,
+    MIN(temperature_min) as temperature_min,
+    SUM(precipitation) as precip_sum,
+    COUNT(precipitation) as precip_count,
+    SUM(wind_speed) as wind_sum,
+    COUNT(wind_speed) as wind_count,
+    COUNT(*) as days_count
+"""
+
+
+def split_full_months(
+    start: date,
+    end: date
+) -> Tuple[Optional[Tuple[date, date]], List[Tuple[date, date]]]:
+    """Découpe [start, end] en mois complets et bords partiels
+
+    Retourne la plage des mois complets (premier jour, dernier jour) ou None,
+    et les plages partielles, chacune contenue dans un seul mois.
+    """
+    first_full = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    next_day = end + timedelta(days=1)
+    last_full = end if next_day.day == 1 else end.replace(day=1) - timedelta(days=1)
+
+    if first_full <= last_full:
+        edges = []
+        if start < first_full:
+            edges.append((start, first_full - timedelta(days=1)))
+        if end > last_full:
+            edges.append((last_full + timedelta(days=1), end))
+        return (first_full, last_full), edges
+
+    if (start.year, start.month) == (end.year, end.month):
+        return None, [(start, end)]
+    return None, [(start, first_full - timedelta(days=1)), (first_full, end)]
+
+
+def merge_rollups(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionne des rollups partiels (sommes, effectifs, min, max)"""
+    merged = {
+        column: sum(row.get(column) or 0 for row in rows)
+        for column in ROLLUP_SUMS
+    }
+    for column, pick in (("temperature_max", max), ("temperature_min", min)):
+        values = [row[column] for row in rows if row.get(column) is not None]
+        merged[column] = pick(values) if values else None
+    return merged
+
+
+class HiveQuery:
+    """Requête SELECT avec prédicats de partition explicites
+
+    Hive n'élague les partitions que si le filtre porte sur les colonnes de
+    partition elles-mêmes: une plage de dates est donc traduite en prédicats
+    year/month en plus du filtre sur la colonne ``date``.
+    """
+
+    def __init__(self, table: str, select: str, partition_columns: Tuple[str, ...] = ("year", "month")):
+        self.table = table
+        self.select = select
+        self.partition_columns = partition_columns
+        self.conditions: List[str] = []
+        self.params: List[Any] = []
+        self.partition_count: Optional[int] = None
+
+    def where(self, condition: str, *params) -> "HiveQuery":
+        self.conditions.append(condition)
+        self.params.extend(params)
+        return self
+
+    def year(self, year: int) -> "HiveQuery":
+        """Une année entière: 1 partition, ou 12 si la table est aussi partitionnée par mois"""
+        self.partition_count = 12 if "month" in self.partition_columns else 1
+        return self.where("year = %s", year)
+
+    def year_range(self, start_year: int, end_year: int) -> "HiveQuery":
+        """Années entières de start_year à end_year inclus"""
+        years = end_year - start_year + 1
+        self.partition_count = years * 12 if "month" in self.partition_columns else years
+        return self.where("year BETWEEN %s AND %s", start_year, end_year)
+
+    def month_range(self, start: date, end: date) -> "HiveQuery":
+        """Mois de start à end inclus (les jours sont ignorés)"""
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        if "month" not in self.partition_columns:
+            # Seul year est une partition: month reste une colonne ordinaire
+            self.partition_count = end.year - start.year + 1
+            return self.where(
+                "year BETWEEN %s AND %s AND year * 100 + month BETWEEN %s AND %s",
+                start.year, end.year,
+                start.year * 100 + start.month, end.year * 100 + end.month
+            )
+
+        self.partition_count = months
+        if start.year == end.year:
+            return self.where("year = %s AND month BETWEEN %s AND %s", start.year, start.month, end.month)
+
+        # Plage à cheval sur plusieurs années: fin de la première, années
+        # pleines intermédiaires, début de la dernière
+        parts = ["(year = %s AND month >= %s)"]
+        params = [start.year, start.month]
+        if end.year - start.year > 1:
+            parts.append("(year BETWEEN %s AND %s)")
+            params += [start.year + 1, end.year - 1]
+        parts.append("(year = %s AND month <= %s)")
+        params += [end.year, end.month]
+        return self.where("(" + " OR ".join(parts) + ")", *params)
+
+    def date_range(self, start: date, end: date, column: str = "date") -> "HiveQuery":
+        """Plage de jours: prédicats de partition + filtre sur ``column``"""
+        self.month_range(start, end)
+        return self.where(f"{column} BETWEEN %s AND %s", start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+
+    def build(self) -> Tuple[str, List[Any]]:
+        sql = f"SELECT {self.select} FROM {self.table}"
+        if self.conditions:
+            sql += " WHERE " + " AND ".join(self.conditions)
+        return sql, list(self.params)
+
+
+def _ratio(total, count):
+    return total / count if count else None
+
 
 class HadoopService:
+    """Accès Hive: pool de connexions et requêtes exécutées hors boucle asyncio
+
+    Les curseurs pyhive sont bloquants: chaque requête emprunte une connexion
+    du pool et s'exécute dans un thread dédié (autant de threads que de
+    connexions), la boucle d'événements reste libre pendant ce temps.
+    """
+
     def __init__(self):
-        self.hive_connection = None
+        self.pool: Optional[HiveConnectionPool] = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.HIVE_POOL_SIZE,
+            thread_name_prefix="hive"
+        )
         self.is_connected = False
+        # Nouvelle tentative de connexion au plus tôt à _retry_at (monotonic)
+        self._retry_at = 0.0
+        self._backoff = settings.HIVE_RECONNECT_INITIAL_BACKOFF
         self._connect()
 
+    @staticmethod
+    def _new_connection():
+        return hive.Connection(
+            host=settings.HIVE_HOST,
+            port=settings.HIVE_PORT,
+            username=settings.HIVE_USER,
+            database='default',
+            auth='NONE'  # Pour le développement
+        )
+
     def _connect(self):
-        """Établit une connexion à Hive avec fallback"""
+        """Initialise le pool de connexions Hive avec fallback"""
         if not self.is_connected:
+            if self.pool:
+                self.pool.close()
             try:
-                self.hive_connection = hive.Connection(
-                    host=settings.HIVE_HOST,
-                    port=settings.HIVE_PORT,
-                    username=settings.HIVE_USER,
-                    database='default',
-                    auth='NONE'  # Pour le développement
+                self.pool = HiveConnectionPool(
+                    self._new_connection,
+                    size=settings.HIVE_POOL_SIZE,
+                    timeout=settings.HIVE_POOL_TIMEOUT,
+                    health_check_interval=settings.HIVE_HEALTH_CHECK_INTERVAL
                 )
+                # Première connexion: échoue tout de suite si Hive est injoignable
+                with self.pool.connection():
+                    pass
                 self.is_connected = True
                 self._create_tables()
             except Exception as e:
                 logging.warning(f"Hive non disponible - mode fallback activé: {str(e)}")
                 self.is_connected = False
 
+    async def reconnect(self) -> bool:
+        """Reconnecte Hive s'il est déconnecté; retourne is_connected
+
+        Les tentatives sont espacées d'un délai doublé à chaque échec (de
+        HIVE_RECONNECT_INITIAL_BACKOFF à HIVE_RECONNECT_MAX_BACKOFF): entre
+        deux tentatives, l'appel retourne False immédiatement.
+        """
+        if self.is_connected:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._connect)
+        if self.is_connected:
+            logging.info("Connexion Hive rétablie")
+            self._backoff = settings.HIVE_RECONNECT_INITIAL_BACKOFF
+        else:
+            self._retry_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, settings.HIVE_RECONNECT_MAX_BACKOFF)
+        return self.is_connected
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+        self.executor.shutdown(wait=False)
+
+    def _run_sync(self, statements: List[Tuple[str, Any]]):
+        """Exécute des requêtes brutes (DDL, INSERT) sur une connexion du pool"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+            finally:
+                cursor.close()
+
+    def _query_sync(self, queries: List["HiveQuery"]) -> List[Dict[str, Any]]:
+        """Exécute des HiveQuery sur une même connexion et concatène les lignes"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                rows = []
+                for query in queries:
+                    self._execute(cursor, query)
+                    rows += self._fetch_dicts(cursor)
+                return rows
+            finally:
+                cursor.close()
+
+    async def _query(self, *queries: "HiveQuery") -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._query_sync, list(queries))
+
     def _create_tables(self):
-        """Crée les tables Hive nécessaires"""
+        """Crée les tables Hive absentes (CREATE ... IF NOT EXISTS uniquement)
+
+        Les tables existantes ne sont jamais modifiées ici: le passage des
+        anciennes tables gérées aux tables externes et le rattrapage des
+        partitions (MSCK REPAIR) se font une fois, explicitement, avec
+        scripts/migrate_hive_tables.py.
+        """
         if not self.is_connected:
             return
 
@@ -37,8 +285,26 @@ class HadoopService:
             """
             CREATE DATABASE IF NOT EXISTS noaa_weather
             """,
+            f"""
+            CREATE EXTERNAL TABLE IF NOT EXISTS noaa_weather.daily_observations (
+                station_id STRING,
+                date DATE,
+                temperature FLOAT,
+                temperature_max FLOAT,
+                temperature_min FLOAT,
+                precipitation FLOAT,
+                snow_depth FLOAT,
+                wind_speed FLOAT,
+                wind_direction INT
+            )
+            PARTITIONED BY (year INT, month INT)
+            STORED AS PARQUET
+            LOCATION '{settings.DAILY_OBSERVATIONS_PATH}'
+            """,
+            # Écritures de l'API: table gérée, hors du répertoire que l'import
+            # Spark réécrit partition par partition
             """
-            CREATE TABLE IF NOT EXISTS noaa_weather.daily_observations (
+            CREATE TABLE IF NOT EXISTS noaa_weather.api_observations (
                 station_id STRING,
                 date DATE,
                 temperature FLOAT,
@@ -66,52 +332,108 @@ class HadoopService:
             )
             PARTITIONED BY (year INT)
             STORED AS PARQUET
+            """,
+            f"""
+            CREATE EXTERNAL TABLE IF NOT EXISTS noaa_weather.monthly_rollup (
+                station_id STRING,
+                month INT,
+                temp_sum DOUBLE,
+                temp_count BIGINT,
+                temperature_max FLOAT,
+                temperature_min FLOAT,
+                precip_sum DOUBLE,
+                precip_count BIGINT,
+                wind_sum DOUBLE,
+                wind_count BIGINT,
+                days_count BIGINT
+            )
+            PARTITIONED BY (year INT)
+            STORED AS PARQUET
+            LOCATION '{settings.ROLLUPS_PATH}/monthly'
+            """,
+            f"""
+            CREATE EXTERNAL TABLE IF NOT EXISTS noaa_weather.seasonal_rollup (
+                station_id STRING,
+                season STRING,
+                temp_sum DOUBLE,
+                temp_count BIGINT,
+                temperature_max FLOAT,
+                temperature_min FLOAT,
+                precip_sum DOUBLE,
+                precip_count BIGINT,
+                wind_sum DOUBLE,
+                wind_count BIGINT,
+                days_count BIGINT
+            )
+            PARTITIONED BY (year INT)
+            STORED AS PARQUET
+            LOCATION '{settings.ROLLUPS_PATH}/seasonal'
             """
         ]
 
         try:
-            cursor = self.hive_connection.cursor()
-            for query in queries:
-                cursor.execute(query)
+            self._run_sync([(query, None) for query in queries])
         except Exception as e:
             logging.error(f"Erreur création tables: {str(e)}")
-        finally:
-            cursor.close()
 
     async def save_weather_data(self, data: Dict[str, Any]):
         """Sauvegarde des données météo dans Hive"""
+        return not await self.save_weather_batch([data])
+
+    async def save_weather_batch(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insère un lot d'observations, un INSERT multi-lignes par partition
+
+        Chaque partition year/month reçoit un seul fichier par lot au lieu
+        d'un fichier par observation. Les lignes vont dans api_observations:
+        daily_observations pointe sur DAILY_OBSERVATIONS_PATH, dont l'import
+        Spark réécrit chaque partition importée, ce qui effacerait les lignes
+        insérées par l'API. Retourne les lignes des partitions en
+        échec (toutes si Hive est indisponible) pour qu'elles soient
+        renvoyées plus tard.
+        """
         if not self.is_connected:
-            return False
+            return rows
 
-        try:
-            cursor = self.hive_connection.cursor()
-            date = datetime.strptime(data["date"], "%Y-%m-%d")
+        partitions: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for row in rows:
+            day = datetime.strptime(str(row["date"])[:10], "%Y-%m-%d")
+            partitions.setdefault((day.year, day.month), []).append(row)
 
-            insert_query = """
-            INSERT INTO TABLE noaa_weather.daily_observations
+        loop = asyncio.get_running_loop()
+        failed = []
+        for (year, month), partition_rows in partitions.items():
+            values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(partition_rows))
+            insert_query = f"""
+            INSERT INTO TABLE {API_OBSERVATIONS_TABLE}
             PARTITION (year=%s, month=%s)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES {values}
             """
 
-            cursor.execute(insert_query, (
-                date.year,
-                date.month,
-                data["station_id"],
-                data["date"],
-                data["temperature"],
-                data.get("temperature_max", data["temperature"]),
-                data.get("temperature_min", data["temperature"]),
-                data.get("precipitation", 0.0),
-                data.get("snow_depth", 0.0),
-                data.get("wind_speed", 0.0),
-                data.get("wind_direction", 0)
-            ))
-            return True
-        except Exception as e:
-            logging.error(f"Erreur sauvegarde données: {str(e)}")
-            return False
-        finally:
-            cursor.close()
+            params = [year, month]
+            for row in partition_rows:
+                params += [
+                    row["station_id"],
+                    str(row["date"])[:10],
+                    row["temperature"],
+                    row.get("temperature_max", row["temperature"]),
+                    row.get("temperature_min", row["temperature"]),
+                    row.get("precipitation", 0.0),
+                    row.get("snow_depth", 0.0),
+                    row.get("wind_speed", 0.0),
+                    row.get("wind_direction", 0)
+                ]
+            try:
+                await loop.run_in_executor(
+                    self.executor, self._run_sync, [(insert_query, tuple(params))]
+                )
+            except Exception as e:
+                logging.error(f"Erreur sauvegarde partition {year}-{month:02d}: {str(e)}")
+                failed += partition_rows
+        if failed and len(failed) == len(rows):
+            # Aucune partition écrite: Hive ne répond plus, reconnect() prendra le relais
+            logging.warning("Hive ne répond plus - mode fallback activé")
+            self.is_connected = False
+        return failed
 
     async def get_weather_stats(
         self,
@@ -119,87 +441,143 @@ class HadoopService:
         end_date: datetime,
         location: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Récupère des statistiques météo de Hive"""
+        """Récupère des statistiques météo de Hive
+
+        Les mois entièrement couverts sont lus dans monthly_rollup; seuls les
+        mois partiels des bords de la plage sont agrégés depuis
+        daily_observations, puis le tout est fusionné. Les appels concurrents
+        identiques partagent la même requête.
+        """
         if not self.is_connected:
             return {}
 
-        query = """
-        SELECT
-            AVG(temperature) as avg_temp,
-            MAX(temperature_max) as max_temp,
-            MIN(temperature_min) as min_temp,
-            SUM(precipitation) as total_precip,
-            AVG(wind_speed) as avg_wind
-        FROM noaa_weather.daily_observations
-        WHERE date BETWEEN %s AND %s
-        """
+        key = (start_date.date(), end_date.date(), location)
+        return await stats_flight.do(
+            key, lambda: self._get_weather_stats(start_date, end_date, location)
+        )
 
-        if location:
-            query += " AND station_id = %s"
+    async def _get_weather_stats(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        location: Optional[str]
+    ) -> Dict[str, Any]:
+        full_months, edges = split_full_months(start_date.date(), end_date.date())
 
         try:
-            cursor = self.hive_connection.cursor()
-            params = [start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")]
-            if location:
-                params.append(location)
+            queries = []
+            if full_months:
+                queries.append(
+                    HiveQuery(
+                        "noaa_weather.monthly_rollup",
+                        f"{', '.join(ROLLUP_SUMS)}, temperature_max, temperature_min",
+                        partition_columns=("year",)
+                    ).month_range(*full_months)
+                )
+            for edge_start, edge_end in edges:
+                queries.append(
+                    HiveQuery("noaa_weather.daily_observations", RAW_ROLLUP_SELECT)
+                    .date_range(edge_start, edge_end)
+                )
 
-            cursor.execute(query, params)
-            result = cursor.fetchone()
+            if location:
+                for query in queries:
+                    query.where("station_id = %s", location)
 
+            merged = merge_rollups(await self._query(*queries))
             return {
-                "average_temperature": result[0],
-                "maximum_temperature": result[1],
-                "minimum_temperature": result[2],
-                "total_precipitation": result[3],
-                "average_wind_speed": result[4]
+                "average_temperature": _ratio(merged["temp_sum"], merged["temp_count"]),
+                "maximum_temperature": merged["temperature_max"],
+                "minimum_temperature": merged["temperature_min"],
+                "total_precipitation": merged["precip_sum"] if merged["precip_count"] else None,
+                "average_wind_speed": _ratio(merged["wind_sum"], merged["wind_count"])
             }
         except Exception as e:
             logging.error(f"Erreur récupération stats: {str(e)}")
             return {}
-        finally:
-            cursor.close()
+
+    async def get_monthly_series(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        location: str
+    ) -> List[Dict[str, Any]]:
+        """Une ligne par mois touché par la plage (rollup mensuel, mois récents d'abord)
+
+        Les mois des bords sont pris en entier: cette série sert aux longues
+        plages, où un point par mois suffit.
+        """
+        if not self.is_connected:
+            return []
+
+        query = HiveQuery(
+            "noaa_weather.monthly_rollup",
+            f"year, month, {', '.join(ROLLUP_SUMS)}, temperature_max, temperature_min",
+            partition_columns=("year",)
+        ).month_range(start_date.date(), end_date.date()).where("station_id = %s", location)
+
+        try:
+            rows = await self._query(query)
+            return sorted(rows, key=lambda row: (row["year"], row["month"]), reverse=True)
+        except Exception as e:
+            logging.error(f"Erreur série mensuelle: {str(e)}")
+            return []
 
     async def get_seasonal_analysis(
         self,
         location: str,
         year: int
     ) -> List[Dict[str, Any]]:
-        """Analyse saisonnière des données météo"""
+        """Analyse saisonnière des données météo (lue dans seasonal_rollup)"""
+        rows = await self.get_seasonal_analysis_range(location, year, year)
+        for row in rows:
+            row.pop("year", None)
+        return rows
+
+    async def get_seasonal_analysis_range(
+        self,
+        location: str,
+        start_year: int,
+        end_year: int
+    ) -> List[Dict[str, Any]]:
+        """Analyse saisonnière sur plusieurs années en une seule requête
+
+        Une ligne par (année, saison), triées par année puis saison.
+        """
         if not self.is_connected:
             return []
 
-        query = """
-        SELECT
-            CASE
-                WHEN month IN (12,1,2) THEN 'Winter'
-                WHEN month IN (3,4,5) THEN 'Spring'
-                WHEN month IN (6,7,8) THEN 'Summer'
-                ELSE 'Fall'
-            END as season,
-            AVG(temperature) as avg_temp,
-            AVG(precipitation) as avg_precip,
-            MAX(temperature_max) as max_temp,
-            MIN(temperature_min) as min_temp,
-            COUNT(*) as days_count
-        FROM noaa_weather.daily_observations
-        WHERE year = %s AND station_id = %s
-        GROUP BY
-            CASE
-                WHEN month IN (12,1,2) THEN 'Winter'
-                WHEN month IN (3,4,5) THEN 'Spring'
-                WHEN month IN (6,7,8) THEN 'Summer'
-                ELSE 'Fall'
-            END
-        """
+        query = HiveQuery(
+            "noaa_weather.seasonal_rollup",
+            """
+            year,
+            season,
+            temp_sum / temp_count as avg_temp,
+            precip_sum / precip_count as avg_precip,
+            temperature_max as max_temp,
+            temperature_min as min_temp,
+            days_count
+            """,
+            partition_columns=("year",)
+        ).year_range(start_year, end_year).where("station_id = %s", location)
 
         try:
-            cursor = self.hive_connection.cursor()
-            cursor.execute(query, (year, location))
-            columns = [desc[0] for desc in cursor.description]
-
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            rows = await self._query(query)
+            return sorted(rows, key=lambda row: (row["year"], SEASONS.index(row["season"])))
         except Exception as e:
             logging.error(f"Erreur analyse saisonnière: {str(e)}")
             return []
-        finally:
-            cursor.close()
+
+    @staticmethod
+    def _execute(cursor, query: HiveQuery):
+        """Exécute la requête; SQL et nombre de partitions lues en debug"""
+        sql, params = query.build()
+        partitions = query.partition_count if query.partition_count is not None else "toutes"
+        logging.debug(f"Hive {query.table} ({partitions} partitions): {' '.join(sql.split())} {params}")
+        cursor.execute(sql, params)
+
+    @staticmethod
+    def _fetch_dicts(cursor) -> List[Dict[str, Any]]:
+        """Lignes du curseur sous forme de dictionnaires (alias sans préfixe de table)"""
+        columns = [desc[0].split(".")[-1] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import asyncio
+import logging
+import os
+import time
+from app.core import metrics
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.schemas.weather import WeatherCreate
+
+
+class BufferFull(Exception):
+    """Le tampon d'écriture a atteint INGEST_MAX_PENDING observations"""
+
+
+class IngestBuffer:
+    """Tampon d'écriture: regroupe les observations en lots Hive et Elasticsearch
+
+    Le tampon est vidé dès que INGEST_BATCH_SIZE observations attendent, ou
+    toutes les INGEST_FLUSH_INTERVAL secondes. Chaque vidage indexe les
+    nouvelles observations dans Elasticsearch (requêtes _bulk, une seule
+    tentative) indépendamment de Hive, puis produit un INSERT multi-lignes
+    par partition Hive. Ce que Hive n'a pas pu écrire (Hive injoignable,
+    partitions en échec, reliquat de l'arrêt) est déposé dans
+    INGEST_SPILL_PATH plutôt que gardé en mémoire: le tampon ne se remplit
+    donc pas pendant une panne de Hive. Tant que Hive est joignable, chaque
+    vidage complète son lot avec le début du dépôt, jusqu'à
+    INGEST_BATCH_SIZE observations.
+    """
+
+    def __init__(self, hadoop_service, es_service):
+        self.hadoop_service = hadoop_service
+        self.es_service = es_service
+        self.spill_path = Path(settings.INGEST_SPILL_PATH)
+        # Observations à écrire dans Hive / pas encore envoyées à Elasticsearch
+        self._pending: List[WeatherCreate] = []
+        self._unindexed: List[WeatherCreate] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional["asyncio.Task[None]"] = None
+        self.flush_latency = metrics.Histogram()
+        self.counters = {
+            "accepted": 0, "hive_written": 0, "es_indexed": 0,
+            "es_failed": 0, "spilled": 0, "reloaded": 0
+        }
+        metrics.register(self.samples)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Démarre le vidage périodique, qui reprend aussi le dépôt sur disque
+
+        Appelé au démarrage de l'application (il faut une boucle active), à
+        défaut lors du premier ajout.
+        """
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Erreur vidage périodique: {str(e)}")
+
+    async def add(self, observations: List[WeatherCreate]) -> int:
+        """Ajoute des observations; vide le tampon si le lot est complet"""
+        self.start()
+        if len(self._pending) + len(observations) > settings.INGEST_MAX_PENDING:
+            raise BufferFull(f"{len(self._pending)} observations en attente")
+
+        self._pending.extend(observations)
+        self._unindexed.extend(observations)
+        self.counters["accepted"] += len(observations)
+        if len(self._pending) >= settings.INGEST_BATCH_SIZE:
+            await self.flush()
+        return len(self._pending)
+
+    async def flush(self) -> Dict[str, Any]:
+        """Écrit le contenu du tampon (un seul vidage à la fois)"""
+        async with self._flush_lock:
+            result = {"hive_written": 0, "es_indexed": 0, "spilled": 0}
+            if not self._pending and not self.spill_path.exists():
+                return result
+
+            start = time.monotonic()
+            result["es_indexed"] = await self._index(self._unindexed)
+            self._unindexed = []
+
+            # Hive injoignable (nouvelle tentative espacée par HadoopService)
+            if not await self.hadoop_service.reconnect():
+                result["spilled"] = self._spill()
+                return result
+
+            self._load_spill(settings.INGEST_BATCH_SIZE - len(self._pending))
+            batch, self._pending = self._pending, []
+            if not batch:
+                return result
+
+            hive_rows = [self._hive_row(observation) for observation in batch]
+            rows = {id(row): observation for row, observation in zip(hive_rows, batch)}
+            failed = [rows[id(row)] for row in await self.hadoop_service.save_weather_batch(hive_rows)]
+            failed_ids = {id(observation) for observation in failed}
+            written = [observation for observation in batch if id(observation) not in failed_ids]
+
+            result["hive_written"] = len(written)
+            self.counters["hive_written"] += len(written)
+            # Partitions en échec: déposées sur disque, reprises aux vidages suivants
+            self._pending = failed + self._pending
+            if failed:
+                result["spilled"] = self._spill()
+
+            # Les résultats en cache de ces stations sont désormais périmés
+            for station in {self._station(observation) for observation in written}:
+                result_cache.invalidate_station(station)
+
+            elapsed = time.monotonic() - start
+            self.flush_latency.observe(elapsed)
+            logging.info(
+                f"Vidage de {len(batch)} observations en {elapsed:.2f}s "
+                f"({len(written)} écrites dans Hive, {len(failed)} déposées sur disque)"
+            )
+            return result
+
+    async def _index(self, observations: List[WeatherCreate]) -> int:
+        """Indexe les observations dans Elasticsearch; retourne le nombre indexé"""
+        if not observations:
+            return 0
+        if not self.es_service.is_connected:
+            self.counters["es_failed"] += len(observations)
+            return 0
+        try:
+            result = await self.es_service.bulk_index_weather_data(
+                [observation.model_dump() | {"station_id": self._station(observation)} for observation in observations]
+            )
+        except Exception as e:
+            # Index de recherche seulement: Hive reste la référence
+            logging.error(f"Erreur indexation bulk: {str(e)}")
+            self.counters["es_failed"] += len(observations)
+            return 0
+        self.counters["es_indexed"] += result["indexed"]
+        self.counters["es_failed"] += result["failed"]
+        return result["indexed"]
+
+    async def close(self):
+        """Dernier vidage à l'arrêt; le reliquat est déposé sur disque"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.error(f"Erreur vidage à l'arrêt: {str(e)}")
+        self._spill()
+
+    def _spill(self) -> int:
+        """Dépose les observations en attente à la fin du dépôt; retourne leur nombre"""
+        if not self._pending:
+            return 0
+        count = len(self._pending)
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as spill:
+                for observation in self._pending:
+                    spill.write(observation.model_dump_json() + "\n")
+        except Exception as e:
+            # Gardées en mémoire: nouvel essai au prochain vidage
+            logging.error(f"Dépôt de {count} observations dans {self.spill_path} impossible: {str(e)}")
+            return 0
+        self._pending = []
+        self.counters["spilled"] += count
+        logging.warning(f"{count} observations non écrites dans Hive déposées dans {self.spill_path}")
+        return count
+
+    def _load_spill(self, room: int):
+        """Reprend au plus ``room`` observations du début du dépôt, le reste y demeure"""
+        if room <= 0 or not self.spill_path.exists():
+            return
+        observations: List[WeatherCreate] = []
+        remaining = 0
+        tmp_path = self.spill_path.with_name(self.spill_path.name + ".tmp")
+        try:
+            with self.spill_path.open(encoding="utf-8") as spill, tmp_path.open("w", encoding="utf-8") as rest:
+                for line in spill:
+                    if not line.strip():
+                        continue
+                    if len(observations) < room:
+                        observations.append(WeatherCreate.model_validate_json(line))
+                    else:
+                        rest.write(line)
+                        remaining += 1
+            if remaining:
+                os.replace(tmp_path, self.spill_path)
+            else:
+                tmp_path.unlink()
+                self.spill_path.unlink()
+            # Déjà indexées dans Elasticsearch lors de leur premier vidage
+            self._pending = observations + self._pending
+            self.counters["reloaded"] += len(observations)
+            logging.info(
+                f"{len(observations)} observations reprises depuis {self.spill_path}"
+                f" ({remaining} restent en attente sur disque)"
+            )
+        except Exception as e:
+            logging.error(f"Lecture de {self.spill_path} impossible: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @staticmethod
+    def _station(observation: WeatherCreate) -> str:
+        return observation.station_id or observation.location
+
+    def _hive_row(self, observation: WeatherCreate) -> Dict[str, Any]:
+        return {
+            "station_id": self._station(observation),
+            "date": observation.timestamp.date(),
+            "temperature": observation.temperature,
+            "precipitation": observation.precipitation,
+            "wind_speed": observation.wind_speed,
+            "wind_direction": observation.wind_direction
+        }
+
+    def samples(self) -> List[metrics.Sample]:
+        return [
+            ("noaa_ingest_records_total", "counter", "Observations par étape d'écriture", {"stage": stage}, count)
+            for stage, count in self.counters.items()
+        ] + [
+            ("noaa_ingest_pending", "gauge", "Observations en attente dans le tampon", {}, len(self._pending))
+        ] + self.flush_latency.samples("noaa_ingest_flush_seconds", "Durée des vidages du tampon", {})
@@ -0,0 +1,268 @@
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pandas as pd
+import pyarrow.dataset as ds
+import asyncio
+import logging
+from app.core.config import settings
+
+DAILY_COLUMNS = [
+    "station_id", "date", "temperature", "temperature_max", "temperature_min",
+    "precipitation", "wind_speed", "wind_direction"
+]
+
+
+def partition_filter(start: date, end: date):
+    """Prédicat year/month couvrant [start, end], évalué sur les chemins de partition"""
+    expression = None
+    for year in range(start.year, end.year + 1):
+        first = start.month if year == start.year else 1
+        last = end.month if year == end.year else 12
+        current = (
+            (ds.field("year") == year)
+            & (ds.field("month") >= first)
+            & (ds.field("month") <= last)
+        )
+        expression = current if expression is None else expression | current
+    return expression
+
+
+class ParquetService:
+    """Lecture directe des Parquet écrits par l'import Spark (/data/processed)
+
+    Source de dernier recours quand Hive et Elasticsearch sont indisponibles:
+    seules les partitions year/month de la plage sont ouvertes et seules les
+    colonnes utiles sont lues.
+    """
+
+    def __init__(self):
+        self.daily_path = Path(settings.DAILY_OBSERVATIONS_PATH)
+        self.sketches_path = Path(settings.SKETCHES_PATH)
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.PARQUET_WORKERS,
+            thread_name_prefix="parquet"
+        )
+
+    @property
+    def is_available(self) -> bool:
+        return self.daily_path.exists()
+
+    def _scanner(
+        self,
+        start: date,
+        end: date,
+        location: Optional[str],
+        columns: List[str],
+        batch_size: int = 131072,
+        dataset=None
+    ):
+        if dataset is None:
+            dataset = ds.dataset(self.daily_path, format="parquet", partitioning="hive")
+        expression = (
+            partition_filter(start, end)
+            & (ds.field("date") >= start)
+            & (ds.field("date") <= end)
+        )
+        if location:
+            expression = expression & (ds.field("station_id") == location)
+        return dataset.scanner(columns=columns, filter=expression, batch_size=batch_size)
+
+    def _read_daily(
+        self,
+        start: date,
+        end: date,
+        location: Optional[str],
+        columns: List[str]
+    ):
+        return self._scanner(start, end, location, columns).to_table().to_pandas()
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def read_daily_frame(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        columns: List[str]
+    ) -> pd.DataFrame:
+        """Colonnes demandées d'une station sur la plage (DataFrame vide si absent)
+
+        Seules les colonnes demandées sont lues et les filtres partition,
+        date et station sont évalués par pyarrow.
+        """
+        if not self.is_available:
+            return pd.DataFrame(columns=columns)
+        return await self._run(
+            self._read_daily, start_date.date(), end_date.date(), location, columns
+        )
+
+    async def iter_daily_years(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        columns: List[str]
+    ) -> AsyncIterator[pd.DataFrame]:
+        """Observations d'une station année par année, triées par date
+
+        Ordre chronologique garanti (contrairement aux lots Arrow) avec une
+        seule année en mémoire; la découverte des fichiers n'est faite qu'une fois.
+        """
+        if not self.is_available:
+            return
+
+        dataset = await self._run(
+            lambda: ds.dataset(self.daily_path, format="parquet", partitioning="hive")
+        )
+        for year in range(start_date.year, end_date.year + 1):
+            first = max(start_date.date(), date(year, 1, 1))
+            last = min(end_date.date(), date(year, 12, 31))
+            df = await self._run(
+                lambda: self._scanner(first, last, location, columns, dataset=dataset).to_table().to_pandas()
+            )
+            if not df.empty:
+                yield df.sort_values("date")
+
+    def _read_daily_page(self, start: date, end: date, location: str, size: int) -> pd.DataFrame:
+        """Les ``size + 1`` observations les plus récentes de [start, end]
+
+        Les années sont lues en remontant depuis ``end`` et la lecture s'arrête
+        dès que la page est pleine: le coût d'une page ne dépend pas de la
+        longueur de la plage.
+        """
+        dataset = ds.dataset(self.daily_path, format="parquet", partitioning="hive")
+        frames, count = [], 0
+        for year in range(end.year, start.year - 1, -1):
+            first, last = max(start, date(year, 1, 1)), min(end, date(year, 12, 31))
+            df = self._scanner(first, last, location, DAILY_COLUMNS, dataset=dataset).to_table().to_pandas()
+            frames.append(df)
+            count += len(df)
+            if count > size:
+                break
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DAILY_COLUMNS)
+        return df.sort_values("date", ascending=False).head(size + 1)
+
+    async def get_daily_observations_page(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        size: int,
+        before: Optional[date] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[date]]:
+        """Page d'observations journalières, les plus récentes d'abord
+
+        ``before`` est la date du dernier enregistrement de la page
+        précédente (une observation par station et par jour); la date à
+        passer pour la page suivante est retournée, None en fin de plage.
+        """
+        if not self.is_available:
+            return [], None
+
+        end = end_date.date()
+        if before is not None:
+            end = min(end, before - timedelta(days=1))
+        if end < start_date.date():
+            return [], None
+        try:
+            df = await self._run(self._read_daily_page, start_date.date(), end, location, size)
+        except Exception as e:
+            logging.error(f"Erreur lecture Parquet: {str(e)}")
+            return [], None
+
+        rows = df.astype(object).where(df.notna(), None).to_dict("records")
+        if len(rows) <= size:
+            return rows, None
+        return rows[:size], pd.Timestamp(rows[size - 1]["date"]).date()
+
+    async def iter_daily_observations(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Observations journalières en flux, un lot Arrow à la fois (ordre des fichiers)"""
+        if not self.is_available:
+            return
+
+        batches = iter(
+            self._scanner(start_date.date(), end_date.date(), location, DAILY_COLUMNS, batch_size)
+            .to_batches()
+        )
+        while True:
+            batch = await self._run(next, batches, None)
+            if batch is None:
+                break
+            for row in batch.to_pylist():
+                yield row
+
+    def _read_sketches(
+        self,
+        location: str,
+        measure: str,
+        start_year: int,
+        end_year: int,
+        months: Optional[List[int]]
+    ) -> List[Dict[str, Any]]:
+        dataset = ds.dataset(self.sketches_path, format="parquet", partitioning="hive")
+        expression = (
+            (ds.field("year") >= start_year)
+            & (ds.field("year") <= end_year)
+            & (ds.field("station_id") == location)
+            & (ds.field("measure") == measure)
+        )
+        if months:
+            expression = expression & ds.field("month").isin(months)
+        return dataset.to_table(columns=["items", "levels"], filter=expression).to_pylist()
+
+    async def get_sketches(
+        self,
+        location: str,
+        measure: str,
+        start_year: int,
+        end_year: int,
+        months: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Sketches KLL sérialisés (items, levels) d'une station sur la période"""
+        if not self.sketches_path.exists():
+            return []
+        return await self._run(
+            self._read_sketches, location, measure, start_year, end_year, months
+        )
+
+    async def get_weather_stats(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Mêmes statistiques que HadoopService.get_weather_stats"""
+        if not self.is_available:
+            return {}
+
+        columns = ["temperature", "temperature_max", "temperature_min", "precipitation", "wind_speed"]
+        try:
+            df = await self._run(
+                self._read_daily, start_date.date(), end_date.date(), location, columns
+            )
+            if df.empty:
+                return {}
+
+            def scalar(value):
+                return None if value != value else float(value)  # NaN -> None
+
+            return {
+                "average_temperature": scalar(df["temperature"].mean()),
+                "maximum_temperature": scalar(df["temperature_max"].max()),
+                "minimum_temperature": scalar(df["temperature_min"].min()),
+                "total_precipitation": scalar(df["precipitation"].sum(min_count=1)),
+                "average_wind_speed": scalar(df["wind_speed"].mean())
+            }
+        except Exception as e:
+            logging.error(f"Erreur statistiques Parquet: {str(e)}")
+            return {}
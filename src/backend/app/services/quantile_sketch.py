@@ -0,0 +1,108 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+import math
+import random
+import numpy as np
+
+
+class KLLSketch:
+    """Sketch de quantiles KLL fusionnable (Karnin, Lang, Liberty 2016)
+
+    Le niveau h contient des éléments de poids 2^h. Quand le sketch dépasse
+    sa capacité, le premier niveau trop plein est trié et un élément sur deux
+    (décalage aléatoire) monte au niveau suivant. Les capacités décroissent
+    géométriquement (facteur 2/3) vers les niveaux bas: la taille reste en
+    O(k) quel que soit le nombre de valeurs fusionnées.
+
+    Format sérialisé (sketches écrits par l'import Spark): ``items``, les
+    valeurs de chaque niveau mises bout à bout, et ``levels``, le début de
+    chaque niveau dans ``items`` suivi de la fin.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self.compacted = False
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_serialized(cls, items: Sequence[float], levels: Sequence[int], k: int = 200) -> "KLLSketch":
+        return cls.merged([(items, levels)], k)
+
+    @classmethod
+    def merged(cls, serialized: Iterable[Tuple[Sequence[float], Sequence[int]]], k: int = 200) -> "KLLSketch":
+        """Fusion de sketches sérialisés, compressée une seule fois à la fin"""
+        sketch = cls(k)
+        for items, levels in serialized:
+            for h in range(len(levels) - 1):
+                if h == len(sketch.levels):
+                    sketch.levels.append([])
+                level = items[levels[h]:levels[h + 1]]
+                sketch.levels[h].extend(level)
+                sketch.n += len(level) << h
+        sketch.compacted = any(sketch.levels[1:])
+        sketch._compress()
+        return sketch
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() > self._max_size():
+            for h, level in enumerate(self.levels):
+                if len(level) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    level.sort()
+                    # Nombre impair: le dernier élément reste au niveau h
+                    kept = level[-1:] if len(level) % 2 else []
+                    pairs = level[:len(level) - len(kept)]
+                    offset = self._random.randint(0, 1)
+                    self.levels[h + 1].extend(pairs[offset::2])
+                    self.levels[h] = kept
+                    self.compacted = True
+                    break
+
+    def update(self, value: float):
+        self.levels[0].append(value)
+        self.n += 1
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.n += other.n
+        self.compacted = self.compacted or other.compacted
+        self._compress()
+
+    @property
+    def rank_error(self) -> float:
+        """Erreur de rang normalisée (99 % de confiance), 0 si le sketch est exact
+
+        Ajustement empirique d'Apache DataSketches pour une requête de rang
+        ou de quantile isolée: 2.296 / k^0.9723 (1.33 % pour k = 200).
+        """
+        return 2.296 / self.k ** 0.9723 if self.compacted else 0.0
+
+    def quantiles(self, ranks: Sequence[float]) -> List[Optional[float]]:
+        """Valeurs aux rangs normalisés demandés (0 = minimum, 1 = maximum)"""
+        if self.n == 0:
+            return [None] * len(ranks)
+        items = np.concatenate([np.asarray(level, dtype=float) for level in self.levels])
+        weights = np.concatenate([
+            np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        targets = np.clip(np.asarray(ranks, dtype=float), 0.0, 1.0) * cumulative[-1]
+        positions = np.searchsorted(cumulative, np.maximum(targets, 1), side="left")
+        return items[np.minimum(positions, len(items) - 1)].tolist()
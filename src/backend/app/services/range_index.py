@@ -0,0 +1,119 @@
+from typing import Any, Dict, Optional, Tuple
+from datetime import date, datetime
+from pathlib import Path
+import json
+import logging
+import threading
+import numpy as np
+from app.core.config import settings
+
+
+def _ratio(total: float, count: int) -> Optional[float]:
+    return float(total) / int(count) if count else None
+
+
+class RangeIndex:
+    """Lecture de l'index de plages écrit par build_range_index.py
+
+    Par station: sommes cumulées par jour (``{station}.prefix.npy``) et arbre
+    de segments des extrêmes (``{station}.extremes.npy``), projetés en mémoire.
+    Moyennes et cumuls d'une plage se lisent en O(1), les extrêmes en
+    O(log n), quelle que soit la longueur de la plage. Le manifeste est relu
+    dès qu'il change (reconstruction incrémentale de l'index).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.RANGE_INDEX_PATH)
+        self.manifest_path = self.path / "index.json"
+        self._manifest_mtime: Optional[float] = None
+        self._stations: Dict[str, Dict[str, Any]] = {}
+        self._arrays: Dict[str, Tuple[date, np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = self.manifest_path.stat().st_mtime
+        except OSError:
+            self._stations, self._arrays, self._manifest_mtime = {}, {}, None
+            return
+        if mtime == self._manifest_mtime:
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self._stations = json.load(f).get("stations", {})
+            self._arrays = {}
+            self._manifest_mtime = mtime
+        except (OSError, ValueError) as e:
+            logging.warning(f"Manifeste de l'index de plages illisible: {str(e)}")
+
+    def _station(self, station: str) -> Optional[Tuple[date, np.ndarray, np.ndarray]]:
+        with self._lock:
+            self._refresh()
+            arrays = self._arrays.get(station)
+            entry = self._stations.get(station)
+            if arrays is not None or entry is None:
+                return arrays
+            try:
+                prefix = np.load(self.path / f"{station}.prefix.npy", mmap_mode="r")
+                tree = np.load(self.path / f"{station}.extremes.npy", mmap_mode="r")
+            except OSError as e:
+                logging.warning(f"Index de plages de {station} illisible: {str(e)}")
+                return None
+            # Fichiers réécrits entre-temps: le manifeste suivant les décrira
+            if len(prefix) - 1 != entry["days"] or len(tree) != 2 * entry["days"]:
+                return None
+            arrays = (date.fromisoformat(entry["start"]), prefix, tree)
+            self._arrays[station] = arrays
+            return arrays
+
+    def has_station(self, station: Optional[str]) -> bool:
+        return bool(station) and self._station(station) is not None
+
+    @staticmethod
+    def _extremes(tree: np.ndarray, lo: int, hi: int) -> Tuple[float, float]:
+        """Max et min sur les jours [lo, hi) (arbre de segments itératif)"""
+        n = len(tree) // 2
+        lo, hi = lo + n, hi + n
+        maximum, minimum = np.nan, np.nan
+        while lo < hi:
+            if lo & 1:
+                maximum = np.fmax(maximum, tree["max"][lo])
+                minimum = np.fmin(minimum, tree["min"][lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                maximum = np.fmax(maximum, tree["max"][hi])
+                minimum = np.fmin(minimum, tree["min"][hi])
+            lo >>= 1
+            hi >>= 1
+        return maximum, minimum
+
+    def get_weather_stats(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, Any]:
+        """Mêmes statistiques que HadoopService.get_weather_stats, sans lire les données"""
+        arrays = self._station(location)
+        if arrays is None:
+            return {}
+
+        start, prefix, tree = arrays
+        days = len(prefix) - 1
+        lo = max((start_date.date() - start).days, 0)
+        hi = min((end_date.date() - start).days + 1, days)
+        if lo >= hi:
+            return {}
+
+        totals = {name: prefix[name][hi] - prefix[name][lo] for name in prefix.dtype.names}
+        if not totals["temp_count"]:
+            return {}
+        maximum, minimum = self._extremes(tree, lo, hi)
+        return {
+            "average_temperature": _ratio(totals["temp_sum"], totals["temp_count"]),
+            "maximum_temperature": None if np.isnan(maximum) else float(maximum),
+            "minimum_temperature": None if np.isnan(minimum) else float(minimum),
+            "total_precipitation": float(totals["precip_sum"]) if totals["precip_count"] else None,
+            "average_wind_speed": _ratio(totals["wind_sum"], totals["wind_count"])
+        }
@@ -0,0 +1,95 @@
+from typing import Deque, Optional, Tuple
+from collections import deque
+from datetime import date
+
+
+class RollingRegression:
+    """Moyenne et pente des moindres carrés sur une fenêtre glissante de jours
+
+    Moyennes, variance de x et covariance sont tenues à jour par les formules
+    de Welford, en ajout comme en retrait: O(1) par point, mémoire bornée par
+    la fenêtre. x est un numéro de jour, les jours manquants ne faussent donc
+    ni la fenêtre ni la pente.
+    """
+
+    def __init__(self, window_days: int):
+        self.window_days = window_days
+        self._points: Deque[Tuple[float, float]] = deque()
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self._m2_x = 0.0
+        self._c_xy = 0.0
+
+    def _add(self, x: float, y: float):
+        self.count += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.count
+        self.mean_y += (y - self.mean_y) / self.count
+        self._m2_x += dx * (x - self.mean_x)
+        self._c_xy += dx * (y - self.mean_y)
+
+    def _remove(self, x: float, y: float):
+        self.count -= 1
+        if self.count == 0:
+            self.mean_x = self.mean_y = self._m2_x = self._c_xy = 0.0
+            return
+        dx = x - self.mean_x
+        self.mean_x -= dx / self.count
+        self.mean_y -= (y - self.mean_y) / self.count
+        self._m2_x -= dx * (x - self.mean_x)
+        self._c_xy -= dx * (y - self.mean_y)
+
+    def push(self, x: float, y: float):
+        self._add(x, y)
+        self._points.append((x, y))
+        while x - self._points[0][0] >= self.window_days:
+            self._remove(*self._points.popleft())
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Pente par jour (None tant que la fenêtre ne couvre qu'un jour)"""
+        if self.count < 2 or self._m2_x <= 0:
+            return None
+        return self._c_xy / self._m2_x
+
+
+class TrendEngine:
+    """Tendances calculées en un seul passage sur une série journalière triée
+
+    Pour chaque point: moyenne glissante sur ``window_days``, pente de la
+    régression glissante sur ``slope_window_days`` (en °C par an) et moyenne
+    glissante désaisonnalisée. Le cycle saisonnier est la moyenne courante
+    de chaque mois (12 accumulateurs): l'écart à cette moyenne, ajouté à la
+    moyenne générale courante, donne la valeur désaisonnalisée. L'estimation
+    se stabilise après une première année de données.
+    """
+
+    def __init__(self, window_days: int, slope_window_days: int):
+        self.rolling = RollingRegression(window_days)
+        self.regression = RollingRegression(slope_window_days)
+        self.adjusted = RollingRegression(window_days)
+        self._month_count = [0] * 13
+        self._month_mean = [0.0] * 13
+        self._count = 0
+        self._mean = 0.0
+
+    def push(self, day: date, value: float) -> Tuple[float, Optional[float], float]:
+        """(moyenne glissante, pente °C/an, moyenne glissante désaisonnalisée)"""
+        x = float(day.toordinal())
+        self.rolling.push(x, value)
+        self.regression.push(x, value)
+
+        self._count += 1
+        self._mean += (value - self._mean) / self._count
+        month = day.month
+        self._month_count[month] += 1
+        self._month_mean[month] += (value - self._month_mean[month]) / self._month_count[month]
+        self.adjusted.push(x, value - self._month_mean[month] + self._mean)
+
+        slope = self.regression.slope
+        return (
+            self.rolling.mean_y,
+            slope * 365.25 if slope is not None else None,
+            self.adjusted.mean_y
+        )
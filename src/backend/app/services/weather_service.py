@@ -1,128 +1,331 @@
-from typing import List, Optional
-from datetime import datetime
-from app.schemas.weather import WeatherData, WeatherCreate
+from typing import List, Optional, Tuple, Dict, Any, AsyncIterator
+from datetime import date, datetime, timedelta
+from app.core.cache import cache_key, result_cache, ttl_for
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.schemas.weather import DAILY, MONTHLY, WeatherData, WeatherCreate
 from app.services.elasticsearch_service import ElasticsearchService
 from app.services.hadoop_service import HadoopService
+from app.services.ingest_buffer import IngestBuffer
+from app.services.parquet_service import ParquetService
+from app.services.range_index import RangeIndex
+import asyncio
+import logging
+
+# Sources de données, par coût croissant selon la requête
+ES = "elasticsearch"
+ROLLUPS = "rollups"
+PARQUET = "parquet"
+
+# Requêtes historiques identiques en cours, partagées entre appelants
+historical_flight = SingleFlight("historical")
+
+
+def _timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime(value.year, value.month, value.day)
+
 
 class WeatherService:
     def __init__(self):
         self.es_service = ElasticsearchService()
         self.hadoop_service = HadoopService()
+        self.parquet_service = ParquetService()
+        self.ingest_buffer = IngestBuffer(self.hadoop_service, self.es_service)
+        self.range_index = RangeIndex()
 
-    async def get_current_weather(self, location: str) -> WeatherData:
-        # Rechercher les données les plus récentes dans Elasticsearch
-        results = await self.es_service.search_weather_data(
-            location=location,
-            start_date=datetime.utcnow().replace(hour=0, minute=0, second=0),
-            end_date=datetime.utcnow()
+    def _available(self, source: str) -> bool:
+        if source == ES:
+            return self.es_service.is_connected
+        if source == ROLLUPS:
+            return self.hadoop_service.is_connected
+        return self.parquet_service.is_available
+
+    def route_historical(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        aggregate: bool = False
+    ) -> List[str]:
+        """Sources à essayer pour une plage, de la moins chère à la plus chère
+
+        - ``aggregate``: rollups mensuels Hive (un point par mois);
+        - sinon observations journalières paginées: Elasticsearch d'abord
+          pour une fenêtre courte ou récente, les Parquet de /data/processed
+          d'abord pour une longue plage ancienne.
+        """
+        if aggregate:
+            order = [ROLLUPS]
+        else:
+            span_days = (end_date - start_date).days
+            recent = end_date >= datetime.utcnow() - timedelta(days=settings.ROUTER_RECENT_DAYS)
+            if span_days <= settings.ROUTER_SHORT_RANGE_DAYS or recent:
+                order = [ES, PARQUET]
+            else:
+                order = [PARQUET, ES]
+        return [source for source in order if self._available(source)]
+
+    @staticmethod
+    def cursor_source(cursor: Optional[str]) -> Tuple[Optional[str], Optional[date]]:
+        """Source d'un curseur de pagination et, pour les Parquet, sa date
+
+        Lève ValueError si le curseur est invalide.
+        """
+        if cursor is None:
+            return None, None
+        values = ElasticsearchService.decode_cursor(cursor)
+        if len(values) == 2 and values[0] == PARQUET:
+            try:
+                return PARQUET, date.fromisoformat(values[1])
+            except (TypeError, ValueError):
+                raise ValueError("Curseur invalide")
+        return ES, None
+
+    @staticmethod
+    def _from_es(data: Dict[str, Any]) -> WeatherData:
+        return WeatherData(
+            location=data["location"],
+            temperature=data["temperature"],
+            humidity=data.get("humidity"),
+            wind_speed=data.get("wind_speed"),
+            station_id=data["station_id"],
+            precipitation=data.get("precipitation"),
+            timestamp=_timestamp(data["timestamp"]),
+            granularity=DAILY
+        )
+
+    @staticmethod
+    def _from_daily(row: Dict[str, Any]) -> WeatherData:
+        return WeatherData(
+            location=row["station_id"],
+            temperature=row["temperature"],
+            wind_speed=row["wind_speed"],
+            station_id=row["station_id"],
+            precipitation=row["precipitation"],
+            timestamp=_timestamp(row["date"]),
+            granularity=DAILY
         )
 
-        if results:
-            latest = results[0]
-            return WeatherData(
-                location=latest["location"],
-                temperature=latest["temperature"],
-                humidity=latest["humidity"],
-                wind_speed=latest["wind_speed"],
-                station_id=latest["station_id"],
-                timestamp=datetime.fromisoformat(latest["timestamp"])
+    async def _historical_from(
+        self,
+        source: str,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[WeatherData], Optional[str]]:
+        """Enregistrements d'une source et curseur de la page suivante"""
+        if source == ES:
+            results, next_cursor = await self.es_service.search_weather_data_page(
+                location=location,
+                start_date=start_date,
+                end_date=end_date,
+                size=page_size,
+                cursor=cursor
             )
+            return [
+                self._from_es(data)
+                for data in results
+                if data.get("temperature") is not None
+            ], next_cursor
 
-        # Fallback to mock data if no recent data found
-        return WeatherData(
+        if source == ROLLUPS:
+            months = await self.hadoop_service.get_monthly_series(
+                start_date=start_date,
+                end_date=end_date,
+                location=location
+            )
+            return [
+                WeatherData(
+                    location=location,
+                    temperature=row["temp_sum"] / row["temp_count"],
+                    wind_speed=row["wind_sum"] / row["wind_count"] if row["wind_count"] else None,
+                    station_id=location,
+                    precipitation=row["precip_sum"] if row["precip_count"] else None,
+                    timestamp=datetime(row["year"], row["month"], 1),
+                    granularity=MONTHLY
+                )
+                for row in months
+                if row["temp_count"]
+            ], None
+
+        _, before = self.cursor_source(cursor)
+        rows, next_before = await self.parquet_service.get_daily_observations_page(
             location=location,
-            temperature=20.5,
-            humidity=65,
-            wind_speed=10.2,
-            station_id="STATION001",
-            timestamp=datetime.utcnow()
+            start_date=start_date,
+            end_date=end_date,
+            size=page_size,
+            before=before
+        )
+        next_cursor = (
+            ElasticsearchService.encode_cursor([PARQUET, next_before.isoformat()])
+            if next_before else None
         )
+        return [
+            self._from_daily(row)
+            for row in rows
+            if row["temperature"] is not None
+        ], next_cursor
 
-    async def get_historical_weather(
+    async def _weather_stats(
         self,
-        location: str,
         start_date: datetime,
-        end_date: datetime
-    ) -> List[WeatherData]:
-        # Récupérer les statistiques de Hadoop
-        stats = await self.hadoop_service.get_weather_stats(
+        end_date: datetime,
+        location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Statistiques depuis l'index de plages, puis les rollups Hive, puis les Parquet"""
+        if location:
+            stats = self.range_index.get_weather_stats(location, start_date, end_date)
+            if stats:
+                return stats
+        if self.hadoop_service.is_connected:
+            stats = await self.hadoop_service.get_weather_stats(
+                start_date=start_date,
+                end_date=end_date,
+                location=location
+            )
+            if stats:
+                return stats
+        return await self.parquet_service.get_weather_stats(
             start_date=start_date,
             end_date=end_date,
             location=location
         )
 
-        # Récupérer les données détaillées d'Elasticsearch
-        results = await self.es_service.search_weather_data(
-            location=location,
-            start_date=start_date,
-            end_date=end_date
+    async def get_current_weather(self, location: str) -> Optional[WeatherData]:
+        """Dernière observation du jour, None si aucune"""
+        now = datetime.utcnow()
+        records, _ = await self._historical_from(
+            ES,
+            location,
+            now.replace(hour=0, minute=0, second=0, microsecond=0),
+            now,
+            page_size=1
         )
+        return records[0] if records else None
 
-        if results:
-            return [
-                WeatherData(
-                    location=data["location"],
-                    temperature=data["temperature"],
-                    humidity=data["humidity"],
-                    wind_speed=data["wind_speed"],
-                    station_id=data["station_id"],
-                    timestamp=datetime.fromisoformat(data["timestamp"])
+    async def get_historical_weather(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime,
+        page_size: int = 500,
+        cursor: Optional[str] = None,
+        aggregate: bool = False
+    ) -> Tuple[List[WeatherData], Optional[str]]:
+        """Historique servi par la première source disponible qui répond
+
+        Observations journalières paginées (Elasticsearch ou Parquet), avec
+        le curseur de la page suivante; un curseur fourni désigne la source
+        qui l'a émis. ``aggregate`` demande la série mensuelle des rollups,
+        non paginée.
+        """
+        key = cache_key(
+            "historical", location, start_date, end_date,
+            page_size=page_size, cursor=cursor, aggregate=aggregate
+        )
+        found, page = result_cache.get(key)
+        if found:
+            return page
+
+        async def fetch() -> Tuple[List[WeatherData], Optional[str]]:
+            source, _ = self.cursor_source(cursor)
+            sources = [source] if source else self.route_historical(start_date, end_date, aggregate)
+            records, next_cursor = [], None
+            for source in sources:
+                records, next_cursor = await self._historical_from(
+                    source, location, start_date, end_date, page_size, cursor
                 )
-                for data in results
-            ]
+                if records:
+                    logging.debug(f"Historique {location}: servi par {source}")
+                    break
 
-        # Fallback to mock data if no data found
-        return [
-            WeatherData(
-                location=location,
-                temperature=19.5 + i,
-                humidity=60 + i,
-                wind_speed=8.0 + i,
-                station_id=f"STATION00{i}",
-                timestamp=datetime.utcnow()
-            )
-            for i in range(5)
-        ]
+            # Une réponse vide peut venir d'une panne: elle n'est pas mise en cache
+            if records:
+                result_cache.set(key, (records, next_cursor), ttl_for(end_date), station=location)
+            return records, next_cursor
+
+        # À l'expiration du cache, les appels simultanés partagent une requête
+        return await historical_flight.do(key, fetch)
+
+    async def stream_historical_weather(
+        self,
+        location: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> AsyncIterator[WeatherData]:
+        """Tout l'historique journalier en flux, mémoire constante
+
+        Elasticsearch (point-in-time) d'abord; les Parquet prennent le relais
+        si Elasticsearch échoue ou ne renvoie rien avant le premier
+        enregistrement. Une erreur après le début du flux est propagée.
+        """
+        sent = 0
+        if self.es_service.is_connected:
+            try:
+                async for row in self.es_service.scan_weather_data(
+                    location=location,
+                    start_date=start_date,
+                    end_date=end_date,
+                    page_size=settings.STREAM_PAGE_SIZE
+                ):
+                    if row.get("temperature") is not None:
+                        sent += 1
+                        yield self._from_es(row)
+            except Exception as e:
+                if sent:
+                    raise
+                logging.warning(f"Flux Elasticsearch indisponible, repli Parquet: {str(e)}")
+        if sent:
+            return
+
+        async for row in self.parquet_service.iter_daily_observations(
+            location=location,
+            start_date=start_date,
+            end_date=end_date,
+            batch_size=settings.STREAM_PAGE_SIZE
+        ):
+            if row["temperature"] is not None:
+                yield self._from_daily(row)
 
     async def search_weather_events(
         self,
         location: Optional[str] = None,
-        event_type: Optional[str] = None
-    ) -> List[WeatherData]:
+        event_type: Optional[str] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: float = 50.0,
+        min_casualties: Optional[int] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[WeatherData], Optional[str]]:
         # Rechercher les événements dans Elasticsearch
-        events = await self.es_service.search_storm_events(
+        events, next_cursor = await self.es_service.search_weather_events_page(
             location=location,
-            event_type=event_type
+            event_type=event_type,
+            near=near,
+            radius_km=radius_km,
+            min_casualties=min_casualties,
+            size=page_size,
+            cursor=cursor
         )
 
-        if events:
-            return [
-                WeatherData(
-                    location=event["location"],
-                    temperature=event.get("temperature", 0.0),
-                    humidity=event.get("humidity", 0.0),
-                    wind_speed=event.get("wind_speed", 0.0),
-                    station_id=event.get("station_id", "UNKNOWN"),
-                    timestamp=datetime.fromisoformat(event["date"]),
-                    event_type=event.get("event_type"),
-                    description=event.get("description")
-                )
-                for event in events
-            ]
-
-        # Fallback to mock data if no events found
         return [
             WeatherData(
-                location=location or "Paris",
-                temperature=20.5,
-                humidity=65,
-                wind_speed=10.2,
-                station_id="STATION001",
-                timestamp=datetime.utcnow(),
-                event_type=event_type or "NORMAL",
-                description="No specific weather events found"
+                location=event["location"],
+                temperature=event.get("temperature", 0.0),
+                humidity=event.get("humidity", 0.0),
+                wind_speed=event.get("wind_speed", 0.0),
+                station_id=event.get("station_id", "UNKNOWN"),
+                timestamp=datetime.fromisoformat(event["date"]),
+                event_type=event.get("event_type"),
+                description=event.get("description")
             )
-        ]
+            for event in events
+        ], next_cursor
 
     async def analyze_seasonal_patterns(
         self,
@@ -130,16 +333,12 @@ class WeatherService:
         year: int
     ) -> dict:
         """Analyse les tendances saisonnières"""
-        seasonal_data = await self.hadoop_service.get_seasonal_analysis(year, location)
-
-        # Enrichir les données avec des informations supplémentaires d'Elasticsearch
-        for season in seasonal_data:
-            events = await self.es_service.search_storm_events(
-                location=location,
-                start_date=datetime(year, 1, 1),
-                end_date=datetime(year, 12, 31)
-            )
-            season["significant_events"] = len(events)
+        result = await self.analyze_seasonal_patterns_range(location, year, year)
+        # Copies: le résultat multi-années peut être partagé via le cache
+        seasonal_data = [
+            {key: value for key, value in season.items() if key != "year"}
+            for season in result["seasonal_analysis"]
+        ]
 
         return {
             "seasonal_analysis": seasonal_data,
@@ -147,28 +346,71 @@ class WeatherService:
             "location": location
         }
 
+    async def analyze_seasonal_patterns_range(
+        self,
+        location: str,
+        start_year: int,
+        end_year: int
+    ) -> dict:
+        """Statistiques saisonnières et nombre d'événements sur plusieurs années
+
+        Une requête par backend quelle que soit la durée: les rollups Hive
+        pour les statistiques, une agrégation Elasticsearch pour les
+        événements, lancées en parallèle.
+        """
+        key = cache_key("seasonal", location, start_year, end_year)
+        found, result = result_cache.get(key)
+        if found:
+            return result
+
+        seasonal_data, event_counts = await asyncio.gather(
+            self.hadoop_service.get_seasonal_analysis_range(location, start_year, end_year),
+            self.es_service.count_events_by_season(location, start_year, end_year)
+        )
+
+        for season in seasonal_data:
+            season["significant_events"] = event_counts.get((season["year"], season["season"]), 0)
+
+        result = {
+            "seasonal_analysis": seasonal_data,
+            "start_year": start_year,
+            "end_year": end_year,
+            "location": location
+        }
+        if seasonal_data:
+            result_cache.set(key, result, ttl_for(end_year), station=location)
+        return result
+
     async def get_location_summary(
         self,
         location: str,
         start_date: datetime,
         end_date: datetime
     ) -> dict:
-        """Obtient un résumé complet pour une localisation"""
-        # Statistiques de base depuis Hadoop
-        stats = await self.hadoop_service.get_weather_stats(
-            start_date=start_date,
-            end_date=end_date,
-            location=location
-        )
+        """Obtient un résumé complet pour une localisation
 
-        # Événements significatifs depuis Elasticsearch
-        events = await self.es_service.search_storm_events(
-            location=location,
-            start_date=start_date,
-            end_date=end_date
+        Statistiques et événements sont demandés en parallèle: la latence est
+        celle du backend le plus lent, pas leur somme.
+        """
+        key = cache_key("summary", location, start_date, end_date)
+        found, summary = result_cache.get(key)
+        if found:
+            return summary
+
+        stats, events = await asyncio.gather(
+            self._weather_stats(
+                start_date=start_date,
+                end_date=end_date,
+                location=location
+            ),
+            self.es_service.search_weather_events(
+                location=location,
+                start_date=start_date,
+                end_date=end_date
+            )
         )
 
-        return {
+        summary = {
             "location": location,
             "period": {
                 "start": start_date.isoformat(),
@@ -178,26 +420,33 @@ class WeatherService:
             "significant_events": len(events),
             "recent_events": events[:5]  # 5 événements les plus récents
         }
+        if stats:
+            result_cache.set(key, summary, ttl_for(end_date), station=location)
+        return summary
 
     async def save_weather_data(self, data: WeatherCreate):
-        """Sauvegarde les données météo dans Hadoop et Elasticsearch"""
-        # Préparer les données pour Hadoop
-        hadoop_data = {
-            "station_id": data.station_id,
-            "date": data.timestamp.date(),
-            "temperature": data.temperature,
-            "humidity": data.humidity,
-            "wind_speed": data.wind_speed,
-            "precipitation": data.precipitation if hasattr(data, 'precipitation') else 0.0,
-            "wind_direction": data.wind_direction if hasattr(data, 'wind_direction') else None
-        }
+        """Sauvegarde les données météo dans Hadoop et Elasticsearch (écriture groupée)"""
+        await self.ingest_buffer.add([data])
 
-        # Sauvegarder dans Hadoop
-        await self.hadoop_service.save_weather_data(
-            hadoop_data,
-            data.timestamp.year
-        )
+    async def ingest_weather_data(
+        self,
+        observations: List[WeatherCreate],
+        flush: bool = False
+    ) -> Dict[str, Any]:
+        """Ajoute un lot d'observations au tampon d'écriture
+
+        ``flush`` attend l'écriture effective au lieu du prochain vidage.
+        """
+        pending = await self.ingest_buffer.add(observations)
+        result = {"accepted": len(observations), "pending": pending}
+        if flush:
+            result.update(await self.ingest_buffer.flush())
+            result["pending"] = self.ingest_buffer.pending
+        return result
+
+    def start(self):
+        self.ingest_buffer.start()
 
-        # Sauvegarder dans Elasticsearch pour la recherche rapide
-        es_data = data.dict()
-        await self.es_service.index_weather_data(es_data)
+    async def close(self):
+        await self.ingest_buffer.close()
+        self.hadoop_service.close()
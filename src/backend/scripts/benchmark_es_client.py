@@ -0,0 +1,121 @@
+"""Comparaison de débit: client Elasticsearch synchrone vs asynchrone partagé
+
+Un faux serveur Elasticsearch local répond à chaque recherche après un
+délai fixe. On lance ``--requests`` recherches concurrentes:
+
+- ``sync``: client ``Elasticsearch`` appelé dans une coroutine (ancien
+  chemin), chaque appel bloque la boucle d'événements;
+- ``async``: ``ElasticsearchService`` avec le client asynchrone partagé.
+
+Usage (depuis src/backend): python scripts/benchmark_es_client.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class FakeElasticsearch(BaseHTTPRequestHandler):
+    """Réponses minimales compatibles avec le client elasticsearch 8"""
+
+    latency = 0.05
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_POST()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.path.split("?")[0].endswith("/_search"):
+            time.sleep(self.latency)
+            self._reply({
+                "took": int(self.latency * 1000),
+                "hits": {"total": {"value": 1}, "hits": [{"_source": {"location": "X"}}]}
+            })
+        else:
+            self._reply({"acknowledged": True})
+
+    def do_PUT(self):
+        self.do_POST()
+
+    def log_message(self, *args):
+        pass
+
+
+async def run_sync(url: str, requests: int) -> float:
+    from elasticsearch import Elasticsearch
+
+    client = Elasticsearch(url)
+
+    async def search():
+        return client.search(index="weather_data", body={"query": {"match_all": {}}})
+
+    start = time.monotonic()
+    await asyncio.gather(*[search() for _ in range(requests)])
+    elapsed = time.monotonic() - start
+    client.close()
+    return elapsed
+
+
+async def run_async(requests: int) -> float:
+    from app.services.elasticsearch_service import ElasticsearchService
+    from app.db.session import close_es_client
+
+    service = ElasticsearchService()
+    await service.search_weather_data(location="X")  # création des indices
+
+    start = time.monotonic()
+    await asyncio.gather(*[service.search_weather_data(location="X") for _ in range(requests)])
+    elapsed = time.monotonic() - start
+    await close_es_client()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    FakeElasticsearch.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeElasticsearch)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    os.environ["ELASTICSEARCH_HOST"] = host
+    os.environ["ELASTICSEARCH_PORT"] = str(port)
+
+    sync_elapsed = asyncio.run(run_sync(f"http://{host}:{port}", args.requests))
+    async_elapsed = asyncio.run(run_async(args.requests))
+    server.shutdown()
+
+    print(f"{args.requests} recherches concurrentes, latence serveur {args.latency_ms:.0f}ms")
+    for name, elapsed in (("sync", sync_elapsed), ("async", async_elapsed)):
+        print(f"  {name:<5} {elapsed:6.2f}s  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
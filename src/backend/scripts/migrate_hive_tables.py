@@ -0,0 +1,104 @@
+"""Migration unique des tables Hive vers les tables externes de l'import Spark
+
+Les versions précédentes créaient ``daily_observations`` (et les rollups)
+comme tables gérées, que les fichiers écrits par Spark dans /data/processed
+ne remplissent pas. Pour chaque table de EXTERNAL_TABLES encore gérée:
+
+- les lignes de ``daily_observations`` (écritures de l'API) sont recopiées
+  dans ``api_observations``;
+- la table est renommée en ``<table>_managed``, à supprimer après
+  vérification (docs/deployment.md);
+- la table externe est créée à sa place.
+
+Enfin ``MSCK REPAIR TABLE`` déclare les partitions déjà présentes sur disque
+(à relancer si l'import n'a pas pu déclarer les siennes). Le script peut
+être relancé sans risque: une table déjà externe n'est que réparée.
+
+Usage (depuis src/backend): python scripts/migrate_hive_tables.py [--dry-run]
+"""
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.hadoop_service import API_OBSERVATIONS_TABLE, EXTERNAL_TABLES, HadoopService
+
+DAILY_OBSERVATIONS_TABLE = "noaa_weather.daily_observations"
+OBSERVATION_COLUMNS = (
+    "station_id, date, temperature, temperature_max, temperature_min, "
+    "precipitation, snow_depth, wind_speed, wind_direction"
+)
+
+
+def table_type(cursor, table: str) -> Optional[str]:
+    """MANAGED_TABLE, EXTERNAL_TABLE ou None si la table n'existe pas"""
+    try:
+        cursor.execute(f"DESCRIBE FORMATTED {table}")
+        rows = cursor.fetchall()
+    except Exception:
+        return None
+    return next(
+        (str(row[1]).strip() for row in rows if str(row[0]).strip() == "Table Type:"),
+        None
+    )
+
+
+def migration_statements(managed: List[str]) -> List[str]:
+    """Recopie des écritures de l'API puis mise à l'écart des tables gérées"""
+    statements = []
+    if DAILY_OBSERVATIONS_TABLE in managed:
+        statements += [
+            "SET hive.exec.dynamic.partition=true",
+            "SET hive.exec.dynamic.partition.mode=nonstrict",
+            f"INSERT INTO TABLE {API_OBSERVATIONS_TABLE} PARTITION (year, month) "
+            f"SELECT {OBSERVATION_COLUMNS}, year, month FROM {DAILY_OBSERVATIONS_TABLE}"
+        ]
+    statements += [f"ALTER TABLE {table} RENAME TO {table}_managed" for table in managed]
+    return statements
+
+
+def migrate(service: HadoopService, dry_run: bool = False) -> List[str]:
+    """Applique la migration; retourne les tables gérées mises à l'écart"""
+    with service.pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            managed = [table for table in EXTERNAL_TABLES if table_type(cursor, table) == "MANAGED_TABLE"]
+            statements = migration_statements(managed)
+            for sql in statements:
+                logging.info(sql)
+                if not dry_run:
+                    cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    if dry_run:
+        return managed
+    if managed:
+        # Les tables externes prennent la place des tables renommées
+        service._create_tables()
+    service._run_sync([(f"MSCK REPAIR TABLE {table}", None) for table in EXTERNAL_TABLES])
+    for table in managed:
+        logging.warning(f"{table} renommée en {table}_managed: à supprimer après vérification")
+    return managed
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Affiche les requêtes sans les exécuter")
+    args = parser.parse_args()
+
+    service = HadoopService()
+    try:
+        if not service.is_connected:
+            sys.exit("Hive injoignable")
+        migrate(service, dry_run=args.dry_run)
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from unittest import mock
+
+import pytest
+
+# Scripts d'ingestion (download_noaa_data, build_range_index, ...)
+INGESTION_SCRIPTS = Path(__file__).resolve().parents[3] / "scripts" / "data_ingestion" / "scripts"
+if str(INGESTION_SCRIPTS) not in sys.path:
+    sys.path.append(str(INGESTION_SCRIPTS))
+
+# Scripts d'exploitation du backend (migrate_hive_tables, ...)
+BACKEND_SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+if str(BACKEND_SCRIPTS) not in sys.path:
+    sys.path.append(str(BACKEND_SCRIPTS))
+
+
+@pytest.fixture(scope="session")
+def ingestion(tmp_path_factory):
+    """Importe un script d'ingestion, ses journaux /data/*.log redirigés vers un répertoire temporaire"""
+    log_dir = tmp_path_factory.mktemp("logs")
+    file_handler = logging.FileHandler
+
+    def redirected(filename, *args, **kwargs):
+        return file_handler(log_dir / Path(filename).name, *args, **kwargs)
+
+    def load(name: str):
+        with mock.patch("logging.FileHandler", redirected):
+            return importlib.import_module(name)
+
+    return load
+
+
+class StaticServer(ThreadingHTTPServer):
+    """Serveur HTTP local: fichiers en mémoire, ETag, requêtes conditionnelles et Range"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StaticHandler)
+        self.files: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+        self.requests: List[Dict[str, str]] = []
+        # Délai de réponse et nombre maximal de requêtes servies en même temps
+        self.delay = 0.0
+        self.active = self.max_active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def publish(self, path: str, content: bytes, etag: str):
+        self.files[path] = content
+        self.etags[path] = etag
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests.append({"path": self.path, **dict(self.headers)})
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            self._respond()
+        finally:
+            with server._lock:
+                server.active -= 1
+
+    def _respond(self):
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        etag = self.server.etags[self.path]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        status, body = 200, content
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range") in (None, etag):
+            start = int(requested.split("=")[1].rstrip("-"))
+            if start >= len(content):
+                # Plage hors du fichier: 416, comme un serveur HTTP réel
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status, body = 206, content[start:]
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def http_server():
+    server = StaticServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def spark():
+    """Session Spark locale (tests ignorés si pyspark n'est pas installé)"""
+    sql = pytest.importorskip("pyspark.sql")
+    session = (
+        sql.SparkSession.builder.master("local[1]")
+        .appName("noaa-tests")
+        .config("spark.ui.enabled", "false")
+        .config("spark.sql.shuffle.partitions", "1")
+        .getOrCreate()
+    )
+    yield session
+    session.stop()
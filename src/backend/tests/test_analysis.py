@@ -0,0 +1,146 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import analysis
+from app.core.cache import result_cache
+from app.core.security import create_access_token
+from app.services.analysis_service import AnalysisService
+from app.services.trend_engine import TrendEngine
+
+STATION = "071560-99999"
+
+
+class FakeParquet:
+    """Source journalière en mémoire, mêmes filtres que ParquetService"""
+
+    is_available = True
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.reads = 0
+
+    def _select(self, location, start, end, columns):
+        self.reads += 1
+        days = pd.to_datetime(self.df["date"]).dt.date
+        rows = self.df[(self.df["station_id"] == location) & (days >= start) & (days <= end)]
+        return rows[columns].reset_index(drop=True)
+
+    async def read_daily_frame(self, location, start_date, end_date, columns):
+        return self._select(location, start_date.date(), end_date.date(), columns)
+
+    async def iter_daily_years(self, location, start_date, end_date, columns):
+        for year in range(start_date.year, end_date.year + 1):
+            first = max(start_date.date(), date(year, 1, 1))
+            last = min(end_date.date(), date(year, 12, 31))
+            df = self._select(location, first, last, columns)
+            if not df.empty:
+                yield df.sort_values("date")
+
+
+def daily(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2019-12-01", "2021-01-31", freq="D")
+    days = days[rng.random(len(days)) > 0.1]
+    temperature = rng.normal(12, 8, len(days)).round(1)
+    df = pd.DataFrame({
+        "station_id": STATION,
+        "date": days.date,
+        "temperature": temperature,
+        "temperature_max": temperature + 3,
+        "temperature_min": temperature - 3,
+        "precipitation": rng.exponential(2, len(days)).round(1),
+        "wind_speed": rng.uniform(0, 10, len(days)).round(1)
+    })
+    # Extrêmes et températures manquants
+    df.loc[df.index[::7], "temperature_max"] = np.nan
+    df.loc[df.index[::11], "temperature"] = np.nan
+    return df
+
+
+@pytest.fixture
+def service():
+    result_cache.clear()
+    service = AnalysisService()
+    service.parquet_service = FakeParquet(daily())
+    yield service
+    result_cache.clear()
+
+
+def test_statistics_and_seasons_match_pandas(service):
+    analysis = asyncio.run(service.get_weather_statistics(STATION, 2020))
+
+    df = service.parquet_service.df
+    year = df[(pd.to_datetime(df["date"]).dt.year == 2020) & df["temperature"].notna()]
+    maxima = year["temperature_max"].fillna(year["temperature"])
+    stats = analysis.statistics
+    assert stats.avg_temperature == pytest.approx(year["temperature"].mean())
+    assert stats.max_temperature == pytest.approx(maxima.max())
+    assert stats.min_temperature == pytest.approx(year["temperature_min"].min())
+    assert stats.total_precipitation == pytest.approx(year["precipitation"].sum())
+    assert (analysis.period_start, analysis.period_end) == (datetime(2020, 1, 1), datetime(2020, 12, 31))
+
+    # Hiver = décembre, janvier, février de la même année civile
+    months = pd.to_datetime(year["date"]).dt.month
+    winter = year[months.isin([12, 1, 2])]
+    seasons = {season.season: season for season in analysis.seasonal_data}
+    assert list(seasons) == ["Winter", "Spring", "Summer", "Fall"]
+    assert seasons["Winter"].days_count == len(winter)
+    assert seasons["Winter"].avg_temp == pytest.approx(winter["temperature"].mean())
+    assert sum(season.days_count for season in seasons.values()) == len(year)
+
+    # Deuxième appel servi par le cache
+    asyncio.run(service.get_weather_statistics(STATION, 2020))
+    assert service.parquet_service.reads == 1
+
+
+def test_station_without_data(service):
+    assert asyncio.run(service.get_weather_statistics("inconnue", 2020)) is None
+    assert asyncio.run(service.get_seasonal_analysis("inconnue", 2020)) == []
+
+
+def test_trends_run_once_across_years(service):
+    start, end = datetime(2019, 12, 15), datetime(2021, 1, 20)
+    trends = asyncio.run(service.get_weather_trends(STATION, start, end, window_days=30, slope_window_days=90))
+
+    df = service.parquet_service.df.dropna(subset=["temperature"])
+    df = df[(pd.to_datetime(df["date"]) >= start) & (pd.to_datetime(df["date"]) <= end)]
+    days = pd.to_datetime(df["date"])
+    engine = TrendEngine(30, 90)
+    expected = [engine.push(pd.Timestamp(day).to_pydatetime(), value) for day, value in zip(df["date"], df["temperature"])]
+
+    assert len(trends) == len(df)
+    assert [trend.date.date() for trend in trends] == list(df["date"])
+    for trend, (mean, slope, adjusted) in zip(trends, expected):
+        assert trend.trend == pytest.approx(mean)
+        assert trend.slope == (pytest.approx(slope) if slope is not None else None)
+        assert trend.seasonal_adjusted == pytest.approx(adjusted)
+    # La fenêtre de 30 jours couvre le passage d'une année à l'autre
+    january = next(trend for trend in trends if trend.date >= datetime(2020, 1, 10))
+    window = df[(days > january.date - timedelta(days=30)) & (days <= january.date)]
+    assert january.trend == pytest.approx(window["temperature"].mean())
+
+
+def test_analysis_routes_require_a_token(service, monkeypatch):
+    monkeypatch.setattr(analysis, "analysis_service", service)
+    app = FastAPI()
+    app.include_router(analysis.router, prefix="/analysis")
+    client = TestClient(app)
+
+    assert client.get(f"/analysis/statistics/{STATION}", params={"year": 2020}).status_code == 401
+    headers = {"Authorization": "Bearer invalide"}
+    assert client.get(f"/analysis/statistics/{STATION}", params={"year": 2020}, headers=headers).status_code == 401
+    headers = {"Authorization": f"Bearer {create_access_token({'role': 'admin'})}"}
+    assert client.get(f"/analysis/statistics/{STATION}", params={"year": 2020}, headers=headers).status_code == 401
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'analyste@example.org'})}"}
+    response = client.get(f"/analysis/statistics/{STATION}", params={"year": 2020}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["location"] == STATION
+    response = client.get("/analysis/statistics/inconnue", params={"year": 2020}, headers=headers)
+    assert response.status_code == 404
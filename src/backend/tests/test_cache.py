@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import ResultCache, _estimate_size, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge monotone contrôlée par le test"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResultCache("test", 1 << 20)
+    cache.set("key", [1, 2, 3], ttl=60)
+    assert cache.get("key") == (True, [1, 2, 3])
+    clock.value += 61
+    assert cache.get("key") == (False, None)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache._bytes == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    size = _estimate_size("x" * 100)
+    cache = ResultCache("test", 3 * size)
+    for key in "abc":
+        cache.set(key, "x" * 100, ttl=60)
+    cache.get("a")
+    cache.set("d", "x" * 100, ttl=60)
+
+    assert [key for key in "abcd" if cache.get(key)[0]] == ["a", "c", "d"]
+    assert cache.evictions == 1
+
+
+def test_oversized_values_are_not_cached(clock):
+    cache = ResultCache("test", 10)
+    cache.set("big", "x" * 1000, ttl=60)
+    assert cache.get("big") == (False, None)
+
+
+def test_invalidation_removes_only_the_station_entries(clock):
+    cache = ResultCache("test", 1 << 20)
+    cache.set(("stats", "A", 1), 1, ttl=60, station="A")
+    cache.set(("stats", "A", 2), 2, ttl=60, station="A")
+    cache.set(("stats", "B", 1), 3, ttl=60, station="B")
+
+    assert cache.invalidate_station("A") == 2
+    assert cache.get(("stats", "A", 1)) == (False, None)
+    assert cache.get(("stats", "B", 1)) == (True, 3)
+    assert cache.invalidate_station("A") == 0
+
+
+def test_replaced_entry_is_not_counted_twice(clock):
+    cache = ResultCache("test", 1 << 20)
+    cache.set("key", "x" * 100, ttl=60, station="A")
+    cache.set("key", "y" * 100, ttl=60, station="A")
+    assert cache._bytes == _estimate_size("y" * 100)
+    assert cache.invalidate_station("A") == 1
+
+
+def test_keys_are_normalised():
+    assert cache_key("h", " A ", datetime(2020, 1, 1, 12), date(2020, 1, 2), b=2, a=1) == (
+        "h", "A", "2020-01-01T12:00:00", "2020-01-02", (("a", 1), ("b", 2))
+    )
+    # Même instant, fuseaux différents
+    paris = timezone(timedelta(hours=1))
+    assert cache_key("h", "A", datetime(2020, 1, 1, 13, tzinfo=paris), 2020) == cache_key(
+        "h", "A", datetime(2020, 1, 1, 12, tzinfo=timezone.utc), 2020
+    )
+
+
+def test_sub_day_ranges_do_not_collide():
+    morning = cache_key("h", "A", datetime(2020, 1, 1, 0), datetime(2020, 1, 1, 6))
+    evening = cache_key("h", "A", datetime(2020, 1, 1, 18), datetime(2020, 1, 1, 23, 59))
+    assert morning != evening
@@ -0,0 +1,24 @@
+import os
+
+
+def test_importer_reads_the_converted_parquet_while_it_is_current(ingestion, tmp_path):
+    columnar = ingestion("columnar")
+    source = tmp_path / "raw" / "gsod" / "2019" / "071560-99999-2019.csv"
+    source.parent.mkdir(parents=True)
+    source.write_text('"STATION","DATE","TEMP"\n"07156099999","2019-01-01",41.5\n')
+
+    converter = columnar.ColumnarConverter(
+        raw_path=str(tmp_path / "raw"), output_path=str(tmp_path / "columnar"), max_workers=1
+    )
+    target = converter.target("gsod", source)
+    assert target == tmp_path / "columnar" / "gsod" / "year=2019" / "station=071560-99999" / "data.parquet"
+    assert not converter.is_current("gsod", source)
+
+    assert converter.convert_gsod() == 1
+    assert converter.is_current("gsod", source)
+    assert converter.convert_gsod() == 0
+
+    # CSV retéléchargé après la conversion: l'import revient au CSV
+    stat = target.stat()
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+    assert not converter.is_current("gsod", source)
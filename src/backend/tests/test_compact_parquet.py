@@ -0,0 +1,120 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyspark")
+
+
+class LocalPath:
+    """Équivalent minimal de org.apache.hadoop.fs.Path sur le disque local"""
+
+    def __init__(self, path, child=None):
+        self.path = Path(str(path)) / child if child else Path(str(path))
+
+    def getParent(self):
+        return LocalPath(self.path.parent)
+
+    def toString(self):
+        return str(self.path)
+
+    __str__ = toString
+
+
+class LocalFileSystem:
+    def __init__(self, fail_rename_of=None):
+        self.fail_rename_of = fail_rename_of
+
+    def exists(self, path):
+        return path.path.exists()
+
+    def delete(self, path, recursive):
+        shutil.rmtree(path.path, ignore_errors=True)
+
+    def mkdirs(self, path):
+        path.path.mkdir(parents=True, exist_ok=True)
+
+    def rename(self, source, target):
+        if source.path == self.fail_rename_of or not source.path.exists():
+            return False
+        source.path.rename(target.path)
+        return True
+
+    def create(self, path):
+        return path.path.open("w")
+
+
+@pytest.fixture
+def compactor(ingestion):
+    compact_parquet = ingestion("compact_parquet")
+    compactor = compact_parquet.ParquetCompactor.__new__(compact_parquet.ParquetCompactor)
+    compactor._Path = LocalPath
+    compactor.fs = LocalFileSystem()
+    return compactor
+
+
+@pytest.fixture
+def partition(tmp_path):
+    target = tmp_path / "daily" / "year=2020" / "month=1"
+    staged = tmp_path / "daily_compacting" / "year=2020" / "month=1"
+    for directory, name in ((target, "part-0.parquet"), (target, "part-1.parquet"), (staged, "compacted.parquet")):
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / name).write_bytes(b"x")
+    return target, staged, tmp_path / "daily_replaced" / "year=2020" / "month=1"
+
+
+def test_swap_replaces_then_deletes_the_old_copy(compactor, partition):
+    target, staged, backup = partition
+    compactor._swap(LocalPath(staged), LocalPath(target), LocalPath(backup))
+    assert sorted(f.name for f in target.iterdir()) == ["_COMPACTED", "compacted.parquet"]
+    assert not staged.exists() and not backup.exists()
+
+
+def test_missing_staging_leaves_the_partition_untouched(compactor, partition):
+    target, staged, backup = partition
+    shutil.rmtree(staged)
+    with pytest.raises(IOError):
+        compactor._swap(LocalPath(staged), LocalPath(target), LocalPath(backup))
+    assert sorted(f.name for f in target.iterdir()) == ["part-0.parquet", "part-1.parquet"]
+
+
+def test_failed_rename_restores_the_old_copy(compactor, partition):
+    target, staged, backup = partition
+    compactor.fs.fail_rename_of = staged
+    with pytest.raises(IOError):
+        compactor._swap(LocalPath(staged), LocalPath(target), LocalPath(backup))
+    assert sorted(f.name for f in target.iterdir()) == ["part-0.parquet", "part-1.parquet"]
+    assert not backup.exists()
+
+
+class FakeSpark:
+    """spark.read.parquet(chemin).take(1): lignes de la partition d'origine"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.read = self
+
+    def parquet(self, path):
+        return self
+
+    def take(self, n):
+        return self.rows[:n]
+
+
+def test_partition_without_rows_is_marked_compacted(compactor, partition, tmp_path):
+    """Aucune ligne, donc pas de répertoire compacté: partition vidée et témoin déposé, sans échec"""
+    target, staged, _ = partition
+    shutil.rmtree(staged)
+    compactor.spark = FakeSpark([])
+    compactor._replace(str(target), 2, str(tmp_path / "daily_compacting"), str(tmp_path / "daily_replaced"))
+    assert sorted(f.name for f in target.iterdir()) == ["_COMPACTED"]
+    assert not (tmp_path / "daily_replaced" / "year=2020" / "month=1").exists()
+
+
+def test_missing_staging_with_rows_is_a_failure(compactor, partition, tmp_path):
+    target, staged, _ = partition
+    shutil.rmtree(staged)
+    compactor.spark = FakeSpark([("071560-99999",)])
+    with pytest.raises(IOError):
+        compactor._replace(str(target), 2, str(tmp_path / "daily_compacting"), str(tmp_path / "daily_replaced"))
+    assert sorted(f.name for f in target.iterdir()) == ["part-0.parquet", "part-1.parquet"]
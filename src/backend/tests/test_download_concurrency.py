@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("tqdm")
+
+
+@pytest.fixture
+def downloader(ingestion, tmp_path, monkeypatch):
+    monkeypatch.setenv("NOAA_DOWNLOAD_WORKERS", "6")
+    monkeypatch.setenv("NOAA_DOWNLOAD_PER_HOST", "2")
+    monkeypatch.setenv("NOAA_DOWNLOAD_RETRIES", "0")
+    download = ingestion("download_noaa_data")
+    downloader = download.NOAADataDownloader(base_path=str(tmp_path))
+    yield downloader
+    downloader.session.close()
+
+
+def test_files_are_downloaded_in_parallel_within_the_host_limit(downloader, http_server, tmp_path):
+    http_server.delay = 0.2
+    tasks = []
+    for i in range(6):
+        http_server.publish(f"/file-{i}.csv", f"contenu {i}\n".encode(), f'"v{i}"')
+        tasks.append((f"{http_server.url}/file-{i}.csv", tmp_path / f"file-{i}.csv"))
+
+    completed = downloader._download_files(tasks, "test")
+
+    assert sorted(completed) == sorted(tasks)
+    assert [(tmp_path / f"file-{i}.csv").read_text() for i in range(6)] == [f"contenu {i}\n" for i in range(6)]
+    # 6 workers, mais au plus 2 téléchargements simultanés vers le même hôte
+    assert http_server.max_active == 2
+
+
+def test_failed_and_unchanged_files_are_not_reported(downloader, http_server, tmp_path):
+    http_server.publish("/present.csv", b"ok\n", '"v1"')
+    present = (f"{http_server.url}/present.csv", tmp_path / "present.csv")
+    missing = (f"{http_server.url}/missing.csv", tmp_path / "missing.csv")
+
+    assert downloader._download_files([present, missing], "test") == [present]
+    assert not (tmp_path / "missing.csv").exists()
+    # Deuxième passage: 304, rien à retraiter
+    assert downloader._download_files([present], "test") == []
@@ -0,0 +1,132 @@
+import hashlib
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("tqdm")
+
+CONTENT = b"".join(f"ligne {i}\n".encode() for i in range(2000))
+
+
+@pytest.fixture
+def download(ingestion, monkeypatch):
+    monkeypatch.setenv("NOAA_DOWNLOAD_RETRIES", "0")
+    return ingestion("download_noaa_data")
+
+
+@pytest.fixture
+def downloader(download, tmp_path):
+    downloader = download.NOAADataDownloader(base_path=str(tmp_path))
+    yield downloader
+    downloader.session.close()
+
+
+def test_manifest_enables_conditional_requests(download, downloader, http_server, tmp_path):
+    http_server.publish("/data.csv", CONTENT, '"v1"')
+    url, output = f"{http_server.url}/data.csv", tmp_path / "data.csv"
+
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    entry = downloader.manifest.get(output)
+    assert entry["etag"] == '"v1"' and entry["size"] == len(CONTENT)
+    assert entry["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+    # Manifeste relu depuis le disque (écrit en fin de lot): If-None-Match -> 304
+    downloader.manifest.flush()
+    reloaded = download.NOAADataDownloader(base_path=str(tmp_path))
+    try:
+        assert reloaded._download_file_with_progress(url, output) == download.UNCHANGED
+    finally:
+        reloaded.session.close()
+    assert http_server.requests[-1]["If-None-Match"] == '"v1"'
+
+    # Nouvelle version côté serveur: téléchargée à nouveau
+    http_server.publish("/data.csv", CONTENT + b"fin\n", '"v2"')
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    assert output.read_bytes() == CONTENT + b"fin\n"
+    assert downloader.manifest.get(output)["etag"] == '"v2"'
+
+
+def test_partial_download_is_resumed_with_range(download, downloader, http_server, tmp_path):
+    http_server.publish("/data.csv", CONTENT, '"v1"')
+    url, output = f"{http_server.url}/data.csv", tmp_path / "data.csv"
+    part = tmp_path / "data.csv.part"
+    part.write_bytes(CONTENT[:5000])
+    downloader.manifest.record_partial(output, url, '"v1"', None)
+
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    request = http_server.requests[-1]
+    assert request["Range"] == "bytes=5000-" and request["If-Range"] == '"v1"'
+    assert output.read_bytes() == CONTENT and not part.exists()
+    assert downloader.manifest.get(output)["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_changed_file_restarts_from_scratch(download, downloader, http_server, tmp_path):
+    http_server.publish("/data.csv", CONTENT, '"v2"')
+    url, output = f"{http_server.url}/data.csv", tmp_path / "data.csv"
+    (tmp_path / "data.csv.part").write_bytes(b"ancienne version tronquee")
+    downloader.manifest.record_partial(output, url, '"v1"', None)
+
+    # If-Range ne correspond plus: le serveur renvoie tout le fichier (200)
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    assert output.read_bytes() == CONTENT
+
+
+def test_failed_download_never_exposes_a_truncated_file(download, downloader, http_server, tmp_path):
+    output = tmp_path / "absent.csv"
+    assert downloader._download_file_with_progress(f"{http_server.url}/absent.csv", output) == download.FAILED
+    assert not output.exists()
+
+
+def test_complete_part_file_is_downloaded_again_after_416(download, downloader, http_server, tmp_path):
+    http_server.publish("/data.csv", CONTENT, '"v1"')
+    url, output = f"{http_server.url}/data.csv", tmp_path / "data.csv"
+    # Arrêt après la dernière écriture, avant le renommage
+    (tmp_path / "data.csv.part").write_bytes(CONTENT)
+    downloader.manifest.record_partial(output, url, '"v1"', None)
+
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    first, second = http_server.requests[-2:]
+    assert first["Range"] == f"bytes={len(CONTENT)}-"
+    assert "Range" not in second and "If-Range" not in second
+    assert output.read_bytes() == CONTENT and not (tmp_path / "data.csv.part").exists()
+
+
+def test_corrupted_local_file_is_downloaded_again(download, downloader, http_server, tmp_path):
+    http_server.publish("/data.csv", CONTENT, '"v1"')
+    url, output = f"{http_server.url}/data.csv", tmp_path / "data.csv"
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    assert downloader.manifest.is_complete(output)
+
+    # Même taille, contenu altéré: le SHA-256 ne correspond plus
+    output.write_bytes(CONTENT.replace(b"ligne 7\n", b"ligne X\n"))
+    assert not downloader.manifest.is_complete(output)
+    assert downloader._download_file_with_progress(url, output) == download.DOWNLOADED
+    assert "If-None-Match" not in http_server.requests[-1]
+    assert output.read_bytes() == CONTENT
+
+
+def test_manifest_writes_are_batched(ingestion, tmp_path, monkeypatch):
+    manifest_module = ingestion("download_manifest")
+    manifest = manifest_module.DownloadManifest(tmp_path / "manifest.json", save_interval=60)
+    saves = []
+    save = manifest.save
+    monkeypatch.setattr(manifest, "save", lambda: saves.append(1) or save())
+
+    for i in range(50):
+        output = tmp_path / f"{i}.csv"
+        manifest.record_partial(output, f"http://noaa/{i}.csv", f'"{i}"', None)
+        manifest.record_complete(output, f"http://noaa/{i}.csv", 10, "0" * 64, f'"{i}"', None)
+    assert len(saves) == 1
+    manifest.flush()
+    assert len(saves) == 2
+    manifest.flush()
+    assert len(saves) == 2
+
+    reloaded = manifest_module.DownloadManifest(tmp_path / "manifest.json")
+    assert reloaded.get(tmp_path / "49.csv")["etag"] == '"49"'
+
+
+def test_content_range_total(download):
+    total = download.NOAADataDownloader._content_range_total
+    assert total("bytes 5000-16889/16890") == 16890
+    assert total("bytes 0-9/*") is None and total(None) is None
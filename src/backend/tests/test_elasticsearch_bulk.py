@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+from app.core.config import settings
+from app.services import elasticsearch_service
+from app.services.elasticsearch_service import ElasticsearchService
+
+
+class FakeBulk:
+    """Remplace helpers.async_streaming_bulk: rejette en 429 les identifiants demandés, une fois chacun"""
+
+    def __init__(self, throttled=(), errors=()):
+        self.throttled = set(throttled)
+        self.errors = set(errors)
+        self.requests = []
+        self.sources = {}
+
+    async def __call__(self, client, actions, chunk_size, raise_on_error, raise_on_exception):
+        self.requests.append([action["_id"] for action in actions])
+        self.sources.update({action["_id"]: action["_source"] for action in actions})
+        for action in actions:
+            doc_id = action["_id"]
+            if doc_id in self.throttled:
+                self.throttled.discard(doc_id)
+                yield False, {"index": {"_id": doc_id, "status": 429, "error": "es_rejected_execution_exception"}}
+            elif doc_id in self.errors:
+                yield False, {"index": {"_id": doc_id, "status": 400, "error": "mapper_parsing_exception"}}
+            else:
+                yield True, {"index": {"_id": doc_id, "status": 201}}
+
+
+def observation(station, day, hour, temperature):
+    return {"station_id": station, "timestamp": datetime(2024, 1, day, hour), "temperature": temperature}
+
+
+def bulk_service(monkeypatch, fake):
+    service = ElasticsearchService()
+    service.is_connected = True
+    service._indices_ready = True
+    monkeypatch.setattr(elasticsearch_service.helpers, "async_streaming_bulk", fake)
+    monkeypatch.setattr(settings, "ES_BULK_INITIAL_BACKOFF", 0.0)
+    return service
+
+
+def test_one_document_per_station_and_day(monkeypatch):
+    """Plusieurs observations du même jour: la dernière du lot est indexée"""
+    fake = FakeBulk()
+    service = bulk_service(monkeypatch, fake)
+    documents = [observation("A", 1, 6, 1.0), observation("A", 1, 18, 3.0), observation("A", 2, 6, 5.0), observation("B", 1, 6, 7.0)]
+
+    result = asyncio.run(service.bulk_index_weather_data(documents))
+
+    assert result["indexed"] == 3 and result["failed"] == 0 and result["replaced"] == 1
+    assert sorted(fake.sources) == ["A-20240101", "A-20240102", "B-20240101"]
+    assert fake.sources["A-20240101"]["temperature"] == 3.0
+
+
+def test_throttled_documents_are_resent(monkeypatch):
+    """Seuls les documents rejetés en 429 repartent; les autres erreurs sont des échecs"""
+    fake = FakeBulk(throttled={"A-20240102"}, errors={"B-20240101"})
+    service = bulk_service(monkeypatch, fake)
+    documents = [observation("A", 1, 6, 1.0), observation("A", 2, 6, 5.0), observation("B", 1, 6, 7.0)]
+
+    result = asyncio.run(service.bulk_index_weather_data(documents))
+
+    assert result["indexed"] == 2 and result["failed"] == 1
+    assert fake.requests[-1] == ["A-20240102"]
+    assert len(fake.requests) == 2
+
+
+def test_persistent_throttling_gives_up(monkeypatch):
+    """Après ES_BULK_MAX_RETRIES renvois, les documents encore rejetés sont comptés en échec"""
+
+    class AlwaysThrottled(FakeBulk):
+        async def __call__(self, client, actions, **kwargs):
+            self.requests.append([action["_id"] for action in actions])
+            for action in actions:
+                yield False, {"index": {"_id": action["_id"], "status": 429}}
+
+    fake = AlwaysThrottled()
+    service = bulk_service(monkeypatch, fake)
+    monkeypatch.setattr(settings, "ES_BULK_MAX_RETRIES", 2)
+
+    result = asyncio.run(service.bulk_index_weather_data([observation("A", 1, 6, 1.0)]))
+
+    assert result["indexed"] == 0 and result["failed"] == 1
+    assert len(fake.requests) == 3
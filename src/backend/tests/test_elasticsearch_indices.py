@@ -0,0 +1,47 @@
+import asyncio
+
+from app.services.elasticsearch_service import ElasticsearchService
+
+
+class FakeIndices:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.created = []
+
+    async def exists(self, index):
+        await asyncio.sleep(0.01)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("elasticsearch indisponible")
+        return index in self.created
+
+    async def create(self, index, body):
+        self.created.append(index)
+
+
+class FakeClient:
+    def __init__(self, failures: int = 0):
+        self.indices = FakeIndices(failures)
+
+
+def test_concurrent_calls_create_indices_once():
+    service = ElasticsearchService()
+    service.es = FakeClient()
+
+    async def run():
+        await asyncio.gather(*[service._ensure_indices() for _ in range(10)])
+
+    asyncio.run(run())
+    assert service.es.indices.created == ["weather_data", "weather_events"]
+
+
+def test_failed_creation_is_retried():
+    service = ElasticsearchService()
+    service.es = FakeClient(failures=1)
+
+    asyncio.run(service._ensure_indices())
+    assert not service._indices_ready and service.es.indices.created == []
+
+    asyncio.run(service._ensure_indices())
+    assert service._indices_ready
+    assert service.es.indices.created == ["weather_data", "weather_events"]
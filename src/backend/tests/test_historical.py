@@ -0,0 +1,94 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.schemas.weather import DAILY, MONTHLY
+from app.services.elasticsearch_service import ElasticsearchService
+from app.services.parquet_service import ParquetService
+from app.services.weather_service import ES, PARQUET, ROLLUPS, WeatherService
+
+START = date(2019, 11, 20)
+DAYS = 500
+
+
+@pytest.fixture
+def daily_path(tmp_path):
+    """Partitions year/month de deux stations sur DAYS jours"""
+    days = [START + timedelta(days=i) for i in range(DAYS)]
+    df = pd.DataFrame({
+        "station_id": ["A"] * DAYS + ["B"] * DAYS,
+        "date": days * 2,
+        "temperature": [float(i % 30) for i in range(2 * DAYS)],
+        "temperature_max": 30.0,
+        "temperature_min": 0.0,
+        "precipitation": 1.0,
+        "wind_speed": 2.0,
+        "wind_direction": 90.0
+    })
+    df["year"] = [d.year for d in df["date"]]
+    df["month"] = [d.month for d in df["date"]]
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), tmp_path, partition_cols=["year", "month"])
+    return tmp_path
+
+
+def test_parquet_pages_cover_the_range_once(daily_path):
+    service = ParquetService()
+    service.daily_path = daily_path
+    start, end = datetime(2020, 1, 1), datetime(2020, 12, 31)
+
+    async def read_all():
+        dates, before, pages = [], None, 0
+        while True:
+            rows, before = await service.get_daily_observations_page("A", start, end, 100, before)
+            dates.extend(row["date"] for row in rows)
+            pages += 1
+            if before is None:
+                return dates, pages
+
+    dates, pages = asyncio.run(read_all())
+    expected = [date(2020, 12, 31) - timedelta(days=i) for i in range(366)]
+    assert [pd.Timestamp(d).date() for d in dates] == expected
+    assert pages == 4
+
+
+def test_parquet_cursor_round_trip():
+    cursor = WeatherService.cursor_source
+    assert cursor(None) == (None, None)
+    parquet = ElasticsearchService.encode_cursor([PARQUET, "2020-03-01"])
+    assert cursor(parquet) == (PARQUET, date(2020, 3, 1))
+    assert cursor(ElasticsearchService.encode_cursor([1583020800000, "A"])) == (ES, None)
+    with pytest.raises(ValueError):
+        cursor(ElasticsearchService.encode_cursor([PARQUET, "mars"]))
+
+
+def test_rollups_only_in_aggregate_mode(monkeypatch):
+    service = WeatherService()
+    monkeypatch.setattr(service, "_available", lambda source: True)
+    end = datetime.utcnow()
+    long_range = (end - timedelta(days=3 * 365), end)
+    assert ROLLUPS not in service.route_historical(*long_range)
+    assert service.route_historical(*long_range, aggregate=True) == [ROLLUPS]
+    old = (datetime(2001, 1, 1), datetime(2005, 1, 1))
+    assert service.route_historical(*old) == [PARQUET, ES]
+
+
+def test_points_carry_their_granularity(daily_path, monkeypatch):
+    service = WeatherService()
+    service.parquet_service.daily_path = daily_path
+
+    async def monthly_series(start_date, end_date, location):
+        return [{
+            "year": 2020, "month": 1, "temp_sum": 62.0, "temp_count": 31,
+            "wind_sum": 0.0, "wind_count": 0, "precip_sum": 0.0, "precip_count": 0
+        }]
+
+    monkeypatch.setattr(service.hadoop_service, "get_monthly_series", monthly_series)
+    start, end = datetime(2020, 1, 1), datetime(2020, 1, 31)
+    daily, _ = asyncio.run(service._historical_from(PARQUET, "A", start, end, 100))
+    monthly, _ = asyncio.run(service._historical_from(ROLLUPS, "A", start, end, 100))
+    assert len(daily) == 31 and {record.granularity for record in daily} == {DAILY}
+    assert [(record.granularity, record.temperature) for record in monthly] == [(MONTHLY, 2.0)]
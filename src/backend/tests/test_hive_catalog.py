@@ -0,0 +1,23 @@
+def test_written_partitions_are_declared(ingestion, tmp_path):
+    catalog = ingestion("hive_catalog").HiveCatalog
+    for year, month in [(2019, 12), (2020, 1), (2020, 2), (2021, 1)]:
+        (tmp_path / f"year={year}" / f"month={month}").mkdir(parents=True)
+
+    specs = catalog.partitions(str(tmp_path), ["year", "month"], [2020, 2021])
+    assert specs == [
+        [("year", 2020), ("month", 1)],
+        [("year", 2020), ("month", 2)],
+        [("year", 2021), ("month", 1)]
+    ]
+    assert catalog.add_partitions_sql("noaa_weather.daily_observations", specs[:2]) == (
+        "ALTER TABLE noaa_weather.daily_observations ADD IF NOT EXISTS "
+        "PARTITION (year=2020, month=1) PARTITION (year=2020, month=2)"
+    )
+    assert catalog.partitions(str(tmp_path), ["year"], [2019]) == [[("year", 2019)]]
+
+
+def test_unreachable_hive_is_not_fatal(ingestion, tmp_path):
+    hive_catalog = ingestion("hive_catalog")
+    (tmp_path / "year=2020").mkdir()
+    catalog = hive_catalog.HiveCatalog(host="127.0.0.1", port=1)
+    assert catalog.register("noaa_weather.monthly_rollup", str(tmp_path), ["year"], [2020]) == 0
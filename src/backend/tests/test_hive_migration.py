@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+
+import migrate_hive_tables
+from app.services.hadoop_service import HadoopService
+
+
+class FakeCursor:
+    def __init__(self, hive):
+        self.hive = hive
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.hive.executed.append(sql)
+        if sql.startswith("DESCRIBE FORMATTED"):
+            table = sql.split()[-1]
+            if table not in self.hive.tables:
+                raise RuntimeError(f"Table not found {table}")
+            self.rows = [("# Detailed Table Information", None), ("Table Type:", f"{self.hive.tables[table]}  ")]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeHive:
+    """Métastore réduit au type de chaque table"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.executed = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def service(hive):
+    service = HadoopService.__new__(HadoopService)
+    service.pool = hive
+    service.is_connected = True
+    service._run_sync = lambda statements: hive.executed.extend(sql for sql, _ in statements)
+    service._create_tables = lambda: hive.executed.append("CREATE TABLES")
+    return service
+
+
+def test_managed_tables_are_copied_and_set_aside():
+    hive = FakeHive({
+        "noaa_weather.daily_observations": "MANAGED_TABLE",
+        "noaa_weather.monthly_rollup": "EXTERNAL_TABLE"
+    })
+    managed = migrate_hive_tables.migrate(service(hive))
+
+    assert managed == ["noaa_weather.daily_observations"]
+    changes = [sql for sql in hive.executed if not sql.startswith("DESCRIBE")]
+    assert changes[2] == (
+        "INSERT INTO TABLE noaa_weather.api_observations PARTITION (year, month) "
+        "SELECT station_id, date, temperature, temperature_max, temperature_min, "
+        "precipitation, snow_depth, wind_speed, wind_direction, year, month "
+        "FROM noaa_weather.daily_observations"
+    )
+    # Recopie avant renommage, tables externes créées avant la réparation
+    assert changes[3:] == [
+        "ALTER TABLE noaa_weather.daily_observations RENAME TO noaa_weather.daily_observations_managed",
+        "CREATE TABLES",
+        "MSCK REPAIR TABLE noaa_weather.daily_observations",
+        "MSCK REPAIR TABLE noaa_weather.monthly_rollup",
+        "MSCK REPAIR TABLE noaa_weather.seasonal_rollup"
+    ]
+
+
+def test_external_tables_are_only_repaired():
+    hive = FakeHive({table: "EXTERNAL_TABLE" for table in migrate_hive_tables.EXTERNAL_TABLES})
+    assert migrate_hive_tables.migrate(service(hive)) == []
+    assert [sql for sql in hive.executed if not sql.startswith("DESCRIBE")] == [
+        f"MSCK REPAIR TABLE {table}" for table in migrate_hive_tables.EXTERNAL_TABLES
+    ]
+
+
+def test_dry_run_changes_nothing():
+    hive = FakeHive({"noaa_weather.seasonal_rollup": "MANAGED_TABLE"})
+    assert migrate_hive_tables.migrate(service(hive), dry_run=True) == ["noaa_weather.seasonal_rollup"]
+    assert all(sql.startswith("DESCRIBE") for sql in hive.executed)
+
+
+def test_api_writes_go_to_their_own_table():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    hive = FakeHive({})
+    hadoop = service(hive)
+    hadoop.executor = ThreadPoolExecutor(max_workers=1)
+    statements = []
+    hadoop._run_sync = statements.extend
+    row = {"station_id": "071560-99999", "date": "2024-03-02", "temperature": 8.5}
+
+    assert asyncio.run(hadoop.save_weather_batch([row])) == []
+    hadoop.executor.shutdown()
+    sql, params = statements[0]
+    assert "INSERT INTO TABLE noaa_weather.api_observations" in sql
+    assert params[:3] == (2024, 3, "071560-99999")
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.db.session import HiveConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        if not self.connection.alive:
+            raise ConnectionError("connexion perdue")
+        self.connection.executed.append(sql)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Connexion DB-API minimale: cursor(), close()"""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    def __init__(self):
+        self.connections = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+
+def test_connections_are_reused():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert len(driver.connections) == 1
+
+
+def test_pool_is_bounded_and_times_out():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=2, timeout=0.1)
+    with pool.connection(), pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    assert len(driver.connections) == 2
+
+
+def test_waiting_caller_gets_the_released_connection():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=1, timeout=5)
+    borrowed = []
+
+    def worker():
+        with pool.connection() as conn:
+            borrowed.append(conn)
+
+    with pool.connection() as first:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        time.sleep(0.05)
+        assert borrowed == []
+    thread.join()
+    assert borrowed == [first] and len(driver.connections) == 1
+
+
+def test_connection_is_checked_after_an_error_and_replaced_if_dead():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.alive = False
+            raise ValueError("requête en erreur")
+
+    with pool.connection() as replacement:
+        assert replacement is not conn
+    assert conn.closed and len(driver.connections) == 2
+
+
+def test_idle_connection_is_health_checked():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=1, health_check_interval=0.0)
+    with pool.connection() as conn:
+        pass
+    with pool.connection() as again:
+        assert again is conn
+    assert conn.executed == ["SELECT 1"]
+
+
+def test_close_closes_idle_connections_and_refuses_new_loans():
+    driver = FakeDriver()
+    pool = HiveConnectionPool(driver.connect, size=2)
+    with pool.connection() as busy:
+        with pool.connection() as idle:
+            pass
+        pool.close()
+        assert idle.closed and not busy.closed
+    assert busy.closed
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
+
+
+def test_hadoop_service_reconnects_with_backoff(monkeypatch):
+    from app.core.config import settings
+    from app.services import hadoop_service
+
+    attempts = []
+    reachable = threading.Event()
+
+    def new_connection():
+        attempts.append(time.monotonic())
+        if not reachable.is_set():
+            raise ConnectionError("Hive injoignable")
+        return FakeConnection()
+
+    monkeypatch.setattr(hadoop_service.HadoopService, "_new_connection", staticmethod(new_connection))
+    monkeypatch.setattr(settings, "HIVE_RECONNECT_INITIAL_BACKOFF", 60.0)
+    service = hadoop_service.HadoopService()
+    assert not service.is_connected and len(attempts) == 1
+
+    async def run():
+        assert not await service.reconnect()
+        assert len(attempts) == 2
+        # Délai de 60 s pas encore écoulé: aucune nouvelle tentative
+        assert not await service.reconnect()
+        assert len(attempts) == 2 and service._backoff == 120.0
+
+        reachable.set()
+        service._retry_at = 0.0
+        assert await service.reconnect()
+        assert service._backoff == 60.0
+
+    try:
+        asyncio.run(run())
+    finally:
+        service.close()
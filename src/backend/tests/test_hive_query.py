@@ -0,0 +1,50 @@
+from datetime import date
+
+from app.services.hadoop_service import HiveQuery
+
+
+def test_single_year_prunes_to_its_partitions():
+    sql, params = HiveQuery("t", "*").year(2020).build()
+    assert sql == "SELECT * FROM t WHERE year = %s" and params == [2020]
+    assert HiveQuery("t", "*").year(2020).partition_count == 12
+    assert HiveQuery("t", "*", partition_columns=("year",)).year(2020).partition_count == 1
+
+
+def test_month_range_within_a_year():
+    query = HiveQuery("t", "*").month_range(date(2020, 3, 15), date(2020, 5, 2))
+    assert query.build() == ("SELECT * FROM t WHERE year = %s AND month BETWEEN %s AND %s", [2020, 3, 5])
+    assert query.partition_count == 3
+
+
+def test_month_range_across_years():
+    query = HiveQuery("t", "*").month_range(date(2018, 11, 1), date(2021, 2, 28))
+    sql, params = query.build()
+    assert sql == (
+        "SELECT * FROM t WHERE ((year = %s AND month >= %s) OR (year BETWEEN %s AND %s) "
+        "OR (year = %s AND month <= %s))"
+    )
+    assert params == [2018, 11, 2019, 2020, 2021, 2]
+    assert query.partition_count == 28
+
+    # Années consécutives: pas de bloc d'années pleines
+    sql, params = HiveQuery("t", "*").month_range(date(2019, 12, 1), date(2020, 1, 31)).build()
+    assert "BETWEEN" not in sql and params == [2019, 12, 2020, 1]
+
+
+def test_month_range_on_a_year_partitioned_table():
+    query = HiveQuery("rollup", "*", partition_columns=("year",)).month_range(date(2019, 6, 1), date(2020, 2, 1))
+    sql, params = query.build()
+    assert sql.startswith("SELECT * FROM rollup WHERE year BETWEEN %s AND %s AND ")
+    assert params == [2019, 2020, 201906, 202002]
+    assert query.partition_count == 2
+
+
+def test_date_range_adds_partition_predicates_and_day_filter():
+    query = HiveQuery("daily", "AVG(temperature)").date_range(date(2020, 1, 10), date(2020, 2, 5))
+    query.where("station_id = %s", "A")
+    sql, params = query.build()
+    assert sql == (
+        "SELECT AVG(temperature) FROM daily WHERE year = %s AND month BETWEEN %s AND %s "
+        "AND date BETWEEN %s AND %s AND station_id = %s"
+    )
+    assert params == [2020, 1, 2, "2020-01-10", "2020-02-05", "A"]
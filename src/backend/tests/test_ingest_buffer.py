@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.schemas.weather import WeatherCreate
+from app.services.ingest_buffer import BufferFull, IngestBuffer
+
+
+class FakeHadoop:
+    """Hive joignable ou non; reconnect() suit simplement is_connected"""
+
+    def __init__(self, connected=True):
+        self.is_connected = connected
+        self.reconnects = 0
+        self.rows = []
+
+    async def reconnect(self):
+        self.reconnects += 1
+        return self.is_connected
+
+    async def save_weather_batch(self, rows):
+        self.rows.extend(rows)
+        return []
+
+
+class FakeElasticsearch:
+    is_connected = True
+
+    def __init__(self):
+        self.documents = []
+
+    async def bulk_index_weather_data(self, documents):
+        self.documents.extend(documents)
+        return {"indexed": len(documents), "failed": 0}
+
+
+def observation(i: int) -> WeatherCreate:
+    return WeatherCreate(
+        location="Paris",
+        station_id="071560-99999",
+        temperature=float(i),
+        timestamp=datetime(2024, 1, 1 + i % 28)
+    )
+
+
+@pytest.fixture
+def buffer(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_SPILL_PATH", str(tmp_path / "spill.ndjson"))
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 1000)
+    monkeypatch.setattr(settings, "INGEST_MAX_PENDING", 10)
+    return IngestBuffer(FakeHadoop(), FakeElasticsearch())
+
+
+def test_hive_outage_indexes_es_and_spills_to_disk(buffer):
+    buffer.hadoop_service.is_connected = False
+
+    async def run():
+        # Bien au-delà de INGEST_MAX_PENDING: le tampon ne se remplit pas
+        for start in range(0, 30, 3):
+            await buffer.add([observation(i) for i in range(start, start + 3)])
+            result = await buffer.flush()
+            assert result == {"hive_written": 0, "es_indexed": 3, "spilled": 3}
+            assert buffer.pending == 0
+
+        # Rien de nouveau: ni réindexation, ni nouveau dépôt
+        assert await buffer.flush() == {"hive_written": 0, "es_indexed": 0, "spilled": 0}
+        assert len(buffer.es_service.documents) == 30
+
+        buffer.hadoop_service.is_connected = True
+        await buffer.add([observation(30)])
+        result = await buffer.flush()
+        assert result == {"hive_written": 31, "es_indexed": 1, "spilled": 0}
+        await buffer.close()
+
+    asyncio.run(run())
+    assert len(buffer.hadoop_service.rows) == 31 and buffer.pending == 0
+    assert len(buffer.es_service.documents) == 31
+    assert buffer.counters["spilled"] == 30 and buffer.counters["reloaded"] == 30
+    assert not buffer.spill_path.exists()
+
+
+def test_failed_partitions_are_spilled_once(buffer):
+    async def save_weather_batch(rows):
+        return [row for row in rows if row["date"].month == 2]
+
+    buffer.hadoop_service.save_weather_batch = save_weather_batch
+    february = observation(0).model_copy(update={"timestamp": datetime(2024, 2, 1)})
+
+    async def run():
+        await buffer.add([observation(0), february])
+        result = await buffer.flush()
+        assert result == {"hive_written": 1, "es_indexed": 2, "spilled": 1}
+        assert buffer.pending == 0
+        assert sum(1 for _ in buffer.spill_path.open()) == 1
+
+    asyncio.run(run())
+
+
+def test_cache_is_invalidated_by_station_id(buffer, monkeypatch):
+    calls = []
+    monkeypatch.setattr(result_cache, "invalidate_station", calls.append)
+
+    async def run():
+        await buffer.add([observation(0)])
+        await buffer.flush()
+        await buffer.close()
+
+    asyncio.run(run())
+    assert calls == ["071560-99999"]
+
+
+def test_spill_is_drained_batch_by_batch(buffer, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 10)
+    with buffer.spill_path.open("w", encoding="utf-8") as spill:
+        for i in range(16):
+            spill.write(observation(i).model_dump_json() + "\n")
+
+    async def run():
+        buffer.start()
+        assert buffer.pending == 0
+        await buffer.add([observation(0)])
+        assert await buffer.flush() == {"hive_written": 10, "es_indexed": 1, "spilled": 0}
+        assert sum(1 for _ in buffer.spill_path.open()) == 7
+        assert await buffer.flush() == {"hive_written": 7, "es_indexed": 0, "spilled": 0}
+        await buffer.close()
+
+    asyncio.run(run())
+    assert len(buffer.hadoop_service.rows) == 17
+    # Observations reprises du dépôt: déjà indexées lors de leur premier vidage
+    assert len(buffer.es_service.documents) == 1
+    assert not buffer.spill_path.exists()
+
+
+def test_buffer_full_while_hive_writes_are_pending(buffer):
+    async def run():
+        await buffer.add([observation(i) for i in range(10)])
+        with pytest.raises(BufferFull):
+            await buffer.add([observation(0)])
+        await buffer.close()
+
+    asyncio.run(run())
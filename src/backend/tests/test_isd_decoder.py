@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+ISD_COLUMNS = ["STATION", "DATE", "LATITUDE", "LONGITUDE", "ELEVATION", "REPORT_TYPE", "TMP", "DEW", "SLP", "WND", "VIS", "AA1"]
+
+# TMP, DEW, SLP, WND, VIS, AA1 bruts et valeurs décodées attendues
+CASES = [
+    (
+        ("+0123,1", "+0045,1", "10132,1", "250,1,N,0046,1", "016093,1,N,1", "01,0025,9,1"),
+        {"temperature": 12.3, "dew_point": 4.5, "sea_level_pressure": 1013.2, "wind_direction": 250.0,
+         "wind_type": "N", "wind_speed": 4.6, "visibility": 16093.0, "precip_period_hours": 1.0, "precipitation": 2.5}
+    ),
+    # Sentinelles 99999/999/9999/999999: valeurs nulles, le reste du champ est lu
+    (
+        ("-0056,5", "-0100,1", "99999,9", "999,9,C,0000,1", "999999,9,9,9", "06,9999,9,9"),
+        {"temperature": -5.6, "dew_point": -10.0, "sea_level_pressure": None, "wind_direction": None,
+         "wind_type": "C", "wind_speed": 0.0, "visibility": None, "precip_period_hours": 6.0, "precipitation": None}
+    ),
+    # +9999 signé, AA1 absent
+    (
+        ("+9999,9", "+9999,9", "10087,2", "090,1,N,9999,9", "000800,1,N,1", None),
+        {"temperature": None, "dew_point": None, "sea_level_pressure": None, "wind_direction": 90.0,
+         "wind_type": "N", "wind_speed": None, "visibility": 800.0, "precip_period_hours": None, "precipitation": None}
+    ),
+    # Codes qualité suspects (2, 6) et erronés (3, 7): mesures rejetées
+    (
+        ("+0250,3", "+0120,7", "10200,1", "180,2,N,0031,7", "012000,6,N,1", "12,0102,9,3"),
+        {"temperature": None, "dew_point": None, "sea_level_pressure": 1020.0, "wind_direction": None,
+         "wind_type": "N", "wind_speed": None, "visibility": None, "precip_period_hours": 12.0, "precipitation": None}
+    )
+]
+
+
+def isd_frame(spark, cases, columns=ISD_COLUMNS):
+    rows = [
+        ("01001099999", "2020-01-01T0%d:00:00" % i, "70.9333", "-8.6667", "9.0", "FM-12 ", *fields)
+        for i, (fields, _) in enumerate(cases)
+    ]
+    return spark.createDataFrame(rows, ISD_COLUMNS).select(*columns)
+
+
+def assert_decoded(row, expected):
+    for column, value in expected.items():
+        if value is None:
+            assert row[column] is None, column
+        elif isinstance(value, str):
+            assert row[column] == value, column
+        else:
+            assert row[column] == pytest.approx(value, abs=1e-4), column
+
+
+def test_known_fields_are_decoded(ingestion, spark):
+    decode_isd_spark = ingestion("isd_decoder").decode_isd_spark
+    rows = decode_isd_spark(isd_frame(spark, CASES)).orderBy("timestamp").collect()
+
+    assert len(rows) == len(CASES)
+    for row, (_, expected) in zip(rows, CASES):
+        assert_decoded(row, expected)
+    first = rows[0]
+    assert first["station"] == "01001099999" and first["report_type"] == "FM-12"
+    assert first["timestamp"] == datetime(2020, 1, 1, 0, 0)
+    assert first["latitude"] == pytest.approx(70.9333, abs=1e-4)
+    assert (first["temperature_quality"], first["wind_speed_quality"], first["precipitation_quality"]) == ("1", "1", "1")
+
+
+def test_missing_optional_field_is_null(ingestion, spark):
+    decode_isd_spark = ingestion("isd_decoder").decode_isd_spark
+    frame = isd_frame(spark, CASES[:1], [column for column in ISD_COLUMNS if column != "AA1"])
+    row = decode_isd_spark(frame).collect()[0]
+
+    assert row["precipitation"] is None and row["precip_period_hours"] is None
+    assert_decoded(row, {key: value for key, value in CASES[0][1].items() if not key.startswith("precip")})
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.services.quantile_sketch import KLLSketch
+
+RANKS = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def true_ranks(data: np.ndarray, values):
+    """Rang normalisé de chaque valeur: part des données inférieures ou égales"""
+    data = np.sort(data)
+    return np.searchsorted(data, values, side="right") / len(data)
+
+
+def serialize(sketch: KLLSketch):
+    items = [value for level in sketch.levels for value in level]
+    levels = np.cumsum([0] + [len(level) for level in sketch.levels]).tolist()
+    return items, levels
+
+
+def test_small_sketch_is_exact():
+    rng = np.random.default_rng(0)
+    data = rng.normal(10, 5, 150)
+    sketch = KLLSketch(k=200)
+    for value in data:
+        sketch.update(value)
+
+    assert not sketch.compacted and sketch.rank_error == 0.0
+    ordered = np.sort(data)
+    expected = [ordered[max(int(np.ceil(r * len(data))) - 1, 0)] for r in RANKS]
+    assert sketch.quantiles(RANKS) == expected
+    assert KLLSketch().quantiles([0.5]) == [None]
+
+
+def test_rank_error_is_bounded_after_updates():
+    rng = np.random.default_rng(1)
+    data = rng.gamma(2.0, 3.0, 100_000)
+    sketch = KLLSketch(k=200)
+    for value in data:
+        sketch.update(value)
+
+    assert sketch.compacted and sketch.n == len(data)
+    assert sketch._size() <= sketch._max_size()
+    values = sketch.quantiles(RANKS)
+    errors = np.abs(true_ranks(data, values) - np.array(RANKS))
+    assert errors.max() <= sketch.rank_error
+    # Les extrêmes ne sont pas conservés tels quels, seulement à rank_error près
+    assert data.min() <= values[0] and values[-1] <= data.max()
+
+
+def test_serialized_sketches_merge_within_rank_error():
+    rng = np.random.default_rng(2)
+    parts = [rng.normal(mean, 4, 20_000) for mean in (0, 5, 15, 30)]
+    serialized = []
+    for seed, part in enumerate(parts):
+        sketch = KLLSketch(k=200, seed=seed)
+        for value in part:
+            sketch.update(value)
+        serialized.append(serialize(sketch))
+
+    merged = KLLSketch.merged(serialized)
+    data = np.concatenate(parts)
+    assert merged.n == len(data)
+    values = merged.quantiles(RANKS[1:-1])
+    errors = np.abs(true_ranks(data, values) - np.array(RANKS[1:-1]))
+    assert errors.max() <= merged.rank_error
+
+    restored = KLLSketch.from_serialized(*serialized[0])
+    assert restored.n == len(parts[0])
+    assert restored.quantiles([0.5])[0] == pytest.approx(np.median(parts[0]), abs=0.2)
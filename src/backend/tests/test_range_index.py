@@ -0,0 +1,179 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.range_index import RangeIndex
+
+STATIONS = ["071560-99999", "725030-14732"]
+
+
+def daily_observations(seed: int) -> pd.DataFrame:
+    """Relevés journaliers aléatoires, avec jours manquants et mesures absentes"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for station in STATIONS:
+        days = pd.date_range("2019-11-03", "2021-02-17", freq="D")
+        days = days[rng.random(len(days)) > 0.1]
+        temperature = rng.normal(12, 8, len(days)).round(1)
+        frame = pd.DataFrame({
+            "station_id": station,
+            "date": days.date,
+            "temperature": temperature,
+            "temperature_max": temperature + rng.uniform(0, 6, len(days)).round(1),
+            "temperature_min": temperature - rng.uniform(0, 6, len(days)).round(1),
+            "precipitation": rng.exponential(2, len(days)).round(1),
+            "wind_speed": rng.uniform(0, 15, len(days)).round(1)
+        })
+        for column in ("temperature", "temperature_max", "temperature_min", "precipitation", "wind_speed"):
+            frame.loc[rng.random(len(days)) < 0.15, column] = np.nan
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_partitions(root, df: pd.DataFrame):
+    dates = pd.to_datetime(df["date"])
+    for (year, month), rows in df.groupby([dates.dt.year, dates.dt.month]):
+        directory = root / f"year={year}" / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), directory / "part-0.parquet")
+
+
+def brute_force(df: pd.DataFrame, station: str, start: datetime, end: datetime):
+    rows = df[(df["station_id"] == station) & (df["date"] >= start.date()) & (df["date"] <= end.date())]
+    if rows["temperature"].count() == 0:
+        return {}
+    return {
+        "average_temperature": rows["temperature"].mean(),
+        "maximum_temperature": rows["temperature_max"].max(),
+        "minimum_temperature": rows["temperature_min"].min(),
+        "total_precipitation": rows["precipitation"].sum() if rows["precipitation"].count() else None,
+        "average_wind_speed": rows["wind_speed"].mean() if rows["wind_speed"].count() else None
+    }
+
+
+def assert_same_stats(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if value is None or np.isnan(value):
+            assert actual[name] is None, name
+        else:
+            assert actual[name] == pytest.approx(value, rel=1e-5, abs=1e-4), name
+
+
+@pytest.fixture
+def index(ingestion, tmp_path):
+    build_range_index = ingestion("build_range_index")
+    state = ingestion("import_state").ImportState(str(tmp_path / "state.json"))
+    builder = build_range_index.RangeIndexBuilder(str(tmp_path / "daily"), str(tmp_path / "index"), state=state)
+    return tmp_path / "daily", builder
+
+
+def test_build_tree_matches_brute_force(ingestion):
+    build_range_index = ingestion("build_range_index")
+    rng = np.random.default_rng(0)
+    for n in (1, 2, 7, 64, 101):
+        maxima = rng.normal(20, 5, n).astype("f4")
+        minima = rng.normal(0, 5, n).astype("f4")
+        maxima[rng.random(n) < 0.2] = np.nan
+        minima[rng.random(n) < 0.2] = np.nan
+        tree = build_range_index.build_tree(maxima, minima)
+        for lo in range(n):
+            for hi in range(lo + 1, n + 1):
+                maximum, minimum = RangeIndex._extremes(tree, lo, hi)
+                np.testing.assert_equal(maximum, np.nanmax(maxima[lo:hi]) if not np.isnan(maxima[lo:hi]).all() else np.nan)
+                np.testing.assert_equal(minimum, np.nanmin(minima[lo:hi]) if not np.isnan(minima[lo:hi]).all() else np.nan)
+
+
+def test_range_stats_match_brute_force(index, tmp_path):
+    daily_path, builder = index
+    df = daily_observations(1)
+    write_partitions(daily_path, df)
+    assert builder.build() == len(STATIONS)
+
+    range_index = RangeIndex(str(tmp_path / "index"))
+    rng = np.random.default_rng(2)
+    bounds = pd.date_range("2019-10-01", "2021-03-31", freq="D").to_pydatetime()
+    for _ in range(200):
+        start, end = sorted(rng.choice(bounds, 2))
+        station = STATIONS[rng.integers(len(STATIONS))]
+        assert_same_stats(range_index.get_weather_stats(station, start, end), brute_force(df, station, start, end))
+    assert range_index.get_weather_stats("inconnue", bounds[0], bounds[-1]) == {}
+
+
+def test_incremental_rebuild_rereads_changed_months(index, tmp_path):
+    daily_path, builder = index
+    df = daily_observations(3)
+    write_partitions(daily_path, df)
+    builder.build()
+
+    # Janvier 2020 réécrit pour la première station seulement
+    january = pd.to_datetime(df["date"]).dt.strftime("%Y-%m") == "2020-01"
+    df.loc[january & (df["station_id"] == STATIONS[0]), "temperature"] += 5
+    rewritten = daily_path / "year=2020" / "month=1" / "part-0.parquet"
+    pq.write_table(pa.Table.from_pandas(df[january], preserve_index=False), rewritten)
+    stat = rewritten.stat()
+    os.utime(rewritten, (stat.st_atime, stat.st_mtime + 10))
+    assert builder.build() == len(STATIONS)
+
+    range_index = RangeIndex(str(tmp_path / "index"))
+    for start, end in [("2019-12-15", "2020-02-10"), ("2020-01-01", "2020-01-31"), ("2019-11-01", "2021-02-28")]:
+        start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        for station in STATIONS:
+            assert_same_stats(range_index.get_weather_stats(station, start, end), brute_force(df, station, start, end))
+
+
+def rewrite(path, df: pd.DataFrame):
+    """Réécrit un fichier de partition en garantissant un changement de signature"""
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_station_missing_from_reread_month_is_cleared(index, tmp_path):
+    """Une station retirée d'un mois réécrit perd ses anciennes valeurs pour ce mois"""
+    daily_path, builder = index
+    df = daily_observations(4)
+    write_partitions(daily_path, df)
+    builder.build()
+
+    # Janvier 2020 réécrit sans la seconde station
+    january = pd.to_datetime(df["date"]).dt.strftime("%Y-%m") == "2020-01"
+    kept = df["station_id"] == STATIONS[0]
+    rewrite(daily_path / "year=2020" / "month=1" / "part-0.parquet", df[january & kept])
+    df = df[~january | kept]
+    assert builder.build() == len(STATIONS)
+
+    range_index = RangeIndex(str(tmp_path / "index"))
+    assert range_index.get_weather_stats(STATIONS[1], datetime(2020, 1, 1), datetime(2020, 1, 31)) == {}
+    for start, end in [("2019-12-15", "2020-02-10"), ("2019-11-01", "2021-02-28")]:
+        start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        for station in STATIONS:
+            assert_same_stats(range_index.get_weather_stats(station, start, end), brute_force(df, station, start, end))
+
+
+def test_deleted_partition_is_cleared_and_forgotten(index, ingestion, tmp_path):
+    """Un fichier supprimé est relu comme un mois vide puis retiré de l'état"""
+    daily_path, builder = index
+    df = daily_observations(5)
+    write_partitions(daily_path, df)
+    builder.build()
+
+    deleted = daily_path / "year=2020" / "month=6" / "part-0.parquet"
+    deleted.unlink()
+    df = df[pd.to_datetime(df["date"]).dt.strftime("%Y-%m") != "2020-06"]
+    assert builder.build() == len(STATIONS)
+
+    range_index = RangeIndex(str(tmp_path / "index"))
+    start, end = datetime(2020, 5, 20), datetime(2020, 7, 10)
+    for station in STATIONS:
+        assert range_index.get_weather_stats(station, datetime(2020, 6, 1), datetime(2020, 6, 30)) == {}
+        assert_same_stats(range_index.get_weather_stats(station, start, end), brute_force(df, station, start, end))
+
+    state = ingestion("import_state").ImportState(str(tmp_path / "state.json"))
+    assert state.removed_files("range_index", sorted(daily_path.glob("year=*/month=*/*.parquet"))) == []
+    assert builder.build() == 0
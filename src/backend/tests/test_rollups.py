@@ -0,0 +1,80 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.hadoop_service import merge_rollups, split_full_months
+
+
+def days(start: date, end: date):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def assert_partition(start: date, end: date):
+    """Mois complets et bords couvrent [start, end] exactement une fois"""
+    full, edges = split_full_months(start, end)
+    covered = []
+    if full is not None:
+        first, last = full
+        assert first.day == 1 and (last + timedelta(days=1)).day == 1
+        covered += days(first, last)
+    for lo, hi in edges:
+        assert lo <= hi and (lo.year, lo.month) == (hi.year, hi.month)
+        assert not (lo.day == 1 and (hi + timedelta(days=1)).day == 1), "mois complet laissé en bord"
+        covered += days(lo, hi)
+    assert sorted(covered) == days(start, end)
+
+
+@pytest.mark.parametrize("start, end, full, edges", [
+    # Mois complets seulement
+    (date(2020, 1, 1), date(2020, 3, 31), (date(2020, 1, 1), date(2020, 3, 31)), []),
+    # Début et fin en milieu de mois
+    (date(2020, 1, 15), date(2020, 4, 10), (date(2020, 2, 1), date(2020, 3, 31)),
+     [(date(2020, 1, 15), date(2020, 1, 31)), (date(2020, 4, 1), date(2020, 4, 10))]),
+    # Fin en milieu de mois seulement, février bissextile complet
+    (date(2020, 2, 1), date(2020, 3, 5), (date(2020, 2, 1), date(2020, 2, 29)), [(date(2020, 3, 1), date(2020, 3, 5))]),
+    # Passage d'année avec mois complets
+    (date(2019, 11, 20), date(2020, 2, 3), (date(2019, 12, 1), date(2020, 1, 31)),
+     [(date(2019, 11, 20), date(2019, 11, 30)), (date(2020, 2, 1), date(2020, 2, 3))]),
+    # Passage d'année sans mois complet
+    (date(2019, 12, 15), date(2020, 1, 10), None, [(date(2019, 12, 15), date(2019, 12, 31)), (date(2020, 1, 1), date(2020, 1, 10))]),
+    # Plage contenue dans un seul mois
+    (date(2021, 6, 3), date(2021, 6, 3), None, [(date(2021, 6, 3), date(2021, 6, 3))]),
+    (date(2021, 6, 2), date(2021, 6, 30), None, [(date(2021, 6, 2), date(2021, 6, 30))]),
+    # Début le dernier jour d'un mois de 31 jours
+    (date(2021, 1, 31), date(2021, 3, 1), (date(2021, 2, 1), date(2021, 2, 28)),
+     [(date(2021, 1, 31), date(2021, 1, 31)), (date(2021, 3, 1), date(2021, 3, 1))])
+])
+def test_split_full_months(start, end, full, edges):
+    assert split_full_months(start, end) == (full, edges)
+    assert_partition(start, end)
+
+
+def test_split_full_months_random_ranges():
+    rng = random.Random(0)
+    origin = date(2018, 1, 1)
+    for _ in range(2000):
+        start = origin + timedelta(days=rng.randrange(1500))
+        assert_partition(start, start + timedelta(days=rng.randrange(800)))
+
+
+def test_merge_rollups_adds_counts_and_keeps_extremes():
+    rows = [
+        {"temp_sum": 10.0, "temp_count": 2, "precip_sum": 1.5, "precip_count": 1, "wind_sum": 6.0, "wind_count": 2,
+         "days_count": 2, "temperature_max": 8.0, "temperature_min": 1.0},
+        # Mois sans précipitations ni extrêmes mesurés
+        {"temp_sum": 4.0, "temp_count": 1, "precip_sum": None, "precip_count": 0, "wind_sum": 3.0, "wind_count": 1,
+         "days_count": 1, "temperature_max": None, "temperature_min": None},
+        {"temp_sum": -3.0, "temp_count": 3, "precip_sum": 0.5, "precip_count": 2, "wind_sum": None, "wind_count": 0,
+         "days_count": 3, "temperature_max": 2.0, "temperature_min": -4.0}
+    ]
+    assert merge_rollups(rows) == {
+        "temp_sum": 11.0, "temp_count": 6, "precip_sum": 2.0, "precip_count": 3, "wind_sum": 9.0, "wind_count": 3,
+        "days_count": 6, "temperature_max": 8.0, "temperature_min": -4.0
+    }
+
+
+def test_merge_rollups_without_rows():
+    merged = merge_rollups([])
+    assert merged["days_count"] == 0 and merged["temp_count"] == 0
+    assert merged["temperature_max"] is None and merged["temperature_min"] is None
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import weather
+from app.core.cache import result_cache
+from app.services.elasticsearch_service import ElasticsearchService
+
+STATION = "071560-99999"
+
+# Histogramme mensuel renvoyé par Elasticsearch (mois sans événement absents)
+MONTHS = {"2019-01": 1, "2019-12": 3, "2020-01": 2, "2020-02": 1, "2020-03": 4, "2020-07": 6, "2020-12": 5}
+
+
+class FakeClient:
+    def __init__(self, months=MONTHS):
+        self.months = months
+        self.bodies = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def search(self, index, body):
+        self.bodies.append(body)
+        buckets = [{"key_as_string": month, "doc_count": count} for month, count in sorted(self.months.items())]
+        return {"aggregations": {"per_month": {"buckets": buckets}}}
+
+
+class FakeHadoop:
+    """Lignes de seasonal_rollup, une par (année, saison)"""
+
+    is_connected = True
+
+    async def get_seasonal_analysis_range(self, location, start_year, end_year):
+        return [
+            {"year": year, "season": season, "avg_temp": 10.0, "days_count": 90}
+            for year in range(start_year, end_year + 1)
+            for season in ("Winter", "Spring", "Summer", "Fall")
+        ]
+
+
+def es_service(client):
+    service = ElasticsearchService()
+    service.is_connected = True
+    service._indices_ready = True
+    service.es = client
+    return service
+
+
+def test_months_are_folded_into_calendar_seasons():
+    """Décembre compte dans l'hiver de sa propre année, comme les rollups Hive"""
+    client = FakeClient()
+    counts = asyncio.run(es_service(client).count_events_by_season(STATION, 2019, 2020))
+
+    assert counts == {
+        (2019, "Winter"): 4,
+        (2020, "Winter"): 8,
+        (2020, "Spring"): 4,
+        (2020, "Summer"): 6
+    }
+    body = client.bodies[0]
+    assert body["size"] == 0
+    assert body["query"]["bool"]["must"][1] == {"range": {"date": {"gte": "2019-01-01", "lt": "2021-01-01"}}}
+
+
+def test_search_error_counts_nothing():
+    class FailingClient(FakeClient):
+        async def search(self, index, body):
+            raise ConnectionError("elasticsearch indisponible")
+
+    assert asyncio.run(es_service(FailingClient()).count_events_by_season(STATION, 2020, 2020)) == {}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    result_cache.clear()
+    monkeypatch.setattr(weather.weather_service, "hadoop_service", FakeHadoop())
+    monkeypatch.setattr(weather.weather_service, "es_service", es_service(FakeClient()))
+    app = FastAPI()
+    app.include_router(weather.router, prefix="/weather")
+    yield TestClient(app)
+    result_cache.clear()
+
+
+def test_seasonal_endpoint_adds_event_counts(client):
+    response = client.get(f"/weather/seasonal/{STATION}", params={"start_year": 2019, "end_year": 2020})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["start_year"], body["end_year"], body["location"]) == (2019, 2020, STATION)
+
+    events = {(row["year"], row["season"]): row["significant_events"] for row in body["seasonal_analysis"]}
+    assert len(events) == 8
+    assert events[(2019, "Winter")] == 4 and events[(2019, "Fall")] == 0
+    assert events[(2020, "Winter")] == 8 and events[(2020, "Summer")] == 6
+
+
+def test_seasonal_endpoint_defaults_to_a_single_year(client):
+    body = client.get(f"/weather/seasonal/{STATION}", params={"start_year": 2020}).json()
+    assert body["end_year"] == 2020
+    assert [row["year"] for row in body["seasonal_analysis"]] == [2020] * 4
+
+
+def test_seasonal_endpoint_rejects_inverted_years(client):
+    response = client.get(f"/weather/seasonal/{STATION}", params={"start_year": 2021, "end_year": 2020})
+    assert response.status_code == 400
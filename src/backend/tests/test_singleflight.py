@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def query():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return {"rows": 3}
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", query) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert results == [{"rows": 3}] * 10
+    assert len(executions) == 1
+    assert (flight.calls, flight.deduplicated) == (10, 9)
+    assert flight._inflight == {}
+
+
+def test_distinct_keys_and_later_calls_run_again():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def query():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return len(executions)
+
+    async def run():
+        await asyncio.gather(flight.do("a", query), flight.do("b", query))
+        await flight.do("a", query)
+
+    asyncio.run(run())
+    assert len(executions) == 3
+
+
+def test_error_is_raised_to_every_waiter_then_forgotten():
+    flight = SingleFlight("test")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError("Hive indisponible")
+
+    async def run():
+        results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        with pytest.raises(ConnectionError):
+            await flight.do("key", failing)
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def query():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", query))
+        second = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(run())
@@ -0,0 +1,103 @@
+import gzip
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("tqdm")
+
+DETAILS = (
+    "BEGIN_YEARMONTH,EVENT_ID,DAMAGE_PROPERTY\n"
+    "201901,1,10.00K\n"
+    "201901,2,\n"
+    "201902,3,0.00K\n"
+)
+FATALITIES = "FATALITY_ID,EVENT_ID\n7,1\n"
+LOCATIONS = "EVENT_ID,LOCATION_INDEX\n1,1\n"
+
+
+def test_downloaded_files_are_found_by_the_importer(ingestion, http_server, tmp_path, monkeypatch):
+    """Noms écrits par le téléchargement = noms recherchés par l'import"""
+    download = ingestion("download_noaa_data")
+    storm_events = ingestion("storm_events")
+    schemas = ingestion("schemas")
+
+    contents = {"details": DETAILS, "fatalities": FATALITIES, "locations": LOCATIONS}
+    for kind, content in contents.items():
+        archive = storm_events.storm_events_archive(kind, 2019)
+        http_server.publish(f"/{archive}", gzip.compress(content.encode()), f'"{kind}"')
+    monkeypatch.setattr(download.NOAADataDownloader, "STORM_EVENTS_URL", http_server.url)
+
+    downloader = download.NOAADataDownloader(base_path=str(tmp_path))
+    try:
+        downloader.download_storm_events(2019, 2019)
+    finally:
+        downloader.session.close()
+
+    # Découverte des fichiers comme dans NOAADataImporter.import_weather_data
+    storm_dir = tmp_path / "storm_events"
+    found = sorted(storm_dir.glob(storm_events.storm_events_pattern()))
+    assert [f.name for f in found] == [
+        "StormEvents_details-ftp_v1.0_2019.csv",
+        "StormEvents_fatalities-ftp_v1.0_2019.csv",
+        "StormEvents_locations-ftp_v1.0_2019.csv",
+    ]
+    assert {storm_events.storm_events_year(f) for f in found} == {2019}
+
+    # ... puis par type et par année comme dans _read_storm_events
+    for kind in contents:
+        matches = list(storm_dir.glob(storm_events.storm_events_pattern(kind, "2019")))
+        assert len(matches) == 1
+        assert schemas.storm_events_version(matches[0].name) == "v1.0"
+
+    # Les lignes details sans DAMAGE_PROPERTY sont écartées
+    details = (storm_dir / "StormEvents_details-ftp_v1.0_2019.csv").read_text().splitlines()
+    assert details == ["BEGIN_YEARMONTH,EVENT_ID,DAMAGE_PROPERTY", "201901,1,10.00K", "201902,3,0.00K"]
+
+
+def test_year_is_read_from_the_end_of_the_name(ingestion, tmp_path):
+    storm_events = ingestion("storm_events")
+    archive = tmp_path / storm_events.storm_events_archive("details", 2021)
+    csv = storm_events.storm_events_csv(archive)
+    assert csv.name == "StormEvents_details-ftp_v1.0_2021.csv"
+    assert storm_events.storm_events_year(csv) == 2021
+    with pytest.raises(ValueError):
+        storm_events.storm_events_year(tmp_path / "StormEvents_details-ftp_v1.0_2021.csv.csv")
+
+
+def test_locations_without_coordinates_have_no_point(ingestion, spark):
+    """Un lieu sans latitude/longitude n'a pas de point (geo_point nul plutôt que {lat: null})"""
+    importer = ingestion("import_noaa_data").NOAADataImporter
+    locations = spark.createDataFrame(
+        [(1, 2, "B", 1.0, "N", None, -97.1), (1, 1, "A", 0.5, "S", 35.2, -97.4), (2, 1, "C", None, None, None, None)],
+        "EVENT_ID int, LOCATION_INDEX int, LOCATION string, RANGE double, AZIMUTH string, LATITUDE double, LONGITUDE double"
+    )
+
+    rows = {row["EVENT_ID"]: row["locations"] for row in importer._storm_event_locations(locations).collect()}
+
+    assert [loc["index"] for loc in rows[1]] == [1, 2]
+    assert rows[1][0]["point"].asDict() == {"lat": 35.2, "lon": -97.4}
+    assert rows[1][1]["point"] is None
+    assert rows[2][0]["point"] is None
+
+
+def test_storm_events_documents(ingestion, spark):
+    """Projection vers weather_events: lieu de repli, victimes, begin_point nul sans coordonnées"""
+    noaa = ingestion("import_noaa_data")
+    events = spark.createDataFrame(
+        [(1, 10, "Tornado", None, "MOORE", "OKLAHOMA", "2019-05-20 15:30:00", "F3", 1500.0, 1000.0, 500.0, 3, 1, 35.3, -97.5),
+         (2, 10, "Hail", "NORMAN", "CLEVELAND", "OKLAHOMA", "2019-05-20 16:00:00", "1.75", 0.0, 0.0, 0.0, 0, 0, None, -97.4)],
+        "EVENT_ID int, EPISODE_ID int, EVENT_TYPE string, BEGIN_LOCATION string, CZ_NAME string, STATE string, "
+        "date string, MAGNITUDE string, damage_estimate double, damage_property double, damage_crops double, "
+        "injuries int, fatalities int, BEGIN_LAT double, BEGIN_LON double"
+    )
+    events = events.withColumn("date", noaa.col("date").cast("timestamp")).withColumn("EVENT_NARRATIVE", noaa.F.lit(None).cast("string"))
+
+    docs = {row["event_id"]: row.asDict() for row in noaa.NOAADataImporter._storm_events_documents(events).collect()}
+
+    assert docs["1"]["location"] == "MOORE"
+    assert docs["1"]["date"] == "2019-05-20T15:30:00"
+    assert docs["1"]["casualties"] == 4
+    assert docs["1"]["begin_point"].asDict() == {"lat": 35.3, "lon": -97.5}
+    assert docs["2"]["location"] == "NORMAN"
+    assert docs["2"]["begin_point"] is None
+    assert "locations" not in docs["1"]
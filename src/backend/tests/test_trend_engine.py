@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.trend_engine import RollingRegression, TrendEngine
+
+
+def series(seed: int, days: int = 900):
+    """Série journalière avec tendance, cycle saisonnier, bruit et jours manquants"""
+    rng = np.random.default_rng(seed)
+    start = date(2018, 1, 1)
+    x = np.arange(days)
+    y = 10 + 0.002 * x + 8 * np.sin(2 * np.pi * x / 365.25) + rng.normal(0, 2, days)
+    kept = rng.random(days) > 0.2
+    return [start + timedelta(days=int(i)) for i in x[kept]], y[kept]
+
+
+def test_rolling_regression_matches_polyfit_on_each_window():
+    days, values = series(0)
+    x = np.array([d.toordinal() for d in days], dtype=float)
+    regression = RollingRegression(90)
+    for i in range(len(x)):
+        regression.push(x[i], values[i])
+        window = x > x[i] - 90
+        window[i + 1:] = False
+        assert regression.count == window.sum()
+        assert regression.mean_y == pytest.approx(values[window].mean(), abs=1e-9)
+        if window.sum() >= 2:
+            assert regression.slope == pytest.approx(np.polyfit(x[window], values[window], 1)[0], abs=1e-9)
+        else:
+            assert regression.slope is None
+
+
+def test_window_restarts_after_gap():
+    regression = RollingRegression(10)
+    for x, y in [(0, 1.0), (1, 2.0), (2, 3.0)]:
+        regression.push(x, y)
+    assert regression.slope == pytest.approx(1.0)
+    regression.push(30, 5.0)
+    assert regression.count == 1 and regression.mean_y == 5.0
+    assert regression.slope is None
+
+
+def test_trend_engine_slope_is_per_year():
+    days, values = series(1)
+    x = np.array([d.toordinal() for d in days], dtype=float)
+    engine = TrendEngine(window_days=30, slope_window_days=730)
+    for day, value in zip(days, values):
+        mean, slope, adjusted = engine.push(day, value)
+
+    window = x > x[-1] - 730
+    assert slope == pytest.approx(np.polyfit(x[window], values[window], 1)[0] * 365.25, abs=1e-6)
+    recent = x > x[-1] - 30
+    assert mean == pytest.approx(values[recent].mean())
+    assert np.isfinite(adjusted)